@@ -0,0 +1,176 @@
+from collections import namedtuple
+
+from engine import STATES
+
+# --- TAGI ---
+# Tag = nazwana wartość procesu. Tagi czytane są blokami (tablica grafu przez tolist() albo krotka
+# skalarów) - blok bez zmian odpada jednym porównaniem list w C, indeksy zmienionych tagów szukamy
+# tylko w blokach, które się zmieniły.
+
+class TagTable:
+    """ Płaska tablica wartości tagów; scan() odczytuje bloki i zwraca indeksy tagów zmienionych od poprzedniego """
+    def __init__(self):
+        self.names = []; self.index = {}; self.values = []
+        self.blocks = [] # [pierwszy indeks, odczyt bloku, poprzednie wartości]
+
+    def block(self, names, read):
+        base = len(self.names)
+        for k, name in enumerate(names):
+            if name in self.index: raise ValueError(f"tag {name}: powtórzona nazwa")
+            self.index[name] = base + k
+        self.names += names; self.values += [0.0] * len(names)
+        self.blocks.append([base, read, [None] * len(names)])
+
+    def scan(self):
+        values = self.values; changed = []
+        for b in self.blocks:
+            base, read, prev = b
+            cur = read()
+            if cur == prev: continue
+            for k, (v, old) in enumerate(zip(cur, prev)):
+                if v != old: values[base + k] = v; changed.append(base + k)
+            b[2] = cur
+        return changed
+
+    def invalidate(self):
+        """ Następny scan() zgłosi wszystkie tagi jako zmienione (np. po odtworzeniu punktu kontrolnego) """
+        for b in self.blocks: b[2] = [None] * len(b[2])
+
+def process_tags(proc):
+    """ Tagi procesu: <węzeł>.level/temp/heater/cooling/overflow, <pompa>.on, PID.out/integral, PROC.state/paused """
+    g = proc.graph; t = TagTable()
+    for field, arr in (("level", g.level), ("temp", g.temp), ("heater", g.heater), ("cooling", g.cooling),
+                       ("overflow", g.spill)):
+        t.block([f"{i}.{field}" for i in g.ids], arr.tolist)
+    t.block([f"{p}.on" for p in g.pump_ids], g.active.tolist)
+    m = proc.mix; heater = g.heater; cooling = g.cooling; pid = proc.pid
+    t.block(["PID.out", "PID.integral", "PROC.state", "PROC.paused"],
+            lambda: (heater[m] - cooling[m], pid.integral, STATES.index(proc.state), proc.is_paused))
+    return t
+
+# --- REGUŁY ---
+# Opis (np. "alarms" w instalacja.json): id, tag, jeden z progów "hi" / "lo" / "roc" [jednostka/s czasu procesu],
+# "deadband" (histereza powrotu), "on_delay" / "off_delay" [s czasu procesu], "latch" (zostaje do potwierdzenia),
+# "when" (tag warunkujący - reguła działa tylko, gdy jest niezerowy), "priority" (1 = najwyższy), "text".
+KINDS = ("hi", "lo", "roc")
+
+AlarmView = namedtuple("AlarmView", "id text priority active acked value")
+
+class Rule:
+    __slots__ = ("id", "text", "priority", "tag", "when", "kind", "limit", "deadband", "on_delay", "off_delay", "latch",
+                 "raw", "since", "on", "active", "acked", "value", "order", "prev_v", "prev_t")
+
+    def __init__(self, desc, tags):
+        self.id = desc["id"]; self.text = desc.get("text", self.id); self.priority = int(desc.get("priority", 2))
+        kinds = [k for k in KINDS if k in desc]
+        if len(kinds) != 1: raise ValueError(f"alarm {self.id}: wymagany dokładnie jeden próg z {', '.join(KINDS)}")
+        self.kind = kinds[0]; self.limit = float(desc[self.kind])
+        try:
+            self.tag = tags.index[desc["tag"]]
+            self.when = tags.index[desc["when"]] if desc.get("when") else None
+        except KeyError as e: raise ValueError(f"alarm {self.id}: nieznany tag {e}") from None
+        self.deadband = float(desc.get("deadband", 0.0))
+        self.on_delay = float(desc.get("on_delay", 0.0)); self.off_delay = float(desc.get("off_delay", 0.0))
+        self.latch = bool(desc.get("latch", False))
+        self.raw = False; self.since = 0.0   # Warunek bez opóźnień i chwila jego ostatniej zmiany
+        self.on = False                      # Warunek po opóźnieniach
+        self.active = False; self.acked = True; self.value = 0.0; self.order = 0
+        self.prev_v = None; self.prev_t = 0.0
+
+    def condition(self, values, now):
+        """ Warunek z histerezą: raz spełniony gaśnie dopiero po wyjściu poza próg o deadband """
+        if self.when is not None and not values[self.when]: return False
+        v = values[self.tag]
+        if self.kind == "roc":
+            if self.prev_v is None or now < self.prev_t: self.prev_v = v; self.prev_t = now; return False
+            if now == self.prev_t: return self.raw
+            rate = abs(v - self.prev_v) / (now - self.prev_t); self.prev_v = v; self.prev_t = now
+            self.value = rate
+            return rate > self.limit - (self.deadband if self.raw else 0.0)
+        self.value = v
+        if self.kind == "hi": return v > self.limit - (self.deadband if self.raw else 0.0)
+        return v < self.limit + (self.deadband if self.raw else 0.0)
+
+    @property
+    def listed(self):
+        return self.active or not self.acked
+
+    def view(self):
+        return AlarmView(self.id, self.text, self.priority, self.active, self.acked, self.value)
+
+class AlarmEngine:
+    """ Przyrostowa ocena alarmów: reguły zaindeksowane tagami, od których zależą - w scan() liczone są tylko
+        reguły ze zmienionymi tagami oraz te, które czekają na opóźnienie (albo mierzą szybkość zmian).
+        Zdarzenia (wystąpienie, powrót do normy, potwierdzenie) idą do on_event(typ, treść). """
+    def __init__(self, tags, rules=()):
+        self.tags = tags
+        self.rules = [Rule(d, tags) for d in rules]
+        ids = [r.id for r in self.rules]
+        if len(set(ids)) != len(ids): raise ValueError("alarm: powtórzony identyfikator reguły")
+        self.by_id = dict(zip(ids, self.rules))
+        self.by_tag = {}
+        for r in self.rules:
+            for k in {r.tag, r.when} - {None}: self.by_tag.setdefault(k, []).append(r)
+        self.pending = set() # Reguły oceniane co scan bez zmiany tagu
+        self.view = (); self.dirty = False; self.raised = 0
+        self.evaluated = 0 # Liczba reguł ocenionych w ostatnim scan()
+        self.on_event = None
+
+    def emit(self, msg):
+        self.dirty = True
+        if self.on_event is not None: self.on_event("ALARM", msg)
+
+    def scan(self, now):
+        """ Ocena reguł w chwili `now` [s czasu procesu]; True, gdy zmieniła się lista alarmów """
+        changed = self.tags.scan()
+        if changed:
+            due = set(self.pending); by_tag = self.by_tag
+            for k in changed:
+                rs = by_tag.get(k)
+                if rs: due.update(rs)
+        elif self.pending: due = list(self.pending)
+        else: self.evaluated = 0; return False
+        values = self.tags.values
+        for r in due: self.evaluate(r, values, now)
+        self.evaluated = len(due)
+        return self.publish()
+
+    def evaluate(self, r, values, now):
+        cond = r.condition(values, now)
+        if now < r.since: r.since = now # Czas procesu liczy się od zera w każdej partii
+        if cond != r.raw: r.raw = cond; r.since = now
+        if r.raw != r.on and now - r.since >= (r.on_delay if r.raw else r.off_delay):
+            r.on = r.raw
+            if r.on:
+                self.raised += 1; r.order = self.raised
+                r.active = True; r.acked = False
+                self.emit(f"{r.id}: {r.text} ({r.value:.2f})")
+            elif r.latch and not r.acked:
+                self.emit(f"{r.id}: powrót do normy - zatrzaśnięty, wymaga potwierdzenia")
+            else:
+                r.active = False
+                self.emit(f"{r.id}: powrót do normy")
+        if r.raw != r.on or r.raw and r.kind == "roc": self.pending.add(r)
+        else: self.pending.discard(r)
+
+    def ack(self, rid=None):
+        """ Potwierdzenie alarmu `rid` (None = wszystkich); zatrzaśnięty bez warunku gaśnie """
+        rules = self.rules if rid is None else [self.by_id[rid]] if rid in self.by_id else []
+        for r in rules:
+            if r.acked: continue
+            r.acked = True
+            if not r.on: r.active = False
+            self.emit(f"{r.id}: potwierdzony")
+        return self.publish()
+
+    def invalidate(self):
+        """ Pełna ocena w następnym scan() - po skoku stanu (punkt kontrolny, odtwarzanie) """
+        self.tags.invalidate()
+        for r in self.rules: r.prev_v = None
+
+    def publish(self):
+        if not self.dirty: return False
+        self.dirty = False
+        listed = sorted((r for r in self.rules if r.listed), key=lambda r: (r.acked, r.priority, -r.order))
+        self.view = tuple(r.view() for r in listed)
+        return True
@@ -0,0 +1,265 @@
+import os
+import sys
+import json
+import time
+import math
+import argparse
+import platform
+import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from engine import REFRESH_RATE, STATES, DualPID, MixingProcess
+
+# --- KONFIGURACJA ---
+BASELINE_FILE = "bench_baseline.json"
+TOLERANCE = 0.25        # Dopuszczalne pogorszenie względem bazy (25%)
+REPEAT = 5              # Powtórzenia pomiaru - bierzemy najlepszy (najmniej zakłóceń)
+MIN_SAMPLES = 20        # Faza z mniejszą liczbą kroków (np. CALCULATING) to sam szum - pomijamy
+DT = REFRESH_RATE / 1000.0
+
+def median(xs):
+    xs = sorted(xs); return xs[len(xs) // 2]
+
+def measure(fn, number, repeat=REPEAT):
+    """ Najlepszy czas jednego wywołania fn() [ms] z `repeat` serii po `number` wywołań """
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number): fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best * 1000.0
+
+class Results:
+    """ Wyniki: nazwa -> (wartość, jednostka, czy większa = lepsza) """
+    def __init__(self, quick=False):
+        self.data = {}; self.quick = quick
+
+    def add(self, name, value, unit="ms", higher_better=False):
+        self.data[name] = {"value": value, "unit": unit, "higher_better": higher_better}
+        print(f"  {name:<40} {value:>14,.4f} {unit}")
+
+    def to_json(self):
+        from PyQt5.QtCore import QT_VERSION_STR
+        meta = {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(), "qt": QT_VERSION_STR,
+                "machine": platform.machine(), "platform": platform.platform(), "quick": self.quick}
+        return {"meta": meta, "results": self.data}
+
+# --- SILNIK ---
+
+def bench_engine(res, quick):
+    print("SILNIK (fizyka + DualPID + maszyna stanów)")
+    batches = 2 if quick else 10
+    per_state = {s: [] for s in STATES}; total_t = 0.0
+    for _ in range(batches):
+        p = MixingProcess(); p.start()
+        while p.state != "DONE":
+            s = p.state; t0 = time.perf_counter(); p.step(DT); t = time.perf_counter() - t0
+            per_state[s].append(t); total_t += t
+    res.add("engine.steps_per_s", sum(map(len, per_state.values())) / total_t, "kroków/s", True)
+    for s, ts in per_state.items():
+        if len(ts) >= MIN_SAMPLES: res.add(f"engine.step[{s}]", median(ts) * 1e6, "µs")
+
+    pid = DualPID(15.0, 0.8, 5.0); k = [0]
+    def pid_step():
+        k[0] += 1; pid.compute(60.0, 55.0 + math.sin(k[0] * 0.01), DT)
+    res.add("engine.pid_compute", measure(pid_step, 20_000) * 1000, "µs")
+
+# --- ALARMY ---
+
+def bench_alarms(res, quick):
+    from alarms import AlarmEngine, process_tags
+    print("ALARMY (scan po kroku procesu: tylko reguły zmienionych tagów vs pełna ocena)")
+    for n in ((100, 10_000) if quick else (100, 1000, 10_000)):
+        p = MixingProcess(); tags = process_tags(p)
+        # Reguły rozłożone równo na wszystkie tagi, progi poza zakresem - mierzymy samą ocenę
+        a = AlarmEngine(tags, [{"id": f"R{k}", "tag": tags.names[k % len(tags.names)], "hi": 1e9} for k in range(n)])
+        p.start(); a.scan(p.sim_time)
+        ts = []; evaluated = 0
+        while p.state != "DONE":
+            p.step(DT)
+            t0 = time.perf_counter(); a.scan(p.sim_time); ts.append(time.perf_counter() - t0)
+            evaluated += a.evaluated
+        res.add(f"alarms.scan[{n} reguł]", median(ts) * 1e6, "µs")
+        res.add(f"alarms.evaluated[{n} reguł]", evaluated / len(ts), "reguł/scan")
+        def full():
+            a.invalidate(); a.scan(p.sim_time)
+        res.add(f"alarms.full_scan[{n} reguł]", measure(full, 10 if quick else 50) * 1000, "µs")
+
+# --- WIDGETY ---
+
+def bench_paint(res, quick):
+    from PyQt5.QtGui import QPixmap
+    from PyQt5.QtCore import Qt
+    from main import CyberTank, CyberPipe, TurboPump
+    from worker import TankView
+    print("RYSOWANIE WIDGETÓW (paintEvent)")
+    n = 100 if quick else 500
+    tanks = {"idle": TankView("MIESZALNIK", 200, 0.0, 20.0, 0.0, 0.0),
+             "heating": TankView("MIESZALNIK", 200, 150.0, 55.3, 80.0, 0.0),
+             "cooling": TankView("MIESZALNIK", 200, 150.0, 62.1, 0.0, 40.0)}
+    for name, view in tanks.items():
+        w = CyberTank(view, "#ff00ff"); pm = QPixmap(w.size()); pm.fill(Qt.transparent)
+        w.render(pm) # pierwsze wywołanie buduje cache
+        res.add(f"paint.CyberTank[{name}]", measure(lambda: w.render(pm), n))
+    for on in (False, True):
+        w = TurboPump("P-A", "CornerR"); w.set_on(on); pm = QPixmap(w.size()); w.render(pm)
+        def frame(): w.rotate(); w.render(pm)
+        res.add(f"paint.TurboPump[{'on' if on else 'off'}]", measure(frame, n))
+    for orient in ("V", "H"):
+        w = CyberPipe(orient); w.set_active(True); w.resize(24, 120) if orient == "V" else w.resize(120, 24)
+        pm = QPixmap(w.size()); w.render(pm)
+        res.add(f"paint.CyberPipe[{orient}]", measure(lambda: w.render(pm), n))
+
+# --- WYKRES ---
+
+def bench_plot(res, app, quick):
+    from plot import TrendPlot
+    from trend import NativeTrend
+    from telemetry import SPANS, TelemetryStore
+    print("WYKRES (render/blit Matplotlib i QPainter przy różnej długości historii)")
+    store = TelemetryStore()
+    plot = TrendPlot(store); plot.timer.stop()
+    plot.resize(800, 500); plot.show()
+    native = NativeTrend(store); native.timer.stop()
+    native.resize(800, 500); native.show(); app.processEvents()
+    spans = {k: v for k, v in SPANS.items() if not quick or v <= 3600}
+    k = 0
+    for label, seconds in spans.items():
+        # Dopełniamy historię do długości okna
+        while k * store.dt < seconds:
+            store.push(k * store.dt, 50 + 10 * math.sin(k / 20), 60, 80 * math.cos(k / 30), (0,) * 4, (0,) * 4); k += 1
+        plot.set_span(seconds); plot.draw(); native.set_span(seconds); app.processEvents()
+        for name, w in (("render", plot), ("native", native)):
+            def frame():
+                w.drawn_seq = -1; w.render()
+            res.add(f"plot.{name}[{label}]", measure(frame, 20 if quick else 50))
+    plot.close(); native.close()
+
+# --- DZIENNIK ---
+
+def bench_log(res, quick):
+    from PyQt5.QtWidgets import QTableView
+    from eventlog import LOG_CAPACITY, EventLogModel
+    print("DZIENNIK ZDARZEŃ (add_log + wstawienie do widoku, paczka 100 zdarzeń)")
+    model = EventLogModel(None); view = QTableView(); view.setModel(model); view.show()
+    k = [0]
+    def batch():
+        for _ in range(100):
+            k[0] += 1; model.append("ZMIANA STANU", f"Zdarzenie {k[0]}")
+        model.flush()
+    for rows in (0, LOG_CAPACITY // 4, LOG_CAPACITY // 2, LOG_CAPACITY):
+        # Pomiar przy zadanym rozmiarze tabeli (pełna tabela = pierścień wyrzuca najstarsze)
+        best = float("inf")
+        for _ in range(3 if quick else 10):
+            model.clear()
+            while len(model.rows) < rows: batch()
+            t0 = time.perf_counter(); batch(); best = min(best, time.perf_counter() - t0)
+        res.add(f"log.add_100[{rows} wierszy]", best * 1000)
+    view.close()
+
+# --- PĘTLA GUI ---
+
+def event_counter():
+    """ Filtr zdarzeń aplikacji liczący przerysowania (Paint) i przeliczenia stylu (StyleChange) """
+    from PyQt5.QtCore import QObject, QEvent
+    class Counter(QObject):
+        def __init__(self):
+            super().__init__(); self.counts = {QEvent.Paint: 0, QEvent.StyleChange: 0}
+        def eventFilter(self, obj, e):
+            if e.type() in self.counts: self.counts[e.type()] += 1
+            return False
+    return Counter()
+
+def bench_loop(res, app, quick):
+    from PyQt5.QtCore import QEvent
+    from main import FutureSCADA
+    print("PĘTLA GUI (loop() + odświeżenie widgetów) i TICK PROCESU - wg fazy")
+    w = FutureSCADA(historian=None, journal=None, checkpoint=None); w.show(); app.processEvents()
+    w.timer.stop(); w.worker.stop() # Sterujemy krokami ręcznie
+    worker = w.worker; p = worker.proc
+    gui = {s: [] for s in STATES}; proc = {s: [] for s in STATES}
+    counter = event_counter(); app.installEventFilter(counter)
+    paints = {s: 0 for s in STATES}; styles = {s: 0 for s in STATES}
+    for _ in range(1 if quick else 3):
+        p.reset(log=False); p.start()
+        while p.state != "DONE":
+            s = p.state
+            t0 = time.perf_counter()
+            with worker.lock:
+                p.step(worker.clock.dt); worker.store.push_process(p)
+            worker.publish()
+            t1 = time.perf_counter()
+            w.loop(); app.processEvents() # paintEvent-y zaplanowane przez update()
+            t2 = time.perf_counter()
+            proc[s].append(t1 - t0); gui[s].append(t2 - t1)
+            c = counter.counts; paints[s] += c[QEvent.Paint]; styles[s] += c[QEvent.StyleChange]
+            c[QEvent.Paint] = c[QEvent.StyleChange] = 0
+    # Mediana - pojedyncze klatki z przebudową cache (zmiana stanu) nie zaburzają wyniku
+    for s in STATES:
+        if len(gui[s]) >= MIN_SAMPLES:
+            res.add(f"loop.gui[{s}]", median(gui[s]) * 1000)
+            res.add(f"loop.process_tick[{s}]", median(proc[s]) * 1000)
+            # Zdarzenia na klatkę: przerysowania widgetów i przeliczenia arkusza stylów
+            res.add(f"loop.paint_events[{s}]", paints[s] / len(gui[s]), "/klatkę")
+            res.add(f"loop.style_events[{s}]", styles[s] / len(gui[s]), "/klatkę")
+    app.removeEventFilter(counter)
+    w.close()
+
+# --- PORÓWNANIE ---
+
+def compare(current, baseline, tolerance):
+    """ Tabela zmian względem bazy; zwraca listę regresji """
+    regressions = []
+    print(f"\n{'POMIAR':<40} {'BAZA':>14} {'TERAZ':>14} {'ZMIANA':>9}")
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None: print(f"{name:<40} {'-':>14} {cur['value']:>14,.4f}      NOWY"); continue
+        b = base["value"]; c = cur["value"]
+        change = (c - b) / b if b else 0.0
+        worse = -change if cur["higher_better"] else change
+        flag = "  REGRESJA" if worse > tolerance else ""
+        if flag: regressions.append(name)
+        print(f"{name:<40} {b:>14,.4f} {c:>14,.4f} {change:>+8.1%}{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark: krok symulacji, alarmy, rysowanie widgetów, wykres, dziennik, pętla GUI")
+    ap.add_argument("-o", "--out", metavar="PLIK", default="bench.json", help="zapis wyników (JSON)")
+    ap.add_argument("--baseline", metavar="PLIK", nargs="?", const=BASELINE_FILE, default=None,
+                    help=f"porównaj z zapisaną bazą (domyślnie {BASELINE_FILE})")
+    ap.add_argument("--save-baseline", action="store_true", help="zapisz wyniki jako nową bazę")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE, help="dopuszczalne pogorszenie (ułamek)")
+    ap.add_argument("--quick", action="store_true", help="krótsze serie pomiarowe")
+    ap.add_argument("--only", nargs="+", choices=("engine", "alarms", "paint", "plot", "log", "loop"), default=None,
+                    help="uruchom tylko wybrane grupy")
+    args = ap.parse_args()
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    res = Results(args.quick)
+    groups = {"engine": lambda: bench_engine(res, args.quick), "alarms": lambda: bench_alarms(res, args.quick),
+              "paint": lambda: bench_paint(res, args.quick),
+              "plot": lambda: bench_plot(res, app, args.quick), "log": lambda: bench_log(res, args.quick),
+              "loop": lambda: bench_loop(res, app, args.quick)}
+    for name, run in groups.items():
+        if args.only is None or name in args.only: run()
+
+    out = res.to_json()
+    with open(args.out, "w", encoding="utf-8") as f: json.dump(out, f, indent=2, ensure_ascii=False)
+    print(f"\nZapisano: {args.out}")
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f: json.dump(out, f, indent=2, ensure_ascii=False)
+        print(f"Zapisano bazę: {BASELINE_FILE}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f: base = json.load(f)
+        if base["meta"].get("quick") != args.quick:
+            print("UWAGA: baza zapisana w innym trybie (--quick) - wyniki słabo porównywalne")
+        bad = compare(res.data, base["results"], args.tolerance)
+        if bad:
+            print(f"\nREGRESJE ({len(bad)}) powyżej {args.tolerance:.0%}: {', '.join(bad)}")
+            sys.exit(1)
+        print(f"\nBrak regresji powyżej {args.tolerance:.0%}")
+    sys.exit(0)
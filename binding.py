@@ -0,0 +1,40 @@
+# --- WIĄZANIA MODEL -> WIDGET ---
+# Klatka GUI tylko zapamiętuje wartości (set), commit() zapisuje je do widgetów jednym przebiegiem -
+# i tylko te, które różnią się od ostatnio zapisanych. Style przełączane dynamiczną właściwością
+# (arkusz okna liczony raz), zamiast setStyleSheet w każdej klatce.
+
+class Binder:
+    """ Klucz -> setter widgetu; pamięta ostatnio zapisaną wartość każdego klucza """
+    def __init__(self):
+        self.setters = {}; self.shown = {}; self.pending = {}
+        self.writes = 0; self.skipped = 0 # Statystyki od ostatniego take_stats()
+
+    def bind(self, key, setter):
+        self.setters[key] = setter
+
+    def set(self, key, value):
+        self.pending[key] = value
+
+    def commit(self):
+        """ Zapis zmienionych wartości klatki do widgetów """
+        shown = self.shown; setters = self.setters
+        for key, value in self.pending.items():
+            if key in shown and shown[key] == value: self.skipped += 1; continue
+            shown[key] = value; setters[key](value); self.writes += 1
+        self.pending.clear()
+
+    def invalidate(self):
+        """ Następny commit() zapisze wszystko (np. po zmianie widgetu poza wiązaniami) """
+        self.shown.clear()
+
+    def take_stats(self):
+        stats = (self.writes, self.skipped); self.writes = self.skipped = 0
+        return stats
+
+def style_property(widget, name):
+    """ Setter dynamicznej właściwości używanej w selektorach arkusza (np. QLabel#status[mode="heating"]) -
+        zmiana wymaga tylko ponownego dopasowania stylu tego widgetu, bez parsowania arkusza """
+    def apply(value):
+        widget.setProperty(name, value)
+        style = widget.style(); style.unpolish(widget); style.polish(widget)
+    return apply
@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import zlib
+import argparse
+import threading
+from array import array
+
+import numpy as np
+
+from engine import CHECKPOINT_FILE, STATES, MixingProcess
+
+# --- FORMAT PLIKU ---
+# Nagłówek (z CRC32 treści) + rekord stanu procesu + tablice węzłów i pomp grafu + historia telemetrii
+# (pierścienie zapisane tylko w zajętej części). Zapis do pliku tymczasowego i os.replace - na dysku
+# jest zawsze poprzedni albo nowy punkt kontrolny, nigdy urwany w połowie.
+MAGIC = b"SCADACKP"
+VERSION = 2 # 2: licznik przelewów węzłów (spill)
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("size", "<u4"), ("crc", "<u4"), ("topology", "<u4"),
+                   ("nodes", "<u4"), ("pumps", "<u4"), ("channels", "<u4"), ("rings", "<u4"), ("created", "<f8")])
+STATE = np.dtype([
+    ("state", "u1"), ("paused", "u1"), ("sim_time", "<f8"), ("calculated_target", "<f8"), ("heat_start", "<f8"),
+    ("integral", "<f8"), ("prev_error", "<f8"), ("kp", "<f8"), ("ki", "<f8"), ("kd", "<f8"),
+    ("temp_a", "<f8"), ("temp_b", "<f8"), ("target", "<f8"),
+])
+RING = np.dtype([("capacity", "<u4"), ("head", "<u4"), ("count", "<u4")])
+
+CHECKPOINT_EVERY = 5.0  # Co ile sekund (czasu rzeczywistego) punkt kontrolny aktywnej partii
+
+STATE_CODE = {s: i for i, s in enumerate(STATES)}
+
+def topology_key(graph):
+    """ Odcisk instalacji - punkt kontrolny pasuje tylko do grafu o tych samych węzłach i pompach """
+    return zlib.crc32(",".join(graph.ids + ["|"] + graph.pump_ids).encode("utf-8"))
+
+def rings(store):
+    """ Pierścienie historii w stałej kolejności: surowy, potem lo/hi/mean każdego poziomu zagęszczeń """
+    out = [store.raw]
+    for tier in store.tiers: out += [tier.lo, tier.hi, tier.mean]
+    return out
+
+# --- ZAPIS ---
+
+def capture(proc, store=None):
+    """ Pełny stan procesu (i historii telemetrii) jako bajty - kopia, bezpieczna do zapisu w innym wątku """
+    g = proc.graph; pid = proc.pid
+    st = np.zeros(1, STATE); s = st[0]
+    s["state"] = STATE_CODE[proc.state]; s["paused"] = proc.is_paused
+    s["sim_time"] = proc.sim_time; s["calculated_target"] = proc.calculated_target; s["heat_start"] = proc.heat_start
+    s["integral"] = pid.integral; s["prev_error"] = pid.prev_error; s["kp"] = pid.kp; s["ki"] = pid.ki; s["kd"] = pid.kd
+    s["temp_a"] = proc.temp_a; s["temp_b"] = proc.temp_b; s["target"] = proc.target
+    parts = [st.tobytes(), g.level.tobytes(), g.temp.tobytes(), g.heater.tobytes(), g.cooling.tobytes(),
+             g.spill.tobytes(), g.active.tobytes()]
+
+    rs = rings(store) if store is not None else []
+    for r in rs:
+        parts.append(np.array([(r.capacity, r.head, r.count)], RING).tobytes())
+        parts.append(r.buf[:r.count].tobytes()) # Druga połowa bufora to kopia pierwszej
+    for tier in (store.tiers if store is not None else ()):
+        parts += [tier.acc_lo.tobytes(), tier.acc_hi.tobytes(), tier.acc_sum.tobytes(),
+                  np.array([tier.acc_n], "<u4").tobytes()]
+
+    body = b"".join(parts)
+    hdr = np.zeros(1, HEADER); h = hdr[0]
+    h["magic"] = MAGIC; h["version"] = VERSION; h["size"] = len(body); h["crc"] = zlib.crc32(body)
+    h["topology"] = topology_key(g); h["nodes"] = len(g.level); h["pumps"] = len(g.active)
+    h["channels"] = store.row.size if store is not None else 0; h["rings"] = len(rs); h["created"] = time.time()
+    return hdr.tobytes() + body
+
+def save(path, data):
+    """ Atomowy zapis: plik tymczasowy, fsync, podmiana nazwy """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# --- ODCZYT ---
+
+class Reader:
+    def __init__(self, data):
+        self.data = data; self.pos = 0
+
+    def take(self, dtype, count=1):
+        a = np.frombuffer(self.data, dtype, count, self.pos); self.pos += a.nbytes
+        return a
+
+    def floats(self, count):
+        return array("d", self.take("<f8", count).tobytes())
+
+def load(path):
+    """ Bajty punktu kontrolnego po sprawdzeniu nagłówka i sumy kontrolnej """
+    with open(path, "rb") as f: data = f.read()
+    header(data)
+    return data
+
+def header(data):
+    if len(data) < HEADER.itemsize: raise ValueError("punkt kontrolny: plik za krótki")
+    h = np.frombuffer(data, HEADER, 1)[0]
+    if h["magic"] != MAGIC: raise ValueError("punkt kontrolny: to nie jest plik punktu kontrolnego")
+    if h["version"] != VERSION: raise ValueError(f"punkt kontrolny: nieobsługiwana wersja {h['version']}")
+    body = memoryview(data)[HEADER.itemsize:]
+    if len(body) != h["size"] or zlib.crc32(body) != h["crc"]: raise ValueError("punkt kontrolny: uszkodzona treść (CRC)")
+    return h
+
+def state(data):
+    """ Rekord stanu procesu (bez odtwarzania) - np. do nastaw w panelu operatora """
+    return np.frombuffer(data, STATE, 1, HEADER.itemsize)[0]
+
+def apply(data, proc, store=None):
+    """ Odtworzenie stanu z bajtów punktu kontrolnego w istniejącym procesie (i historii telemetrii) """
+    h = header(data); g = proc.graph
+    if h["topology"] != topology_key(g) or h["nodes"] != len(g.level) or h["pumps"] != len(g.active):
+        raise ValueError("punkt kontrolny: inna instalacja niż bieżąca")
+    rd = Reader(data); rd.pos = HEADER.itemsize
+    s = rd.take(STATE)[0]; n = int(h["nodes"])
+    g.level[:] = rd.floats(n); g.temp[:] = rd.floats(n); g.heater[:] = rd.floats(n); g.cooling[:] = rd.floats(n)
+    g.spill[:] = rd.floats(n)
+    active = rd.take("i1", int(h["pumps"]))
+    g.set_active(range(len(active)), False); g.set_active(np.flatnonzero(active).tolist(), True)
+
+    proc.state = STATES[s["state"]]; proc.is_paused = bool(s["paused"])
+    proc.sim_time = float(s["sim_time"]); proc.calculated_target = float(s["calculated_target"])
+    proc.heat_start = float(s["heat_start"])
+    pid = proc.pid
+    pid.integral = float(s["integral"]); pid.prev_error = float(s["prev_error"])
+    pid.kp = float(s["kp"]); pid.ki = float(s["ki"]); pid.kd = float(s["kd"])
+    proc.temp_a = float(s["temp_a"]); proc.temp_b = float(s["temp_b"]); proc.target = float(s["target"])
+
+    if store is None or not h["rings"]: return h
+    rs = rings(store)
+    if h["rings"] != len(rs) or h["channels"] != store.row.size:
+        raise ValueError("punkt kontrolny: inna konfiguracja historii telemetrii")
+    width = store.row.size
+    for r in rs:
+        meta = rd.take(RING)[0]
+        if meta["capacity"] != r.capacity: raise ValueError("punkt kontrolny: inna pojemność historii telemetrii")
+        count = int(meta["count"]); rows = rd.take("<f8", count * width).reshape(count, width)
+        r.buf[:count] = rows; r.buf[r.capacity:r.capacity + count] = rows
+        r.head = int(meta["head"]); r.count = count
+    for tier in store.tiers:
+        tier.acc_lo[:] = rd.take("<f8", width); tier.acc_hi[:] = rd.take("<f8", width)
+        tier.acc_sum[:] = rd.take("<f8", width); tier.acc_n = int(rd.take("<u4")[0])
+    store.seq += 1 # Wykres przerysuje odtworzoną historię
+    return h
+
+# --- ZAPIS W TLE ---
+
+class Checkpointer:
+    """ Okresowe punkty kontrolne: wątek procesu tylko serializuje stan, plik pisze osobny wątek.
+        Czeka najwyżej jeden zrzut - jeśli dysk nie nadąża, starszy niezapisany zrzut jest zastępowany. """
+    def __init__(self, path=CHECKPOINT_FILE, every=CHECKPOINT_EVERY):
+        self.path = path; self.every = every
+        self.next_t = 0.0; self.pending = None
+        self.cond = threading.Condition(); self.stopping = False
+        self.written = 0; self.write_ms = 0.0; self.size = 0; self.error = None
+        self.thread = threading.Thread(target=self.run, name="checkpoint", daemon=True)
+
+    def start(self):
+        self.thread.start(); return self
+
+    def due(self, now):
+        return now >= self.next_t
+
+    def submit(self, data):
+        self.next_t = time.perf_counter() + self.every
+        with self.cond:
+            self.pending = data; self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.pending is None and not self.stopping: self.cond.wait()
+                data = self.pending; self.pending = None
+            if data is None: return
+            t0 = time.perf_counter()
+            try: save(self.path, data)
+            except OSError as e: self.error = e; continue
+            self.write_ms = (time.perf_counter() - t0) * 1000; self.size = len(data); self.written += 1
+
+    def stop(self):
+        """ Dopisuje oczekujący zrzut i kończy wątek """
+        with self.cond:
+            self.stopping = True; self.cond.notify()
+        if self.thread.is_alive(): self.thread.join()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Punkt kontrolny: podgląd, czas odtworzenia i przebieg 'co jeśli' do końca partii")
+    ap.add_argument("path", nargs="?", default=CHECKPOINT_FILE)
+    ap.add_argument("--target", type=float, default=None, help="inna temperatura docelowa dla przebiegu")
+    ap.add_argument("--kp", type=float, default=None); ap.add_argument("--ki", type=float, default=None)
+    ap.add_argument("--kd", type=float, default=None)
+    ap.add_argument("--steps", type=int, default=1_000_000, help="limit kroków przebiegu")
+    args = ap.parse_args()
+
+    from telemetry import TelemetryStore
+    proc = MixingProcess(); store = TelemetryStore()
+    t0 = time.perf_counter()
+    data = load(args.path); h = apply(data, proc, store)
+    t_restore = time.perf_counter() - t0
+    print(f"{args.path}: {len(data) / 1024:.1f} KiB, zapisany {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(h['created']))}")
+    print(f"STAN: {proc.state}{' (AWARYJNY STOP)' if proc.is_paused else ''}, CZAS PROCESU: {proc.sim_time:.1f}s, "
+          f"historia: {store.raw.count} próbek surowych")
+    print(f"ODTWORZENIE: {t_restore * 1000:.2f} ms")
+
+    # Przebieg "co jeśli" od zapisanego punktu - bez zmian w pliku
+    if not proc.active: sys.exit(0)
+    if args.target is not None: proc.target = args.target
+    for k in ("kp", "ki", "kd"):
+        if getattr(args, k) is not None: setattr(proc.pid, k, getattr(args, k))
+    proc.is_paused = False
+    n = proc.run_batch(args.steps)
+    print(f"PRZEBIEG: {n} kroków -> {proc.state}, RÓŻNICA: {proc.delta:+.2f}°C (tOut = {proc.tOut.temp:.2f}°C)")
+    sys.exit(0)
@@ -0,0 +1,380 @@
+import sys
+import math
+import time
+import argparse
+
+# --- KONFIGURACJA ---
+REFRESH_RATE = 50     # 50ms = 20 FPS (krok symulacji w ms)
+AMBIENT_TEMP = 20.0
+COOLING_K = 0.0005    # Współczynnik pasywnego stygnięcia
+PUMP_SPEED = 1.0      # Prędkość pomp
+FILL_LEVEL = 150      # Poziom mieszalnika kończący napełnianie
+MAX_MIX_TEMP = 99.0   # Górny limit przegrzania mieszalnika (poniżej wrzenia)
+HEAT_MARGIN = 1.0     # Cel grzania co najmniej tyle poniżej temperatury równowagi grzałki ze stratami
+HEATING_TIMEOUT = 900 # Maks. czas fazy HEATING [s czasu procesu] - potem opróżnianie z bieżącą temperaturą
+CHECKPOINT_FILE = "stan.ckp"
+
+# Stany procesu (kolejność = kod liczbowy w tablicach i plikach historii)
+STATES = ("IDLE", "FILLING", "CALCULATING", "HEATING", "EMPTYING", "DONE")
+
+# --- MATEMATYKA ---
+
+class EmptyingPredictor:
+    """ Feed-Forward z symulacji fazy EMPTYING: ile przegrzać mieszalnik, żeby magazyn trafił w cel.
+
+    Straty ciepła i mieszanie są liniowe względem nadwyżki nad otoczeniem, więc wynik opróżniania to
+    T_out' = a * T_mix' + b * T_out0' (T' = T - AMBIENT_TEMP). Współczynniki (a, b) zależą tylko od
+    objętości mieszalnika i poziomu magazynu, a całkowanie kroków pompy ma postać zamkniętą - liczone
+    wprost przy każdym zapytaniu (kilka działań), bez tabeli zależnej od pojemności instalacji.
+    """
+    def __init__(self, out_capacity=300, rate=PUMP_SPEED, dt=REFRESH_RATE / 1000.0):
+        self.out_capacity = out_capacity; self.dt = dt
+        self.rate = rate # Odpływ z mieszalnika [L/krok], None = cała zawartość w jednym kroku
+
+    def coefficients(self, volume, out_level):
+        """ Wynik całkowania EMPTYING krok po kroku (jak MixingProcess.step) w postaci zamkniętej: przez n kroków
+            pompy obie temperatury tracą (1 - straty kroku)**n, a magazyn miesza przyjętą objętość z początkową """
+        if volume <= 0: return 0.0, 1.0
+        rate = self.rate
+        n = 1 if rate is None else math.ceil(volume / rate)
+        decay = (1.0 - COOLING_K * 20.0 * self.dt) ** n
+        # Przepełniony magazyn nie przyjmuje dolewki (ciecz przepada), kolejna - mniejsza - może się jeszcze zmieścić
+        free = self.out_capacity - out_level
+        if rate is None: accepted = volume if volume <= free else 0.0
+        else:
+            accepted = min(n - 1, max(int(free // rate), 0)) * rate
+            last = volume - (n - 1) * rate
+            if accepted + last <= free: accepted += last
+        out = out_level + accepted
+        if out <= 0.001: return 0.0, decay
+        return decay * accepted / out, decay * out_level / out
+
+    def simulate(self, t_mix, volume, out_level=0.0, out_temp=AMBIENT_TEMP):
+        """ Temperatura w magazynie po opróżnieniu - pełna symulacja na modelu Tank """
+        mix = Tank("MIESZALNIK", volume, volume, t_mix)
+        out = Tank("MAGAZYN", self.out_capacity, out_level, out_temp)
+        while mix.level > 0:
+            mix.update_physics(self.dt); out.update_physics(self.dt)
+            out.add_liquid(mix.remove_liquid(volume if self.rate is None else self.rate), mix.temp)
+        return out.temp
+
+    def solve(self, target_temp, volume, out_level=0.0, out_temp=AMBIENT_TEMP, tol=1e-4):
+        """ Wymagana temperatura mieszalnika metodą bisekcji na pełnej symulacji (wolne, referencyjne) """
+        lo, hi = AMBIENT_TEMP, 200.0
+        while hi - lo > tol:
+            mid = 0.5 * (lo + hi)
+            if self.simulate(mid, volume, out_level, out_temp) < target_temp: lo = mid
+            else: hi = mid
+        return 0.5 * (lo + hi)
+
+    def required_temp(self, target_temp, volume, out_level=0.0, out_temp=AMBIENT_TEMP):
+        """ Wymagana temperatura mieszalnika - bez ograniczeń; czy grzałka ją osiągnie, sprawdza heating_limit() """
+        if volume <= 0: return target_temp
+        a, b = self.coefficients(volume, out_level)
+        if a <= 0: return target_temp
+        return AMBIENT_TEMP + ((target_temp - AMBIENT_TEMP) - b * (out_temp - AMBIENT_TEMP)) / a
+
+def heating_limit(volume):
+    """ Najwyższy cel grzania mieszalnika o danej objętości: poniżej wrzenia (MAX_MIX_TEMP) i poniżej równowagi
+        grzałki 100% z pasywnymi stratami (model Tank.update_physics) - wyżej PID nigdy nie dojdzie """
+    return min(MAX_MIX_TEMP, AMBIENT_TEMP + 45.0 / ((volume * 0.2 + 2.0) * COOLING_K * 20.0) - HEAT_MARGIN)
+
+_predictors = {}
+
+def predictor(out_capacity=300, rate=PUMP_SPEED):
+    """ Wspólna (memoizowana) instancja dla danej pojemności magazynu i odpływu """
+    key = (out_capacity, rate)
+    if key not in _predictors: _predictors[key] = EmptyingPredictor(out_capacity, rate)
+    return _predictors[key]
+
+class DualPID:
+    """ PID sterujący grzaniem (+) i chłodzeniem (-) """
+    def __init__(self, kp, ki, kd):
+        self.kp = kp; self.ki = ki; self.kd = kd
+        self.prev_error = 0; self.integral = 0
+
+    def compute(self, target, current, dt):
+        error = target - current
+
+        P = self.kp * error
+
+        # Całkowanie tylko w pobliżu celu (Anti-windup)
+        if abs(error) < 5.0: self.integral += error * dt
+        self.integral = max(min(self.integral, 50), -50)
+        I = self.ki * self.integral
+
+        D = self.kd * (error - self.prev_error) / dt
+        self.prev_error = error
+
+        output = P + I + D
+        # Zakres -100 (Max Chłodzenie) do 100 (Max Grzanie)
+        return max(min(output, 100.0), -100.0)
+
+# --- MODEL FIZYCZNY ---
+
+class Tank:
+    """ Zbiornik: bilans masy, mieszanie temperatur, grzanie/chłodzenie i stygnięcie """
+    def __init__(self, name, capacity, level=0.0, temp=AMBIENT_TEMP):
+        self.name = name; self.capacity = capacity
+        self.level = level; self.temp = temp
+        self.heater_power = 0.0  # > 0
+        self.cooling_power = 0.0 # > 0 (gdy PID ujemny)
+
+    def add_liquid(self, amount, t_in):
+        if self.level + amount <= self.capacity:
+            m_old = self.level; m_new = m_old + amount
+            if m_new > 0.001:
+                self.temp = (m_old * self.temp + amount * t_in) / m_new
+            self.level += amount
+            return True
+        return False
+
+    def remove_liquid(self, amount):
+        if self.level >= amount: self.level -= amount; return amount
+        else: rem = self.level; self.level = 0; return rem
+
+    def update_physics(self, dt):
+        if self.level > 1:
+            mass_inertia = self.level * 0.2 + 2.0
+
+            # 1. Grzanie
+            if self.heater_power > 0:
+                energy_h = (self.heater_power / 100.0) * 45.0 * dt
+                self.temp += energy_h / mass_inertia
+
+            # 2. Aktywne Chłodzenie
+            if self.cooling_power > 0:
+                energy_c = (self.cooling_power / 100.0) * 60.0 * dt
+                self.temp -= energy_c / mass_inertia
+
+        # 3. Pasywne straty
+        delta = self.temp - AMBIENT_TEMP
+        loss = COOLING_K * delta * 20.0 * dt
+        self.temp -= loss
+        self.temp = max(self.temp, AMBIENT_TEMP)
+
+# --- PROCES ---
+
+class MixingProcess:
+    """ Maszyna stanów mieszalni: IDLE → FILLING → CALCULATING → HEATING → EMPTYING → DONE """
+    def __init__(self, kp=15.0, ki=0.8, kd=5.0, plant=None):
+        from topology import FlowGraph, load_plant
+        # Instalacja z opisu (domyślnie instalacja.json) skompilowana do grafu przepływu
+        self.graph = g = FlowGraph(plant if plant is not None else load_plant())
+        self.feeds = g.tanks("feed")
+        mixers = g.tanks("mixer"); stores = g.tanks("store")
+        if not self.feeds or len(mixers) != 1 or len(stores) != 1:
+            raise ValueError("instalacja: wymagany co najmniej jeden zbiornik wsadu, jeden mieszalnik i jeden magazyn")
+        self.tMix = mixers[0]; self.tOut = stores[0]
+        # A/B = pierwsze dwa zbiorniki wsadu (nastawy temperatur, rekord historii, mapa Modbus)
+        self.tA = self.feeds[0]; self.tB = self.feeds[min(1, len(self.feeds) - 1)]
+        self.mix = self.tMix.i; self.feed_idx = tuple(t.i for t in self.feeds)
+        self.fill_pumps = g.pumps("FILLING"); self.empty_pumps = g.pumps("EMPTYING")
+        # Odpływ z mieszalnika w fazie EMPTYING [L/krok] - suma pomp z mieszalnika, None = bez ograniczenia
+        speeds = [g.speed[e] for e in self.empty_pumps if g.src[e] == self.mix]
+        self.empty_rate = None if any(k < 0 for k in speeds) else sum(speeds) or PUMP_SPEED
+        self.pid = DualPID(kp=kp, ki=ki, kd=kd)
+        # Nastawy operatora
+        self.temp_a = 15.0; self.temp_b = 95.0; self.target = 60.0
+        self.on_event = None # callback(typ, treść) - np. dziennik zdarzeń GUI
+        self.reset(log=False)
+
+    def emit(self, type, msg):
+        if self.on_event is not None: self.on_event(type, msg)
+
+    def to_state(self, s):
+        self.state = s; self.emit("ZMIANA STANU", s)
+
+    def feed_forward(self):
+        return predictor(self.tOut.capacity, self.empty_rate)
+
+    def heating_target(self):
+        """ Cel grzania z Feed-Forward, ograniczony do osiągalnego (heating_limit) - przekroczenie raz na partię
+            trafia do zdarzeń, zamiast cicho trzymać cel, do którego PID nigdy nie dojdzie """
+        req = self.feed_forward().required_temp(self.target, self.tMix.level, self.tOut.level, self.tOut.temp)
+        limit = heating_limit(self.tMix.level)
+        if req <= limit: return req
+        if not self.limited:
+            self.limited = True
+            self.emit("OBLICZENIA", f"Cel nieosiągalny: wymagane {req:.1f}°C, grzanie do {limit:.1f}°C - "
+                                    f"magazyn nie osiągnie {self.target:.1f}°C")
+        return limit
+
+    # Pompy wg faz: A/B = pierwsze dwie pompy napełniania, OUT = dowolna pompa opróżniania
+    @property
+    def pump_a(self): return bool(self.fill_pumps) and bool(self.graph.active[self.fill_pumps[0]])
+    @pump_a.setter
+    def pump_a(self, on): self.graph.set_active(self.fill_pumps[:1], on)
+
+    @property
+    def pump_b(self): return bool(self.fill_pumps) and bool(self.graph.active[self.fill_pumps[min(1, len(self.fill_pumps) - 1)]])
+    @pump_b.setter
+    def pump_b(self, on): self.graph.set_active(self.fill_pumps[1:2], on)
+
+    @property
+    def pump_out(self): return any(self.graph.active[e] for e in self.empty_pumps)
+    @pump_out.setter
+    def pump_out(self, on): self.graph.set_active(self.empty_pumps, on)
+
+    @property
+    def active(self):
+        return self.state != "IDLE" and self.state != "DONE"
+
+    @property
+    def setpoint(self):
+        """ Wartość zadana widoczna na wykresie """
+        return self.calculated_target if self.state == "HEATING" else self.target
+
+    @property
+    def delta(self):
+        """ Różnica temperatury w magazynie względem celu """
+        return self.tOut.temp - self.target
+
+    # --- KOMENDY OPERATORA ---
+
+    def start(self):
+        if self.active: return False
+        self.tA.temp = self.temp_a; self.tB.temp = self.temp_b
+        self.pid.integral = 0; self.sim_time = 0; self.limited = False
+        self.to_state("FILLING")
+        self.is_paused = False
+        self.emit("SYSTEM", "START PROCESU")
+        return True
+
+    def pause(self):
+        if not self.active: return False
+        # Fizyka działa dalej, zatrzymujemy tylko logikę procesu
+        self.is_paused = True
+        self.emit("SYSTEM", "AWARYJNE ZATRZYMANIE")
+        return True
+
+    def resume(self):
+        if not self.active: return False
+        self.is_paused = False
+        self.emit("SYSTEM", "WZNOWIONO")
+        return True
+
+    def reset(self, log=True):
+        self.state = "IDLE"; self.is_paused = False
+        self.sim_time = 0.0; self.calculated_target = 0.0; self.heat_start = 0.0
+        self.limited = False # Zgłoszono już nieosiągalny cel grzania w tej partii
+        self.graph.reset() # Poziomy i temperatury z opisu instalacji, grzałki i pompy wyłączone
+        if log: self.emit("SYSTEM", "PEŁNY RESET")
+
+    # --- KROK SYMULACJI ---
+
+    def step(self, dt):
+        self.physics(dt)
+        self.control(dt)
+
+    def physics(self, dt):
+        # FIZYKA ZAWSZE DZIAŁA (nawet przy E-STOP)
+        self.sim_time += dt
+        self.graph.physics(dt)
+
+    def control(self, dt):
+        """ Logika procesu: elementy wykonawcze, PID i przejścia stanów """
+        g = self.graph; level = g.level
+        if self.is_paused:
+            # Wymuszone wyłączenie elementów wykonawczych
+            self.tMix.heater_power = 0; self.tMix.cooling_power = 0
+            if g.running: g.set_active(g.running, False)
+            return
+
+        if self.state == "FILLING":
+            if g.running != self.fill_pumps: g.set_active(self.fill_pumps, True)
+            g.transfer() # Jedno przejście po pompach w porządku topologicznym
+
+            if level[self.mix] >= FILL_LEVEL or max(map(level.__getitem__, self.feed_idx)) <= 0:
+                self.to_state("CALCULATING")
+
+        elif self.state == "CALCULATING":
+            g.set_active(self.fill_pumps, False)
+            self.calculated_target = self.heating_target(); self.heat_start = self.sim_time
+
+            diff = self.calculated_target - self.target
+            self.emit("OBLICZENIA", f"Korekta strat: +{diff:.2f}°C")
+            self.to_state("HEATING")
+
+        elif self.state == "HEATING":
+            # Magazyn stygnie w trakcie grzania - cel korygowany co krok (postać zamknięta to mikrosekundy)
+            self.calculated_target = self.heating_target()
+            m = self.mix; temp = g.temp[m]
+            out = self.pid.compute(self.calculated_target, temp, dt)
+
+            # Obsługa wyjścia bipolarnego
+            if out > 0:
+                g.heater[m] = out; g.cooling[m] = 0
+            else:
+                g.heater[m] = 0; g.cooling[m] = abs(out)
+
+            if abs(temp - self.calculated_target) < 0.1:
+                self.to_state("EMPTYING"); g.heater[m] = 0; g.cooling[m] = 0
+            elif self.sim_time - self.heat_start > HEATING_TIMEOUT:
+                # Zabezpieczenie: cel mimo wszystko nieosiągnięty - nie grzejemy bez końca
+                self.emit("SYSTEM", f"Przekroczony czas grzania ({HEATING_TIMEOUT} s) - opróżnianie przy {temp:.1f}°C")
+                self.to_state("EMPTYING"); g.heater[m] = 0; g.cooling[m] = 0
+
+        elif self.state == "EMPTYING":
+            if g.running != self.empty_pumps: g.set_active(self.empty_pumps, True)
+            g.transfer()
+
+            if level[self.mix] <= 0:
+                g.set_active(self.empty_pumps, False)
+                self.to_state("DONE")
+                self.emit("KONIEC", f"Temp Finalna: {self.tOut.temp:.2f}C")
+
+    def run_batch(self, max_steps, dt=REFRESH_RATE / 1000.0, observer=None):
+        """ Pełna szarża bez GUI: START i krokowanie aż do DONE (lub limitu kroków) """
+        self.start()
+        n = 0
+        while self.state != "DONE" and n < max_steps:
+            self.step(dt); n += 1
+            if observer is not None: observer(self)
+        return n
+
+# --- TRYB BEZ GUI ---
+
+def run_headless(steps, verbose=False, historian=None, plant=None, restore=None):
+    from topology import load_plant
+    # plant: ścieżka opisu instalacji albo gotowy opis (dict)
+    proc = MixingProcess(plant=load_plant(plant) if isinstance(plant, str) else plant)
+    if verbose: proc.on_event = lambda type, msg: print(f"[{proc.sim_time:8.2f}s] {type}: {msg}")
+    if restore:
+        # Dokończenie partii od punktu kontrolnego (np. przebieg "co jeśli" z innymi nastawami)
+        from checkpoint import apply, load
+        apply(load(restore), proc); proc.is_paused = False
+        print(f"PUNKT KONTROLNY: {restore} - {proc.state}, t = {proc.sim_time:.1f}s")
+
+    hist = None
+    if historian:
+        from historian import Historian # numpy potrzebny tylko przy zapisie historii
+        hist = Historian(historian); hist.begin_batch()
+
+    t0 = time.perf_counter()
+    n = proc.run_batch(steps, observer=hist.record if hist else None)
+    elapsed = time.perf_counter() - t0
+    if hist: hist.close()
+
+    if proc.state == "DONE": res = "IDEALNIE" if abs(proc.delta)<0.5 else "OK"
+    else: res = "PRZERWANO - LIMIT KROKÓW"
+    print(f"STAN: {proc.state}, KROKI: {n}, CZAS PROCESU: {proc.sim_time:.1f}s")
+    print(f"RÓŻNICA: {proc.delta:+.2f}°C [{res}] (tOut = {proc.tOut.temp:.2f}°C)")
+    print(f"WYDAJNOŚĆ: {n / max(elapsed, 1e-9):,.0f} kroków/s ({elapsed*1000:.1f} ms)")
+    return proc
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="SCADA - symulacja mieszalni")
+    ap.add_argument("--headless", action="store_true", help="symulacja bez GUI, tak szybko jak pozwala CPU")
+    ap.add_argument("--steps", type=int, default=1_000_000, help="limit kroków symulacji w trybie --headless")
+    ap.add_argument("-v", "--verbose", action="store_true", help="wypisuj zdarzenia procesu")
+    ap.add_argument("--historian", metavar="PLIK", default=None, help="zapisuj każdy krok do pliku historii")
+    ap.add_argument("--plant", metavar="PLIK", default=None, help="opis instalacji JSON (domyślnie instalacja.json)")
+    ap.add_argument("--restore", metavar="PLIK", nargs="?", const=CHECKPOINT_FILE, default=None,
+                    help=f"wznów partię z punktu kontrolnego (domyślnie {CHECKPOINT_FILE})")
+    return ap
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    run_headless(args.steps, args.verbose, args.historian, args.plant, args.restore)
+    sys.exit(0)
@@ -0,0 +1,147 @@
+import queue
+import contextlib
+import sqlite3
+import datetime
+import threading
+from collections import deque
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+
+# --- KONFIGURACJA ---
+LOG_CAPACITY = 1000      # Ile zdarzeń trzyma widok (starsze tylko w dzienniku SQLite)
+JOURNAL_FILE = "dziennik.db"
+JOURNAL_BATCH = 500      # Maks. zdarzeń w jednej transakcji
+JOURNAL_LINGER = 0.25    # Ile sekund czekamy na kolejne zdarzenia przed zapisem paczki
+
+EVENT_TYPES = ("ZMIANA STANU", "SYSTEM", "OBLICZENIA", "KONIEC", "ODTWARZANIE", "ALARM")
+HEADERS = ("CZAS", "TYP", "TREŚĆ")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id   INTEGER PRIMARY KEY,
+    ts   TEXT NOT NULL,
+    type TEXT NOT NULL,
+    msg  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_type ON events(type, id);
+"""
+
+class EventJournal:
+    """ Dziennik zdarzeń w SQLite - zapis paczkami w osobnym wątku, GUI tylko wrzuca do kolejki """
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.q = queue.Queue()
+        with contextlib.closing(sqlite3.connect(path)) as db: db.executescript(SCHEMA)
+        self.thread = threading.Thread(target=self.writer, name="journal", daemon=True)
+        self.thread.start()
+
+    def put(self, ts, type, msg):
+        self.q.put((ts, type, msg))
+
+    def writer(self):
+        db = sqlite3.connect(self.path)
+        running = True
+        while running:
+            batch = []; item = self.q.get()
+            # Zbieramy wszystko, co przyszło w krótkim oknie - jedna transakcja zamiast wielu.
+            # None = koniec pracy, threading.Event = ktoś czeka na zapis (sync)
+            try:
+                while isinstance(item, tuple):
+                    batch.append(item)
+                    if len(batch) >= JOURNAL_BATCH: break
+                    item = self.q.get(timeout=JOURNAL_LINGER)
+            except queue.Empty:
+                item = ()
+            if batch:
+                with db: db.executemany("INSERT INTO events(ts, type, msg) VALUES (?, ?, ?)", batch)
+            if item is None: running = False
+            elif isinstance(item, threading.Event): item.set()
+        db.close()
+
+    def sync(self):
+        """ Czeka, aż wszystko z kolejki trafi do bazy (po close() wątek zapisu już nie działa - nie ma na co czekać) """
+        if not self.thread.is_alive(): return
+        done = threading.Event(); self.q.put(done); done.wait()
+
+    def query(self, type=None, limit=LOG_CAPACITY):
+        """ Ostatnie zdarzenia (opcjonalnie danego typu - przez indeks idx_events_type) """
+        self.sync()
+        # "with" na samym połączeniu tylko zatwierdza transakcję - closing() je zamyka
+        with contextlib.closing(sqlite3.connect(self.path)) as db:
+            if type is None:
+                rows = db.execute("SELECT ts, type, msg FROM events ORDER BY id DESC LIMIT ?", (limit,))
+            else:
+                rows = db.execute("SELECT ts, type, msg FROM events WHERE type = ? ORDER BY id DESC LIMIT ?",
+                                  (type, limit))
+            return list(rows)[::-1]
+
+    def close(self):
+        self.q.put(None); self.thread.join()
+
+class EventLogModel(QAbstractTableModel):
+    """ Ograniczony pierścień zdarzeń; nowe wiersze wstawiane hurtem raz na klatkę """
+    rowsAppended = pyqtSignal()
+
+    def __init__(self, journal=None, capacity=LOG_CAPACITY):
+        super().__init__()
+        self.journal = journal
+        self.rows = deque(maxlen=capacity)
+        self.recent = deque(maxlen=capacity) # Wszystkie typy - filtr bez dziennika przegląda tylko to, co w pamięci
+        self.pending = []
+        self.filter = None
+        self.flush_timer = QTimer(self); self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid(): return None
+        return self.rows[index.row()][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal: return HEADERS[section]
+        return None
+
+    # --- ZDARZENIA ---
+
+    def append(self, type, msg):
+        ts = datetime.datetime.now().strftime("%H:%M:%S")
+        msg = str(msg)
+        if self.journal is not None: self.journal.put(datetime.datetime.now().isoformat(" ", "milliseconds"), type, msg)
+        else: self.recent.append((ts, type, msg))
+        if self.filter is None or type == self.filter: self.pending.append((ts, type, msg))
+        # Wszystko, co przyjdzie w tej iteracji pętli zdarzeń, trafi do widoku jednym wstawieniem
+        if not self.flush_timer.isActive(): self.flush_timer.start(0)
+
+    def flush(self):
+        if not self.pending: return
+        new = self.pending[-self.rows.maxlen:]; self.pending = []
+        drop = max(0, len(self.rows) + len(new) - self.rows.maxlen)
+        if drop:
+            self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+            for _ in range(drop): self.rows.popleft()
+            self.endRemoveRows()
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        self.rows.extend(new)
+        self.endInsertRows()
+        self.rowsAppended.emit()
+
+    def clear(self):
+        self.beginResetModel(); self.rows.clear(); self.recent.clear(); self.pending = []; self.endResetModel()
+
+    def set_filter(self, type):
+        """ Filtr po typie - historia z dziennika SQLite (zapytanie po indeksie), bez dziennika ostatnie zdarzenia
+            z pamięci; None = wszystkie """
+        self.filter = type
+        self.beginResetModel()
+        self.rows.clear(); self.pending = []
+        if self.journal is not None:
+            for ts, t, msg in self.journal.query(type, self.rows.maxlen): self.rows.append((ts[11:19], t, msg))
+        else:
+            self.rows.extend(r for r in self.recent if type is None or r[1] == type)
+        self.endResetModel()
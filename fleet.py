@@ -0,0 +1,213 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from engine import (REFRESH_RATE, AMBIENT_TEMP, COOLING_K, PUMP_SPEED, FILL_LEVEL, MAX_MIX_TEMP, HEAT_MARGIN, STATES,
+                    MixingProcess)
+
+# --- STANY (kodowane liczbami, żeby trzymać je w tablicy) ---
+IDLE, FILLING, CALCULATING, HEATING, EMPTYING, DONE = range(len(STATES))
+
+# --- FIZYKA WEKTOROWA (odpowiedniki metod engine.Tank) ---
+
+def add_liquid(level, temp, capacity, amount, t_in, mask):
+    """ Tank.add_liquid dla wszystkich instalacji naraz, zwraca maskę udanych dolewek """
+    m_new = level + amount
+    ok = mask & (m_new <= capacity)
+    mix = ok & (m_new > 0.001)
+    temp[mix] = (level[mix] * temp[mix] + amount[mix] * t_in[mix]) / m_new[mix]
+    level[ok] = m_new[ok]
+    return ok
+
+def remove_liquid(level, amount, mask):
+    """ Tank.remove_liquid - zwraca faktycznie pobraną objętość (0 poza maską) """
+    rem = np.where(mask, np.minimum(level, amount), 0.0)
+    level -= rem
+    return rem
+
+def update_physics(level, temp, heater_power, cooling_power, dt):
+    """ Tank.update_physics: grzanie/chłodzenie (tylko przy poziomie > 1) i pasywne straty """
+    mass_inertia = level * 0.2 + 2.0
+    energy = (heater_power / 100.0) * 45.0 * dt - (cooling_power / 100.0) * 60.0 * dt
+    temp += np.where(level > 1, energy / mass_inertia, 0.0)
+    temp -= COOLING_K * (temp - AMBIENT_TEMP) * 20.0 * dt
+    np.maximum(temp, AMBIENT_TEMP, out=temp)
+
+def required_temp(target_temp, volume, out_level, out_temp, out_capacity, rate, dt=REFRESH_RATE / 1000.0):
+    """ EmptyingPredictor.required_temp dla tablic (ta sama postać zamknięta współczynników a, b) """
+    n = np.ceil(volume / rate); decay = (1.0 - COOLING_K * 20.0 * dt) ** n
+    free = out_capacity - out_level
+    accepted = np.minimum(n - 1, np.maximum(np.floor_divide(free, rate), 0.0)) * rate
+    last = volume - (n - 1) * rate
+    accepted = np.where(accepted + last <= free, accepted + last, accepted)
+    out = out_level + accepted; mixed = out > 0.001; out = np.where(mixed, out, 1.0)
+    a = np.where(mixed, decay * accepted / out, 0.0); b = np.where(mixed, decay * out_level / out, decay)
+    req = AMBIENT_TEMP + ((target_temp - AMBIENT_TEMP) - b * (out_temp - AMBIENT_TEMP)) / np.where(a > 0, a, 1.0)
+    return np.where((volume > 0) & (a > 0), req, target_temp)
+
+def heating_limit(volume):
+    """ engine.heating_limit dla tablic """
+    return np.minimum(MAX_MIX_TEMP, AMBIENT_TEMP + 45.0 / ((volume * 0.2 + 2.0) * COOLING_K * 20.0) - HEAT_MARGIN)
+
+class VectorPID:
+    """ DualPID z całką i poprzednim uchybem trzymanymi osobno dla każdej instalacji """
+    def __init__(self, n, kp, ki, kd):
+        self.kp = np.broadcast_to(np.asarray(kp, float), (n,)).copy()
+        self.ki = np.broadcast_to(np.asarray(ki, float), (n,)).copy()
+        self.kd = np.broadcast_to(np.asarray(kd, float), (n,)).copy()
+        self.integral = np.zeros(n); self.prev_error = np.zeros(n)
+
+    def compute(self, target, current, dt, mask):
+        error = target - current
+
+        # Całkowanie tylko w pobliżu celu (Anti-windup)
+        integral = self.integral + np.where(np.abs(error) < 5.0, error * dt, 0.0)
+        np.clip(integral, -50, 50, out=integral)
+
+        output = self.kp * error + self.ki * integral + self.kd * (error - self.prev_error) / dt
+        # Stan regulatora zmienia się tylko tam, gdzie PID faktycznie pracuje
+        np.copyto(self.integral, integral, where=mask)
+        np.copyto(self.prev_error, error, where=mask)
+        return np.clip(output, -100.0, 100.0)
+
+# --- FLOTA ---
+
+class Fleet:
+    """ N niezależnych mieszalni trzymanych w tablicach NumPy, krokowanych jedną operacją na tick """
+    def __init__(self, n, kp=15.0, ki=0.8, kd=5.0, temp_a=15.0, temp_b=95.0, target=60.0):
+        self.n = n
+        full = lambda v: np.broadcast_to(np.asarray(v, float), (n,)).copy()
+        # Nastawy (skalar lub osobno dla każdej instalacji)
+        self.temp_a = full(temp_a); self.temp_b = full(temp_b); self.target = full(target)
+        # Zbiorniki: A, B, mieszalnik, magazyn
+        self.cap_a = full(100); self.cap_b = full(100); self.cap_mix = full(200); self.cap_out = full(300)
+        self.level_a = np.zeros(n); self.level_b = np.zeros(n); self.level_mix = np.zeros(n); self.level_out = np.zeros(n)
+        self.temp_a_tank = np.zeros(n); self.temp_b_tank = np.zeros(n); self.temp_mix = np.zeros(n); self.temp_out = np.zeros(n)
+        self.heater_power = np.zeros(n); self.cooling_power = np.zeros(n)
+        self.zero_power = np.zeros(n) # magazyn nie ma grzałki
+        self.pid = VectorPID(n, kp, ki, kd)
+        self.state = np.full(n, IDLE, dtype=np.int8)
+        self.is_paused = np.zeros(n, dtype=bool)
+        self.calculated_target = np.zeros(n)
+        self.limited = np.zeros(n, dtype=bool) # Cel grzania nieosiągalny (MixingProcess zgłasza to zdarzeniem)
+        self.sim_time = 0.0
+        self.pump_speed = full(PUMP_SPEED)
+        self.reset()
+
+    def reset(self):
+        self.state[:] = IDLE; self.is_paused[:] = False
+        self.level_a[:] = 90; self.level_b[:] = 90; self.level_mix[:] = 0; self.level_out[:] = 0
+        self.temp_a_tank[:] = AMBIENT_TEMP; self.temp_b_tank[:] = 90
+        self.temp_mix[:] = AMBIENT_TEMP; self.temp_out[:] = AMBIENT_TEMP
+        self.heater_power[:] = 0; self.cooling_power[:] = 0
+        self.calculated_target[:] = 0; self.limited[:] = False; self.sim_time = 0.0
+
+    def start(self):
+        idle = (self.state == IDLE) | (self.state == DONE)
+        self.temp_a_tank[idle] = self.temp_a[idle]; self.temp_b_tank[idle] = self.temp_b[idle]
+        self.pid.integral[idle] = 0; self.limited[idle] = False
+        self.state[idle] = FILLING; self.is_paused[idle] = False
+        self.sim_time = 0.0
+
+    @property
+    def pump_a(self):
+        return (self.state == FILLING) & ~self.is_paused
+
+    @property
+    def pump_out(self):
+        return (self.state == EMPTYING) & ~self.is_paused
+
+    @property
+    def delta(self):
+        return self.temp_out - self.target
+
+    def step(self, dt):
+        self.sim_time += dt
+
+        # FIZYKA ZAWSZE DZIAŁA (nawet przy E-STOP)
+        update_physics(self.level_mix, self.temp_mix, self.heater_power, self.cooling_power, dt)
+        update_physics(self.level_out, self.temp_out, self.zero_power, self.zero_power, dt)
+
+        # Maski faz wyznaczone z jednego zrzutu stanu (jak if/elif w MixingProcess.step)
+        run = ~self.is_paused; st = self.state
+        filling = run & (st == FILLING); calculating = run & (st == CALCULATING)
+        heating = run & (st == HEATING); emptying = run & (st == EMPTYING)
+        self.heater_power[self.is_paused] = 0; self.cooling_power[self.is_paused] = 0
+
+        # FILLING
+        vol_a = remove_liquid(self.level_a, self.pump_speed, filling)
+        vol_b = remove_liquid(self.level_b, self.pump_speed, filling)
+        add_liquid(self.level_mix, self.temp_mix, self.cap_mix, vol_a, self.temp_a_tank, filling)
+        add_liquid(self.level_mix, self.temp_mix, self.cap_mix, vol_b, self.temp_b_tank, filling)
+        full = filling & ((self.level_mix >= FILL_LEVEL) | ((self.level_a <= 0) & (self.level_b <= 0)))
+        st[full] = CALCULATING
+
+        # CALCULATING
+        if calculating.any():
+            st[calculating] = HEATING
+
+        # HEATING (cel korygowany co krok - magazyn stygnie w trakcie grzania)
+        upd = calculating | heating
+        if upd.any():
+            req = required_temp(self.target[upd], self.level_mix[upd], self.level_out[upd], self.temp_out[upd],
+                                 self.cap_out[upd], self.pump_speed[upd])
+            limit = heating_limit(self.level_mix[upd])
+            self.limited[upd] |= req > limit; self.calculated_target[upd] = np.minimum(req, limit)
+        if heating.any():
+            out = self.pid.compute(self.calculated_target, self.temp_mix, dt, heating)
+            np.copyto(self.heater_power, np.maximum(out, 0.0), where=heating)
+            np.copyto(self.cooling_power, np.maximum(-out, 0.0), where=heating)
+            reached = heating & (np.abs(self.temp_mix - self.calculated_target) < 0.1)
+            st[reached] = EMPTYING; self.heater_power[reached] = 0; self.cooling_power[reached] = 0
+
+        # EMPTYING
+        vol = remove_liquid(self.level_mix, self.pump_speed, emptying)
+        add_liquid(self.level_out, self.temp_out, self.cap_out, vol, self.temp_mix, emptying)
+        st[emptying & (self.level_mix <= 0)] = DONE
+
+    def run_batch(self, max_steps, dt=REFRESH_RATE / 1000.0):
+        """ START wszystkich instalacji i krokowanie aż każda osiągnie DONE (lub limit kroków) """
+        self.start()
+        n = 0
+        while n < max_steps and not (self.state == DONE).all():
+            self.step(dt); n += 1
+        return n
+
+# --- BENCHMARK ---
+
+def bench(plants, steps, scalar_plants):
+    dt = REFRESH_RATE / 1000.0
+    rng = np.random.default_rng(0)
+    targets = rng.uniform(40, 80, plants)
+
+    fleet = Fleet(plants, target=targets); fleet.start()
+    fleet.step(dt) # rozgrzewka
+    t0 = time.perf_counter()
+    for _ in range(steps): fleet.step(dt)
+    t_vec = time.perf_counter() - t0
+
+    procs = []
+    for i in range(scalar_plants):
+        p = MixingProcess(); p.target = float(targets[i]); p.start(); p.step(dt); procs.append(p)
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        for p in procs: p.step(dt)
+    t_sca = time.perf_counter() - t0
+
+    vec_rate = plants * steps / t_vec; sca_rate = scalar_plants * steps / t_sca
+    print(f"WEKTOROWO:  {plants} instalacji x {steps} kroków: {t_vec*1000:.1f} ms "
+          f"({t_vec/steps*1000:.3f} ms/tick, {vec_rate:,.0f} instalacjo-kroków/s)")
+    print(f"SKALARNIE:  {scalar_plants} instalacji x {steps} kroków: {t_sca*1000:.1f} ms "
+          f"({t_sca/steps*1000:.3f} ms/tick, {sca_rate:,.0f} instalacjo-kroków/s)")
+    print(f"PRZYSPIESZENIE: x{vec_rate / sca_rate:.1f}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Flota mieszalni - symulacja wektorowa (NumPy)")
+    ap.add_argument("--plants", type=int, default=10_000, help="liczba instalacji")
+    ap.add_argument("--steps", type=int, default=200, help="liczba kroków w benchmarku")
+    ap.add_argument("--scalar-plants", type=int, default=1000, help="liczba instalacji dla pętli po klasach skalarnych")
+    args = ap.parse_args()
+    bench(args.plants, args.steps, min(args.scalar_plants, args.plants))
+    sys.exit(0)
@@ -0,0 +1,180 @@
+import os
+import bisect
+
+import numpy as np
+
+from engine import STATES
+
+# --- FORMAT PLIKU ---
+# Nagłówek (16 B) + rekordy stałej długości. Obok plik .idx z segmentami (partia, stan, pierwszy rekord).
+MAGIC = b"SCADAHST"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+RECORD = np.dtype([
+    ("batch", "<u4"), ("t", "<f8"), ("state", "u1"), ("flags", "u1"),  # flags: pompy A/B/OUT, E-STOP
+    ("level", "<f4", (4,)), ("temp", "<f4", (4,)),                     # A, B, MIESZALNIK, MAGAZYN
+    ("heater", "<f4"), ("cooling", "<f4"), ("sp", "<f4"),
+])
+SEGMENT = np.dtype([("batch", "<u4"), ("state", "u1"), ("start", "<u8")])
+F_PUMP_A, F_PUMP_B, F_PUMP_OUT, F_PAUSED = 1, 2, 4, 8
+
+SPARSE_EVERY = 1024   # Co ile rekordów wpis w rzadkim indeksie czasu
+FLUSH_EVERY = 200     # Co ile rekordów wymuszamy zapis na dysk
+
+STATE_CODE = {s: i for i, s in enumerate(STATES)}
+
+class Historian:
+    """ Zapis każdego kroku procesu do pliku rekordów stałej długości (dopisywanie) """
+    def __init__(self, path):
+        self.path = path
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.f = open(path, "ab", buffering=1 << 16)
+        self.idx = open(path + ".idx", "ab")
+        if fresh:
+            hdr = np.zeros(1, HEADER); hdr["magic"] = MAGIC; hdr["version"] = VERSION; hdr["record_size"] = RECORD.itemsize
+            self.f.write(hdr.tobytes()); self.count = 0; self.batch = 0
+        else:
+            check_header(path)
+            self.count = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+            self.batch = int(read_records(path)[-1]["batch"]) if self.count else 0
+        self.rec = np.zeros(1, RECORD)   # Bufor jednego rekordu - bez alokacji na krok
+        self.last_state = None
+
+    def begin_batch(self):
+        self.batch += 1; self.last_state = None
+
+    def record(self, proc):
+        r = self.rec[0]; state = STATE_CODE[proc.state]
+        r["batch"] = self.batch; r["t"] = proc.sim_time; r["state"] = state
+        r["flags"] = (F_PUMP_A * proc.pump_a | F_PUMP_B * proc.pump_b |
+                      F_PUMP_OUT * proc.pump_out | F_PAUSED * proc.is_paused)
+        r["level"] = (proc.tA.level, proc.tB.level, proc.tMix.level, proc.tOut.level)
+        r["temp"] = (proc.tA.temp, proc.tB.temp, proc.tMix.temp, proc.tOut.temp)
+        r["heater"] = proc.tMix.heater_power; r["cooling"] = proc.tMix.cooling_power
+        r["sp"] = proc.setpoint
+
+        if state != self.last_state:
+            # Nowy segment (partia, stan) -> wpis do indeksu, dane na dysk od razu
+            seg = np.zeros(1, SEGMENT); seg["batch"] = self.batch; seg["state"] = state; seg["start"] = self.count
+            self.idx.write(seg.tobytes()); self.idx.flush()
+            self.last_state = state
+            self.f.write(self.rec.tobytes()); self.f.flush()
+        else:
+            self.f.write(self.rec.tobytes())
+            if self.count % FLUSH_EVERY == 0: self.f.flush()
+        self.count += 1
+
+    def close(self):
+        self.f.close(); self.idx.close()
+
+# --- ODCZYT ---
+
+def check_header(path):
+    hdr = np.fromfile(path, dtype=HEADER, count=1)
+    if len(hdr) != 1 or hdr["magic"][0] != MAGIC or hdr["record_size"][0] != RECORD.itemsize:
+        raise ValueError(f"{path}: to nie jest plik historii SCADA (v{VERSION})")
+
+def read_records(path):
+    """ Rekordy jako tablica mapowana w pamięci - strony wczytywane dopiero przy dostępie """
+    n = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+    if n <= 0: return np.zeros(0, RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.itemsize, shape=(n,))
+
+class HistorianReader:
+    """ Zapytania zakresowe po (partia, czas) i (partia, stan) w O(log n) """
+    def __init__(self, path):
+        check_header(path)
+        self.path = path
+        self.data = read_records(path)
+        n = len(self.data)
+
+        # Rzadki indeks: co SPARSE_EVERY-ty klucz (partia, t) - dotyka tylko n/SPARSE_EVERY stron
+        sparse = self.data[::SPARSE_EVERY]
+        self.sparse_keys = list(zip(sparse["batch"].tolist(), sparse["t"].tolist()))
+
+        # Segmenty stanów z pliku .idx (odbudowa skanem, gdy go brak)
+        idx_path = path + ".idx"
+        if os.path.exists(idx_path): segs = np.fromfile(idx_path, dtype=SEGMENT)
+        else: segs = self.rebuild_segments()
+        segs = segs[segs["start"] < n]
+        ends = np.append(segs["start"][1:], np.uint64(n))
+        self.segments = {}
+        for (b, s, start), end in zip(segs.tolist(), ends.tolist()):
+            self.segments.setdefault((b, STATES[s]), []).append((start, end))
+
+    def rebuild_segments(self):
+        d = self.data
+        if not len(d): return np.zeros(0, SEGMENT)
+        change = np.flatnonzero((np.diff(d["state"]) != 0) | (np.diff(d["batch"]) != 0)) + 1
+        starts = np.concatenate(([0], change))
+        segs = np.zeros(len(starts), SEGMENT)
+        segs["batch"] = d["batch"][starts]; segs["state"] = d["state"][starts]; segs["start"] = starts
+        return segs
+
+    def __len__(self): return len(self.data)
+
+    def batches(self):
+        return sorted({b for b, _ in self.segments})
+
+    def locate(self, batch, t):
+        """ Indeks pierwszego rekordu z kluczem >= (batch, t) """
+        blk = max(bisect.bisect_right(self.sparse_keys, (batch, t)) - 1, 0)
+        lo = blk * SPARSE_EVERY; chunk = self.data[lo:lo + SPARSE_EVERY + 1]
+        b = chunk["batch"]
+        i0 = np.searchsorted(b, batch, "left"); i1 = np.searchsorted(b, batch, "right")
+        return lo + i0 + int(np.searchsorted(chunk["t"][i0:i1], t, "left"))
+
+    def range(self, batch, t0=0.0, t1=float("inf")):
+        """ Rekordy partii z przedziału czasu [t0, t1) - widok na plik, bez kopiowania """
+        return self.data[self.locate(batch, t0):self.locate(batch, t1)]
+
+    def phase(self, batch, state):
+        """ Rekordy danej fazy partii, np. phase(3, "HEATING") """
+        spans = self.segments.get((batch, state), [])
+        if not spans: return self.data[0:0]
+        # Zwykle jeden segment; gdyby faza powtórzyła się w partii - od pierwszego do ostatniego
+        return self.data[spans[0][0]:spans[-1][1]]
+
+# --- ODTWARZANIE ---
+
+def apply_record(proc, r):
+    """ Nadpisuje stan engine.MixingProcess wartościami z rekordu historii """
+    tanks = (proc.tA, proc.tB, proc.tMix, proc.tOut)
+    for tank, level, temp in zip(tanks, r["level"].tolist(), r["temp"].tolist()):
+        tank.level = level; tank.temp = temp
+    proc.tMix.heater_power = float(r["heater"]); proc.tMix.cooling_power = float(r["cooling"])
+    flags = int(r["flags"])
+    proc.pump_a = bool(flags & F_PUMP_A); proc.pump_b = bool(flags & F_PUMP_B)
+    proc.pump_out = bool(flags & F_PUMP_OUT); proc.is_paused = bool(flags & F_PAUSED)
+    proc.state = STATES[r["state"]]; proc.sim_time = float(r["t"])
+    if proc.state == "HEATING": proc.calculated_target = float(r["sp"])
+
+class Replay:
+    """ Odtwarzanie zapisanej partii z przyspieszeniem (1x - 100x) """
+    def __init__(self, reader, batch=None, speed=1.0):
+        self.reader = reader
+        self.batch = batch if batch is not None else reader.batches()[-1]
+        self.data = reader.range(self.batch)
+        self.speed = speed; self.pos = 0; self.t = float(self.data["t"][0]) if len(self.data) else 0.0
+
+    @property
+    def finished(self):
+        return self.pos >= len(self.data)
+
+    def advance(self, dt):
+        """ Przesuwa czas odtwarzania o dt*speed; zwraca widok rekordów, które w tym czasie minęły """
+        self.t += dt * self.speed
+        end = self.pos + int(np.searchsorted(self.data["t"][self.pos:], self.t, "right"))
+        recs = self.data[self.pos:end]; self.pos = end
+        return recs
+
+if __name__ == "__main__":
+    import sys, time
+    path = sys.argv[1] if len(sys.argv) > 1 else "historia.hst"
+    t0 = time.perf_counter(); rd = HistorianReader(path); t_open = time.perf_counter() - t0
+    print(f"{path}: {len(rd)} rekordów, partie: {rd.batches()}, otwarcie: {t_open*1000:.2f} ms")
+    for b in rd.batches()[-3:]:
+        for s in STATES[1:]:
+            ph = rd.phase(b, s)
+            if len(ph): print(f"  partia {b} {s:<12} {len(ph):>6} rek. t = {ph['t'][0]:.2f} .. {ph['t'][-1]:.2f} s")
+    sys.exit(0)
@@ -1,179 +1,216 @@
 import sys
+import time
 import datetime
 import math
-from collections import deque
+import threading
+import importlib
+
+from startup import STARTUP # Pierwszy - mierzy czas wszystkich kolejnych importów
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QPushButton, QFrame, QGridLayout, 
-                             QGroupBox, QDoubleSpinBox,
-                              QTableWidget, QTableWidgetItem, QHeaderView, 
-                             QSizePolicy)
+                             QGroupBox, QDoubleSpinBox, QComboBox, QListWidget, QListWidgetItem,
+                              QTableView, QHeaderView, 
+                             QSizePolicy, QStatusBar, QShortcut)
 from PyQt5.QtCore import QTimer, Qt, QRectF
-from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QLinearGradient
-
-import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QLinearGradient, QBrush, QPixmap, QKeySequence
+STARTUP.lap("import PyQt5")
+
+# Matplotlib (plot.py), Modbus (asyncio), magistrala i odczyt historii (odtwarzanie) ładowane dopiero, gdy są
+# potrzebne. NumPy zostaje przed oknem: bufor telemetrii i wykres QPainter z pierwszej klatki to tablice NumPy,
+# więc odroczenie nic by nie dało. Dziennik i alarmy to modele tabel widocznych od razu - moduły są lekkie
+# (czas widać w --startup-profile)
+from engine import CHECKPOINT_FILE, REFRESH_RATE, MixingProcess, build_parser, run_headless
+from telemetry import SPANS, TelemetryStore
+STARTUP.lap("import silnik + telemetria (NumPy)")
+from eventlog import EVENT_TYPES, JOURNAL_FILE, EventJournal, EventLogModel
+from simclock import SPEEDS
+from worker import ProcessWorker
+from profiler import Profiler, export_csv
+from topology import load_plant
+from checkpoint import CHECKPOINT_EVERY, Checkpointer, load as load_checkpoint, state as checkpoint_state
+from trend import PLOT_RATE, NativeTrend
+from scheduler import Scheduler
+from alarms import AlarmEngine, process_tags
+from binding import Binder, style_property
+STARTUP.lap("import dziennik, wątek procesu, alarmy")
 
 # --- KONFIGURACJA ---
-REFRESH_RATE = 50     # 50ms = 20 FPS
 PIPE_WIDTH = 24       # Grube, solidne rury
-MAX_HISTORY = 400
-AMBIENT_TEMP = 20.0
-COOLING_K = 0.0005    # Współczynnik pasywnego stygnięcia
-PUMP_SPEED = 1.0      # Prędkość pomp
-
-# --- MATEMATYKA ---
-
-class ThermalComputer:
-    """ Oblicza o ile trzeba przegrzać ciecz (Feed-Forward) """
-    @staticmethod
-    def calculate_required_temp(target_temp, volume):
-        if volume <= 0: return target_temp
-        cycles = volume / PUMP_SPEED
-        seconds = cycles * (REFRESH_RATE / 1000.0)
-        # Model strat ciepła w transporcie
-        decay = math.exp(-COOLING_K * 20.0 * seconds)
-        if decay == 0: return target_temp
-        req_temp = AMBIENT_TEMP + (target_temp - AMBIENT_TEMP) / decay
-        return req_temp
-
-class DualPID:
-    """ PID sterujący grzaniem (+) i chłodzeniem (-) """
-    def __init__(self, kp, ki, kd):
-        self.kp = kp; self.ki = ki; self.kd = kd
-        self.prev_error = 0; self.integral = 0
-        
-    def compute(self, target, current, dt):
-        error = target - current
-        
-        P = self.kp * error
-        
-        # Całkowanie tylko w pobliżu celu (Anti-windup)
-        if abs(error) < 5.0: self.integral += error * dt
-        self.integral = max(min(self.integral, 50), -50)
-        I = self.ki * self.integral
-        
-        D = self.kd * (error - self.prev_error) / dt
-        self.prev_error = error
-        
-        output = P + I + D
-        # Zakres -100 (Max Chłodzenie) do 100 (Max Grzanie)
-        return max(min(output, 100.0), -100.0)
+HISTORIAN_FILE = "historia.hst"
+PROFILE_FILE = "profil.csv"
+GUI_STAGES = ("zdarzenia", "synoptyka", "rysowanie", "wykres")
+# Klasy zadań wątku GUI (nazwa, okres [s], priorytet) - okres wykresu ustala --plot-hz
+GUI_CLASSES = (("ekran", REFRESH_RATE / 1000.0, 0), ("wykres", 1.0 / PLOT_RATE, 1),
+               ("logika", 0.100, 2), ("obsługa", 1.0, 3))
+TRENDS = ("mpl", "native", "demand") # Matplotlib w tle po starcie | QPainter | Matplotlib na żądanie
+# Styl paska statusu (właściwość "mode" w arkuszu okna) dla faz procesu
+STATUS_MODES = {"IDLE": "idle", "FILLING": "filling", "CALCULATING": "heating", "HEATING": "heating",
+                "EMPTYING": "emptying", "DONE": "done"}
+# Kolor wiersza alarmu: (aktywny, potwierdzony) -> kolor
+ALARM_COLORS = {(True, False): "#ff4444", (True, True): "#ffaa00", (False, False): "#cccc66"}
+ALIGN = {"top": Qt.AlignTop, "bottom": Qt.AlignBottom, "left": Qt.AlignLeft, "right": Qt.AlignRight,
+         "hcenter": Qt.AlignHCenter, "vcenter": Qt.AlignVCenter, "center": Qt.AlignCenter}
+
+def place(grid, widget, item):
+    """ Element z opisu instalacji na siatce synoptyki: "cell" = [wiersz, kolumna(, wiersze, kolumny)] """
+    flags = Qt.Alignment()
+    for part in filter(None, item.get("align", "").split("|")): flags |= ALIGN[part]
+    grid.addWidget(widget, *item["cell"], flags)
 
 # --- GRAFIKA (WIDGETY) ---
 
+class PaintStats:
+    """ Czas rysowania per klasa widgetu - do raportu kosztu klatki """
+    def __init__(self):
+        self.pending = 0.0 # Czas rysowania od ostatniego take() - etap "rysowanie" profilu GUI
+        self.reset()
+
+    def add(self, name, seconds):
+        n, total = self.data.get(name, (0, 0.0))
+        self.data[name] = (n + 1, total + seconds); self.pending += seconds
+
+    def take(self):
+        s = self.pending; self.pending = 0.0
+        return s
+
+    def reset(self):
+        self.data = {}; self.since = time.perf_counter()
+
+    def report(self):
+        """ (liczba odświeżeń/s, ms rysowania/s) od ostatniego resetu """
+        span = max(time.perf_counter() - self.since, 1e-9)
+        n = sum(c for c, _ in self.data.values()); total = sum(t for _, t in self.data.values())
+        return n / span, 1000.0 * total / span
+
+PAINT_STATS = PaintStats()
+
+def prerender(widget, draw):
+    """ Pixmapa w rozmiarze widgetu z uwzględnieniem DPI - statyczne elementy rysowane raz """
+    dpr = widget.devicePixelRatioF()
+    pm = QPixmap(int(widget.width() * dpr), int(widget.height() * dpr))
+    pm.setDevicePixelRatio(dpr); pm.fill(Qt.transparent)
+    p = QPainter(pm); p.setRenderHint(QPainter.Antialiasing)
+    draw(p); p.end()
+    return pm
+
 class CyberTank(QWidget):
-    def __init__(self, name, capacity, color_hex):
+    """ Widok zbiornika - rysuje ostatni zrzut (worker.TankView) z wątku procesu """
+    FONT_NAME = FONT_VALUE = FONT_MODE = None
+
+    def __init__(self, tank, color_hex):
         super().__init__()
         self.setFixedSize(120, 200)
-        self.name = name; self.capacity = capacity
-        self.level = 0.0; self.temp = AMBIENT_TEMP
+        self.tank = tank
         self.color = QColor(color_hex)
-        self.heater_power = 0.0  # > 0
-        self.cooling_power = 0.0 # > 0 (gdy PID ujemny)
-
-    def add_liquid(self, amount, t_in):
-        if self.level + amount <= self.capacity:
-            m_old = self.level; m_new = m_old + amount
-            if m_new > 0.001: 
-                self.temp = (m_old * self.temp + amount * t_in) / m_new
-            self.level += amount
-            return True
-        return False
-
-    def remove_liquid(self, amount):
-        if self.level >= amount: self.level -= amount; return amount
-        else: rem = self.level; self.level = 0; return rem
-
-    def update_physics(self, dt):
-        if self.level > 1:
-            mass_inertia = self.level * 0.2 + 2.0
-            
-            # 1. Grzanie
-            if self.heater_power > 0:
-                energy_h = (self.heater_power / 100.0) * 45.0 * dt
-                self.temp += energy_h / mass_inertia
-            
-            # 2. Aktywne Chłodzenie
-            if self.cooling_power > 0:
-                energy_c = (self.cooling_power / 100.0) * 60.0 * dt 
-                self.temp -= energy_c / mass_inertia
-
-        # 3. Pasywne straty
-        delta = self.temp - AMBIENT_TEMP
-        loss = COOLING_K * delta * 20.0 * dt 
-        self.temp -= loss
-        self.temp = max(self.temp, AMBIENT_TEMP)
+        if CyberTank.FONT_NAME is None:
+            CyberTank.FONT_NAME = QFont("Consolas", 8)
+            CyberTank.FONT_VALUE = QFont("Consolas", 10, QFont.Bold)
+            CyberTank.FONT_MODE = QFont("Arial", 8, QFont.Bold)
+        self.heat_pen = QPen(QColor(255, 50, 0), 6); self.cool_pen = QPen(QColor(0, 100, 255), 6)
+        self.cache = {}; self.shown = None
+
+    def set_view(self, tank):
+        self.tank = tank; self.refresh()
+
+    def refresh(self):
+        """ Odświeżenie tylko, gdy zmieni się coś widocznego (z dokładnością wyświetlania) """
+        t = self.tank
+        key = (round(t.level), round(t.temp, 1),
+               int(t.heater_power / 100 * 255) if t.heater_power > 1 else 0,
+               int(t.cooling_power / 100 * 255) if t.cooling_power > 1 else 0)
+        if key != self.shown: self.shown = key; self.update()
+
+    def static(self):
+        """ Obudowa, nazwa i gradient cieczy - raz na rozmiar/DPI """
+        key = (self.width(), self.height(), self.devicePixelRatioF())
+        if key not in self.cache:
+            r = self.rect().adjusted(5,5,-5,-5)
+            def draw(p):
+                p.setPen(QPen(QColor("#444"), 2)); p.setBrush(QColor("#1a1a1a"))
+                p.drawRoundedRect(r, 10, 10)
+                p.setPen(QColor("white")); p.setFont(self.FONT_NAME)
+                p.drawText(r.x(), r.y()-5, r.width(), 20, Qt.AlignCenter, self.tank.name)
+            g = QLinearGradient(r.x()+2, 0, r.right()-2, 0)
+            g.setColorAt(0, self.color.darker(150)); g.setColorAt(0.5, self.color)
+            g.setColorAt(1, self.color.darker(150))
+            self.cache = {key: (prerender(self, draw), QBrush(g))}
+        return self.cache[key]
 
     def paintEvent(self, e):
-        p = QPainter(self); p.setRenderHint(QPainter.Antialiasing)
+        t0 = time.perf_counter()
+        t = self.tank
+        shell, liquid = self.static()
+        p = QPainter(self); p.drawPixmap(0, 0, shell)
+        p.setRenderHint(QPainter.Antialiasing)
         r = self.rect().adjusted(5,5,-5,-5)
         
-        # Tło
-        p.setPen(QPen(QColor("#444"), 2)); p.setBrush(QColor("#1a1a1a"))
-        p.drawRoundedRect(r, 10, 10)
-        
         # Ciecz
-        if self.level > 0:
-            pct = self.level / self.capacity
+        if t.level > 0:
+            pct = t.level / t.capacity
             h = pct * (r.height()-4)
             lr = QRectF(r.x()+2, r.bottom()-2-h, r.width()-4, h)
-            g = QLinearGradient(lr.topLeft(), lr.topRight())
-            g.setColorAt(0, self.color.darker(150)); g.setColorAt(0.5, self.color)
-            g.setColorAt(1, self.color.darker(150))
-            p.setBrush(g); p.setPen(Qt.NoPen); p.drawRoundedRect(lr, 4, 4)
+            p.setBrush(liquid); p.setPen(Qt.NoPen); p.drawRoundedRect(lr, 4, 4)
 
         # Wizualizacja stanu termicznego
         y = r.bottom() - 25
-        if self.heater_power > 1:
-            glow = int((self.heater_power/100)*255)
-            p.setPen(QPen(QColor(255, 50, 0, glow), 6))
+        if t.heater_power > 1:
+            self.heat_pen.setColor(QColor(255, 50, 0, int((t.heater_power/100)*255)))
+            p.setPen(self.heat_pen)
             p.drawLine(int(r.left())+15, int(y), int(r.right())-15, int(y))
-            p.setPen(QColor("#ff5555")); p.setFont(QFont("Arial", 8, QFont.Bold))
+            p.setPen(QColor("#ff5555")); p.setFont(self.FONT_MODE)
             p.drawText(r, Qt.AlignBottom|Qt.AlignHCenter, "GRZANIE")
             
-        elif self.cooling_power > 1:
-            glow = int((self.cooling_power/100)*255)
-            p.setPen(QPen(QColor(0, 100, 255, glow), 6)) # Niebieski dla chłodzenia
+        elif t.cooling_power > 1:
+            self.cool_pen.setColor(QColor(0, 100, 255, int((t.cooling_power/100)*255))) # Niebieski dla chłodzenia
+            p.setPen(self.cool_pen)
             p.drawLine(int(r.left())+15, int(y), int(r.right())-15, int(y))
-            p.setPen(QColor("#55aaff")); p.setFont(QFont("Arial", 8, QFont.Bold))
+            p.setPen(QColor("#55aaff")); p.setFont(self.FONT_MODE)
             p.drawText(r, Qt.AlignBottom|Qt.AlignHCenter, "CHŁODZENIE")
 
-        p.setPen(QColor("white")); p.setFont(QFont("Consolas", 8))
-        p.drawText(r.x(), r.y()-5, r.width(), 20, Qt.AlignCenter, self.name)
-        p.setFont(QFont("Consolas", 10, QFont.Bold))
-        p.drawText(r, Qt.AlignCenter, f"{self.level:.0f}L\n{self.temp:.1f}°C")
+        p.setPen(QColor("white")); p.setFont(self.FONT_VALUE)
+        p.drawText(r, Qt.AlignCenter, f"{t.level:.0f}L\n{t.temp:.1f}°C")
+        p.end()
+        PAINT_STATS.add("CyberTank", time.perf_counter() - t0)
 
 class CyberPipe(QWidget):
+    COLOR_ON = COLOR_OFF = SHINE = None
+
     def __init__(self, orient='V'):
         super().__init__()
         self.active = False; self.orient = orient
+        if CyberPipe.COLOR_ON is None:
+            CyberPipe.COLOR_ON = QColor("#00ccff"); CyberPipe.COLOR_OFF = QColor("#333")
+            CyberPipe.SHINE = QPen(QColor(255,255,255,40), 2)
         # Expanduje aby wypełnić luki w gridzie
         if orient=='V': 
             self.setFixedWidth(PIPE_WIDTH); self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Expanding)
         else: 
             self.setFixedHeight(PIPE_WIDTH); self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
             
-    def set_active(self, s): self.active = s; self.update()
+    def set_active(self, s):
+        if s != self.active: self.active = s; self.update()
     
     def paintEvent(self, e):
+        t0 = time.perf_counter()
         p = QPainter(self)
-        c = QColor("#00ccff") if self.active else QColor("#333")
         
         # Overdraw (+2px) żeby zakleić szczeliny
         dr = self.rect()
         if self.orient == 'V': dr.adjust(0, -2, 0, 2)
         else: dr.adjust(-2, 0, 2, 0)
             
-        p.fillRect(dr, c)
+        p.fillRect(dr, self.COLOR_ON if self.active else self.COLOR_OFF)
         
-        p.setPen(QPen(QColor(255,255,255,40), 2))
+        p.setPen(self.SHINE)
         if self.orient=='V': p.drawLine(6, 0, 6, self.height())
         else: p.drawLine(0, 6, self.width(), 6)
+        p.end()
+        PAINT_STATS.add("CyberPipe", time.perf_counter() - t0)
 
 class TurboPump(QWidget):
+    FONT = None
+
     def __init__(self, name, type='V'):
         super().__init__()
         # Pompa narożna jest szeroka, żeby dosięgnąć rury z boku
@@ -181,57 +218,73 @@ class TurboPump(QWidget):
         self.setFixedSize(w, 60)
         self.name = name; self.pump_type = type
         self.on = False; self.angle = 0
+        if TurboPump.FONT is None: TurboPump.FONT = QFont("Arial", 7, QFont.Bold)
+        self.rotor_on = QColor("#00ff00"); self.rotor_off = QColor("#ff4444")
+        self.cache = {}
     
-    def set_on(self, s): self.on = s; self.update()
+    def set_on(self, s):
+        if s != self.on: self.on = s; self.update()
     def rotate(self): 
         if self.on: self.angle = (self.angle+60)%360; self.update()
+
+    def housing(self):
+        """ Rury, korpus i opis - osobna pixmapa dla stanu ON/OFF, raz na rozmiar/DPI """
+        key = (self.width(), self.height(), self.devicePixelRatioF(), self.on)
+        if key not in self.cache:
+            r = self.rect(); c_pipe = QColor("#00ccff") if self.on else QColor("#333")
+            cx = r.center().x(); cy = r.center().y()
+            hw = PIPE_WIDTH / 2
+            def draw(p):
+                p.setPen(Qt.NoPen); p.setBrush(c_pipe)
+                
+                # Rysowanie Rur z OVERDRAW (Wychodzenie poza obrys dla styku)
+                
+                if self.pump_type == 'V':
+                    # Rura pionowa: Wychodzi w górę (-2) i w dół (+2)
+                    p.drawRect(QRectF(cx-hw, -2, PIPE_WIDTH, r.height()+4))
+                    
+                elif self.pump_type == 'CornerR':
+                    # Góra -> Środek (Wychodzi w górę -2)
+                    p.drawRect(QRectF(cx-hw, -2, PIPE_WIDTH, cy+2))
+                    # Środek -> Prawa Krawędź (Wychodzi w prawo +2)
+                    p.drawRect(QRectF(cx-hw, cy-hw, r.width()-(cx-hw)+2, PIPE_WIDTH))
+                    
+                elif self.pump_type == 'CornerL':
+                    # Góra -> Środek
+                    p.drawRect(QRectF(cx-hw, -2, PIPE_WIDTH, cy+2))
+                    # Środek -> Lewa Krawędź (Wychodzi w lewo -2)
+                    p.drawRect(QRectF(-2, cy-hw, cx+hw+2, PIPE_WIDTH))
+
+                # Korpus wirnika
+                p.setBrush(QColor(0,0,0, 150)); p.setPen(QPen(QColor("#666"), 2))
+                p.drawEllipse(r.center(), 20, 20)
+
+                p.setPen(QColor("#ccc")); p.setFont(self.FONT)
+                p.drawText(r, Qt.AlignBottom|Qt.AlignHCenter, self.name)
+            self.cache[key] = prerender(self, draw)
+        return self.cache[key]
         
     def paintEvent(self, e):
-        p = QPainter(self); p.setRenderHint(QPainter.Antialiasing); r = self.rect()
-        c_pipe = QColor("#00ccff") if self.on else QColor("#333")
-        
-        cx = r.center().x(); cy = r.center().y()
-        hw = PIPE_WIDTH / 2
-        
-        p.setPen(Qt.NoPen); p.setBrush(c_pipe)
-        
-        # Rysowanie Rur z OVERDRAW (Wychodzenie poza obrys dla styku)
-        
-        if self.pump_type == 'V':
-            # Rura pionowa: Wychodzi w górę (-2) i w dół (+2)
-            p.drawRect(QRectF(cx-hw, -2, PIPE_WIDTH, r.height()+4))
-            
-        elif self.pump_type == 'CornerR':
-            # Góra -> Środek (Wychodzi w górę -2)
-            p.drawRect(QRectF(cx-hw, -2, PIPE_WIDTH, cy+2))
-            # Środek -> Prawa Krawędź (Wychodzi w prawo +2)
-            p.drawRect(QRectF(cx-hw, cy-hw, r.width()-(cx-hw)+2, PIPE_WIDTH))
-            
-        elif self.pump_type == 'CornerL':
-            # Góra -> Środek
-            p.drawRect(QRectF(cx-hw, -2, PIPE_WIDTH, cy+2))
-            # Środek -> Lewa Krawędź (Wychodzi w lewo -2)
-            p.drawRect(QRectF(-2, cy-hw, cx+hw+2, PIPE_WIDTH))
-
-        # Korpus wirnika
-        p.setBrush(QColor(0,0,0, 150)); p.setPen(QPen(QColor("#666"), 2))
-        p.drawEllipse(r.center(), 20, 20)
+        t0 = time.perf_counter()
+        p = QPainter(self); p.drawPixmap(0, 0, self.housing())
+        p.setRenderHint(QPainter.Antialiasing); r = self.rect()
 
         # Wirnik animowany
-        p.save(); p.translate(cx, cy); p.rotate(self.angle)
-        col = QColor("#00ff00") if self.on else QColor("#ff4444")
-        p.setBrush(col); p.setPen(Qt.NoPen)
+        p.translate(r.center().x(), r.center().y()); p.rotate(self.angle)
+        p.setBrush(self.rotor_on if self.on else self.rotor_off); p.setPen(Qt.NoPen)
         p.drawRect(QRectF(-4, -14, 8, 28)); p.drawRect(QRectF(-14, -4, 28, 8))
-        p.restore()
-        
-        p.setPen(QColor("#ccc")); p.setFont(QFont("Arial", 7, QFont.Bold))
-        p.drawText(r, Qt.AlignBottom|Qt.AlignHCenter, self.name)
+        p.end()
+        PAINT_STATS.add("TurboPump", time.perf_counter() - t0)
 
 # --- APLIKACJA ---
 
 class FutureSCADA(QMainWindow):
-    def __init__(self):
+    def __init__(self, plot_rate=PLOT_RATE, historian=HISTORIAN_FILE, journal=JOURNAL_FILE, modbus=None, plant=None,
+                 checkpoint=CHECKPOINT_FILE, trend="mpl", bus=None):
         super().__init__()
+        STARTUP.lap("okno: QMainWindow")
+        self.plot_rate = plot_rate; self.trend = trend; self.plot = None
+        self.startup_profile = False; self.first_paint = False
         self.setWindowTitle("SCADA - PROJEKT PG")
         self.resize(1280, 900)
         self.setStyleSheet("""
@@ -248,19 +301,88 @@ class FutureSCADA(QMainWindow):
             QPushButton:hover { background: #444; border-color: #00ccff; }
             QPushButton:disabled { background: #222; color: #555; border-color: #333; }
             QLabel { color: #bbb; font-size: 12px; }
-            QTableWidget { background: #1a1a1a; gridline-color: #333; border: none; }
+            QTableView { background: #1a1a1a; gridline-color: #333; border: none; }
             QHeaderView::section { background: #222; color: #aaa; padding: 4px; }
+            QStatusBar { background: #1a1a1a; color: #777; font-family: Consolas; font-size: 11px; }
+            QLabel#status { color: #ff4444; font-weight: bold; font-size: 14px; }
+            QLabel#status[mode="estop"] { color: red; font-size: 16px; }
+            QLabel#status[mode="filling"] { color: #00ccff; font-weight: normal; font-size: 12px; }
+            QLabel#status[mode="heating"] { color: #ffaa00; font-weight: normal; font-size: 12px; }
+            QLabel#status[mode="emptying"] { color: #00ff00; font-weight: normal; font-size: 12px; }
+            QLabel#status[mode="done"] { color: #00ff00; font-size: 16px; }
+            QLabel#alarms[mode="unacked"] { color: #ff4444; font-weight: bold; }
         """)
         
-        self.timer = QTimer(); self.timer.timeout.connect(self.loop)
-        self.state = "IDLE"
-        self.is_paused = False # Flaga dla AWARYJNEGO STOPU
-        self.pid = DualPID(kp=15.0, ki=0.8, kd=5.0)
-        self.history = deque(maxlen=MAX_HISTORY)
-        self.sim_time = 0.0
-        self.calculated_target = 0.0
+        # Zadania GUI w klasach o różnych okresach: synoptyka co klatkę, wykres wg --plot-hz,
+        # Modbus co 100 ms, zegar procesu i pasek stanu co 1 s. Jednorazowy timer budzi na najbliższą.
+        self.sched = Scheduler()
+        for name, period, priority in GUI_CLASSES: self.sched.add(name, period, priority)
+        self.sched.by_name["wykres"].period = 1.0 / plot_rate
+        self.timer = QTimer(self); self.timer.setSingleShot(True); self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.scan)
+        self.store = TelemetryStore()
+        # Historia każdego kroku na dysku; w trybie odtwarzania dane płyną z pliku zamiast z silnika
+        if historian:
+            from historian import Historian
+            self.hist = Historian(historian)
+        else: self.hist = None
+        STARTUP.lap("okno: telemetria + historian")
+        # Dziennik: ograniczony model dla widoku + pełny zapis w SQLite (wątek w tle)
+        self.journal = EventJournal(journal) if journal else None
+        self.events = EventLogModel(self.journal)
+        STARTUP.lap("okno: dziennik (SQLite)")
+        # Modbus-TCP: serwer we własnym wątku, komendy od klientów wykonywane tutaj (wątek GUI)
+        self.modbus = None
+        if modbus is not None:
+            from modbus import MODBUS_PORT, ModbusServer
+            # Zajęty port nie blokuje panelu - działa dalej bez serwera
+            try: self.modbus = ModbusServer(port=MODBUS_PORT if modbus is True else modbus).start()
+            except OSError as e: self.add_log("SYSTEM", f"Modbus-TCP wyłączony: {e}")
+            STARTUP.lap("okno: Modbus-TCP")
+        # Punkty kontrolne aktywnej partii (ciepły restart) zapisywane w tle co CHECKPOINT_EVERY s
+        self.ckpt = Checkpointer(checkpoint).start() if checkpoint else None
+        # Fizyka, PID i logika stanów we własnym wątku (silnik bez Qt), GUI tylko wysyła komendy
+        self.plant = plant if plant is not None else load_plant()
+        proc = MixingProcess(kp=15.0, ki=0.8, kd=5.0, plant=self.plant)
+        # Alarmy z opisu instalacji ("alarms") - ocena w wątku procesu, lista i potwierdzenia tutaj
+        alarms = AlarmEngine(process_tags(proc), self.plant.get("alarms", ()))
+        # Magistrala telemetrii: stan procesu w pamięci współdzielonej dla podglądów w innych procesach (viewer.py)
+        self.bus = None
+        if bus:
+            from telebus import BusWriter
+            try: self.bus = BusWriter(bus, proc.graph, self.plant.get("name", ""))
+            except FileExistsError as e: self.add_log("SYSTEM", f"Magistrala telemetrii wyłączona: {e}")
+        self.worker = ProcessWorker(proc, self.store, self.hist, self.modbus, self.ckpt, alarms=alarms, bus=self.bus)
+        self.shown_seq = 0; self.shown_state = "IDLE"; self.shown_alarms = ()
+        # Profil klatki GUI (etapy pętli + rysowanie + wykres); profil ticku procesu ma worker
+        self.prof = Profiler("GUI", GUI_STAGES); self.profile_csv = PROFILE_FILE
+        STARTUP.lap("okno: instalacja + proces")
         
         self.init_ui()
+        STARTUP.lap("okno: synoptyka + panel operatora")
+
+        # Koszt rysowania widgetów (odświeżeń/s i ms/s) - raport raz na sekundę
+        self.setStatusBar(QStatusBar())
+        self.sched.task("ekran", "zdarzenia + synoptyka", self.loop)
+        self.sched.task("obsługa", "zegar procesu", self.show_clock)
+        self.sched.task("obsługa", "pasek stanu", self.show_paint_stats)
+
+        if self.modbus:
+            self.sched.task("logika", "komendy Modbus", self.modbus_poll)
+            self.add_log("SYSTEM", f"Modbus-TCP na porcie {self.modbus.port}")
+
+        # Nakładka profilera: F12 włącza/wyłącza pomiar, Ctrl+E eksport statystyk do CSV
+        self.overlay = QLabel(self); self.overlay.hide()
+        self.overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.overlay.setStyleSheet("background: rgba(0,0,0,200); color: #00ff88; font-family: Consolas;"
+                                   "font-size: 11px; padding: 8px; border: 1px solid #00ff88;")
+        self.overlay_timer = QTimer(self); self.overlay_timer.timeout.connect(self.show_profile)
+        QShortcut(QKeySequence("F12"), self, lambda: self.set_profiling(not self.prof.enabled))
+        QShortcut(QKeySequence("Ctrl+E"), self, self.export_profile)
+
+        # Wątek procesu rusza po pierwszym rysowaniu (on_first_paint) - jego start nie opóźnia okna
+        self.timer.start(0)
+        STARTUP.lap("okno: pasek stanu, skróty")
 
     def init_ui(self):
         central = QWidget(); self.setCentralWidget(central)
@@ -273,44 +395,36 @@ class FutureSCADA(QMainWindow):
         head = QFrame(); head.setStyleSheet("background: #1e1e1e; border-bottom: 2px solid #00ccff;")
         hl = QHBoxLayout(head)
         self.lcd = QLabel("00:00:00"); self.lcd.setFont(QFont("Consolas", 18, QFont.Bold))
-        self.lbl_stat = QLabel("SYSTEM W GOTOWOŚCI"); self.lbl_stat.setStyleSheet("color: #ff4444; font-weight: bold; font-size: 14px;")
-        hl.addWidget(QLabel("CZAS PROCESU:")); hl.addWidget(self.lcd); hl.addStretch(); hl.addWidget(self.lbl_stat)
+        self.lbl_stat = QLabel("SYSTEM W GOTOWOŚCI"); self.lbl_stat.setObjectName("status") # Styl wg właściwości "mode"
+        self.cb_speed = QComboBox(); self.cb_speed.addItems([f"x{s}" for s in SPEEDS])
+        self.cb_speed.currentIndexChanged.connect(lambda i: self.set_speed(SPEEDS[i]))
+        hl.addWidget(QLabel("CZAS PROCESU:")); hl.addWidget(self.lcd); hl.addWidget(self.cb_speed)
+        hl.addStretch(); hl.addWidget(self.lbl_stat)
         left.addWidget(head)
         
         # Synoptyka
         scheme_box = QGroupBox("WIZUALIZACJA PROCESU"); sl = QVBoxLayout(scheme_box)
         grid = QGridLayout(); grid.setSpacing(0); grid.setContentsMargins(20,20,20,20)
         
-        self.tA = CyberTank("ZB. A", 100, "#00ccff"); self.tA.level=90
-        self.tB = CyberTank("ZB. B", 100, "#ffaa00"); self.tB.level=90; self.tB.temp=90
-        self.tMix = CyberTank("MIESZALNIK", 200, "#ff00ff")
-        self.tOut = CyberTank("MAGAZYN", 300, "#00ff00")
-        
-        self.pA = TurboPump("P-A", 'CornerR')
-        self.pB = TurboPump("P-B", 'CornerL')
-        self.pOut = TurboPump("P-OUT", 'V')
-        
-        self.pipes = [CyberPipe('V') for _ in range(5)] + [CyberPipe('H') for _ in range(2)]
-        
-        # Układanie na siatce (Bez przerw!)
-        grid.addWidget(self.tA, 0, 0, Qt.AlignBottom|Qt.AlignHCenter)
-        grid.addWidget(self.tB, 0, 4, Qt.AlignBottom|Qt.AlignHCenter)
-        
-        grid.addWidget(self.pipes[0], 1, 0, Qt.AlignHCenter)
-        grid.addWidget(self.pipes[1], 1, 4, Qt.AlignHCenter)
-        
-        grid.addWidget(self.pA, 2, 0, Qt.AlignCenter)        
-        grid.addWidget(self.pipes[5], 2, 1)                  
-        grid.addWidget(self.tMix, 2, 2, 2, 1, Qt.AlignCenter) 
-        grid.addWidget(self.pipes[6], 2, 3)                  
-        grid.addWidget(self.pB, 2, 4, Qt.AlignCenter)        
-        
-        grid.addWidget(self.pOut, 4, 2, Qt.AlignTop|Qt.AlignHCenter) 
-        grid.addWidget(self.pipes[2], 5, 2, Qt.AlignHCenter) 
-        grid.addWidget(self.tOut, 6, 2, Qt.AlignTop|Qt.AlignHCenter)
-        
-        grid.setRowStretch(1,1); grid.setRowStretch(5,1)
-        grid.setColumnStretch(1,1); grid.setColumnStretch(3,1)
+        # Układanie na siatce (Bez przerw!) wg opisu instalacji - elementy bez "cell" nie są rysowane.
+        # Widgety trzymają indeks zbiornika / pompy w grafie, zrzut stanu podaje je w tej samej kolejności.
+        tanks = self.worker.snapshot.tanks; edge = self.worker.proc.graph.pump_index
+        self.tank_widgets = []; self.pump_widgets = []; self.pipe_widgets = []
+        for i, t in enumerate(self.plant["tanks"]):
+            if "cell" not in t: continue
+            w = CyberTank(tanks[i], t.get("color", "#00ccff")); place(grid, w, t)
+            self.tank_widgets.append((i, w))
+        for p in self.plant.get("pumps", []):
+            if "cell" not in p: continue
+            w = TurboPump(p["id"], p.get("shape", "V")); place(grid, w, p)
+            self.pump_widgets.append((edge[p["id"]], w))
+        for p in self.plant.get("pipes", []):
+            w = CyberPipe(p.get("orient", "V")); place(grid, w, p)
+            self.pipe_widgets.append((edge[p["pump"]], w))
+        
+        stretch = self.plant.get("grid", {})
+        for r in stretch.get("row_stretch", ()): grid.setRowStretch(r, 1)
+        for c in stretch.get("col_stretch", ()): grid.setColumnStretch(c, 1)
         
         sl.addLayout(grid); left.addWidget(scheme_box, stretch=3)
         
@@ -326,6 +440,11 @@ class FutureSCADA(QMainWindow):
         inputs_layout.addWidget(QLabel("TEMP. WSADU B:"),1,0); inputs_layout.addWidget(self.spB,1,1)
         inputs_layout.addWidget(QLabel("TEMP. DOCELOWA:"),2,0); inputs_layout.addWidget(self.spT,2,1)
         cl.addLayout(inputs_layout)
+        
+        # Nastawy trafiają do silnika procesu przez kolejkę komend
+        self.spA.valueChanged.connect(lambda v: self.worker.send("SET", 'temp_a', v))
+        self.spB.valueChanged.connect(lambda v: self.worker.send("SET", 'temp_b', v))
+        self.spT.valueChanged.connect(lambda v: self.worker.send("SET", 'target', v))
 
         btns_layout = QGridLayout()
         self.btn_start = QPushButton("START"); self.btn_start.clicked.connect(self.start_process)
@@ -333,7 +452,7 @@ class FutureSCADA(QMainWindow):
         
         self.btn_resume = QPushButton("WZNÓW"); self.btn_resume.clicked.connect(self.resume_process)
         self.btn_resume.setStyleSheet("border: 2px solid #ffff00; color: #ffff00;")
-        self.btn_resume.setEnabled(False) 
+
         
         self.btn_pause = QPushButton("AWARYJNY STOP"); self.btn_pause.clicked.connect(self.pause_process)
         self.btn_pause.setStyleSheet("border: 2px solid #ffaa00; color: #ffaa00;")
@@ -346,6 +465,18 @@ class FutureSCADA(QMainWindow):
         btns_layout.addWidget(self.btn_pause, 1, 0)
         btns_layout.addWidget(self.btn_reset, 1, 1)
         cl.addLayout(btns_layout)
+
+        # Alarmy: niepotwierdzone na górze; potwierdzenie idzie komendą ACK do wątku procesu
+        self.lbl_alarms = QLabel("ALARMY: BRAK"); self.lbl_alarms.setObjectName("alarms"); cl.addWidget(self.lbl_alarms)
+        self.alarm_list = QListWidget(); self.alarm_list.setMaximumHeight(110)
+        self.alarm_list.setStyleSheet("QListWidget { background: #111; border: 1px solid #333; font-family: Consolas; }")
+        cl.addWidget(self.alarm_list)
+        ack_layout = QHBoxLayout()
+        self.btn_ack = QPushButton("POTWIERDŹ"); self.btn_ack.clicked.connect(self.ack_alarm)
+        self.btn_ack_all = QPushButton("POTWIERDŹ WSZYSTKIE"); self.btn_ack_all.clicked.connect(lambda: self.worker.send("ACK"))
+        for b in (self.btn_ack, self.btn_ack_all): b.setStyleSheet("border: 2px solid #ff4444; color: #ff4444; padding: 4px;")
+        ack_layout.addWidget(self.btn_ack); ack_layout.addWidget(self.btn_ack_all)
+        cl.addLayout(ack_layout)
         
         left.addWidget(ctrl)
         main_layout.addLayout(left, stretch=2)
@@ -353,185 +484,309 @@ class FutureSCADA(QMainWindow):
         # --- PANEL PRAWY ---
         right = QVBoxLayout()
         
-        plot_box = QGroupBox("TELEMETRIA (PID)"); pl = QVBoxLayout(plot_box)
-        self.fig = Figure(facecolor='#1a1a1a'); self.cnv = FigureCanvas(self.fig)
-        self.ax = self.fig.add_subplot(111, facecolor='#111')
-        self.ax.grid(color='#333', linestyle='--'); self.ax.tick_params(colors='#888')
-        for s in self.ax.spines.values(): s.set_color('#444')
-        pl.addWidget(self.cnv)
-        
-        self.line_pv, = self.ax.plot([],[], '#ff3333', lw=2, label='PV (Temp)')
-        self.line_sp, = self.ax.plot([],[], '#00ff00', lw=1.5, ls='--', label='SP (Cel)')
-        self.line_cv, = self.ax.plot([],[], '#00aaff', lw=1, alpha=0.6, label='Moc (+/-)')
-        self.ax.legend(facecolor='#222', edgecolor='#444', labelcolor='white')
+        plot_box = QGroupBox("TELEMETRIA (PID)"); self.plot_layout = pl = QVBoxLayout(plot_box)
+        # Wykres odświeża się własnym timerem (blit), pętla procesu tylko dopisuje próbki.
+        # Powstaje dopiero po pierwszym rysowaniu okna (load_plot) - do tego czasu zaślepka.
+        self.cb_span = QComboBox(); self.cb_span.addItems(SPANS)
+        self.cb_span.currentTextChanged.connect(lambda k: self.plot and self.plot.set_span(SPANS[k]))
+        self.plot_slot = QPushButton("WCZYTAJ WYKRES" if self.trend == "demand" else "ŁADOWANIE WYKRESU...")
+        self.plot_slot.setEnabled(self.trend == "demand"); self.plot_slot.clicked.connect(self.load_plot)
+        self.plot_slot.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        pl.addWidget(self.cb_span, alignment=Qt.AlignRight); pl.addWidget(self.plot_slot)
         right.addWidget(plot_box, stretch=2)
         
         log_box = QGroupBox("DZIENNIK ZDARZEŃ"); ll = QVBoxLayout(log_box)
-        self.log = QTableWidget(0,3); self.log.setHorizontalHeaderLabels(["CZAS","TYP","TREŚĆ"])
+        self.cb_log = QComboBox(); self.cb_log.addItems(("WSZYSTKIE",) + EVENT_TYPES)
+        self.cb_log.currentIndexChanged.connect(lambda i: self.events.set_filter(EVENT_TYPES[i-1] if i else None))
+        self.log = QTableView(); self.log.setModel(self.events)
         self.log.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.log.verticalHeader().setVisible(False)
-        ll.addWidget(self.log)
+        self.events.rowsAppended.connect(self.log.scrollToBottom)
+        ll.addWidget(self.cb_log, alignment=Qt.AlignRight); ll.addWidget(self.log)
         right.addWidget(log_box, stretch=1)
         
         main_layout.addLayout(right, stretch=3)
 
-    # --- LOGIKA GŁÓWNA ---
-
-    def loop(self):
-        dt = REFRESH_RATE / 1000.0
-        self.sim_time += dt
-        self.lcd.setText(datetime.timedelta(seconds=int(self.sim_time)).__str__())
-        
-        # FIZYKA ZAWSZE DZIAŁA (nawet przy E-STOP)
-        self.tMix.update_physics(dt)
-        self.tOut.update_physics(dt)
-
-        # LOGIKA PROCESU (Tylko gdy nie ma pauzy)
-        if not self.is_paused:
-            if self.state == "FILLING":
-                self.lbl_stat.setText(">> NAPEŁNIANIE ZBIORNIKA")
-                self.lbl_stat.setStyleSheet("color: #00ccff")
-                
-                self.pA.set_on(True); self.pB.set_on(True)
-                self.pipes[0].set_active(True); self.pipes[1].set_active(True)
-                self.pipes[5].set_active(True); self.pipes[6].set_active(True)
-                
-                volA = self.tA.remove_liquid(PUMP_SPEED); volB = self.tB.remove_liquid(PUMP_SPEED)
-                self.tMix.add_liquid(volA, self.tA.temp); self.tMix.add_liquid(volB, self.tB.temp)
-                
-                if self.tMix.level >= 150 or (self.tA.level<=0 and self.tB.level<=0):
-                    self.to_state("CALCULATING")
+        # Wiązania: klatka ustawia wartości, commit() zapisuje tylko zmienione (style jako dynamiczna właściwość)
+        self.ui = ui = Binder()
+        ui.bind("status", self.lbl_stat.setText); ui.bind("status.mode", style_property(self.lbl_stat, "mode"))
+        ui.bind("alarms", self.lbl_alarms.setText); ui.bind("alarms.mode", style_property(self.lbl_alarms, "mode"))
+        ui.bind("lcd", self.lcd.setText)
+        for key, b in (("start", self.btn_start), ("resume", self.btn_resume), ("pause", self.btn_pause)): ui.bind(key, b.setEnabled)
+        ui.bind("pumps", self.show_pumps)
+        self.show_status("SYSTEM W GOTOWOŚCI", "idle"); ui.set("alarms.mode", "")
+        ui.set("start", True); ui.set("resume", False); ui.set("pause", True)
+        ui.commit()
 
-            elif self.state == "CALCULATING":
-                self.pA.set_on(False); self.pB.set_on(False)
-                for p in self.pipes: p.set_active(False)
-                
-                target = self.spT.value()
-                self.calculated_target = ThermalComputer.calculate_required_temp(target, self.tMix.level)
-                
-                diff = self.calculated_target - target
-                self.add_log("OBLICZENIA", f"Korekta strat: +{diff:.2f}°C")
-                self.to_state("HEATING")
+    # --- START ---
 
-            elif self.state == "HEATING":
-                self.lbl_stat.setText(f">> REGULACJA PID (CEL: {self.calculated_target:.1f}°C)")
-                self.lbl_stat.setStyleSheet("color: #ffaa00")
-                
-                out = self.pid.compute(self.calculated_target, self.tMix.temp, dt)
-                
-                # Obsługa wyjścia bipolarnego
-                if out > 0:
-                    self.tMix.heater_power = out; self.tMix.cooling_power = 0
-                else:
-                    self.tMix.heater_power = 0; self.tMix.cooling_power = abs(out)
-                
-                if abs(self.tMix.temp - self.calculated_target) < 0.1:
-                    self.to_state("EMPTYING"); self.tMix.heater_power=0; self.tMix.cooling_power=0
+    def paintEvent(self, e):
+        super().paintEvent(e)
+        if not self.first_paint:
+            # Okno i jego dzieci rysują się w tym samym przebiegu - dalej już po nim
+            self.first_paint = True; QTimer.singleShot(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        STARTUP.lap("pierwsze rysowanie okna")
+        ms = STARTUP.mark("okno narysowane (interaktywne)") * 1000
+        self.worker.start()
+        STARTUP.lap("start wątku procesu")
+        if self.startup_profile:
+            self.add_log("SYSTEM", f"Okno interaktywne po {ms:.0f} ms")
+            if self.trend == "demand": print(STARTUP.report())
+        if self.trend != "demand": QTimer.singleShot(0, self.load_plot)
+
+    def load_plot(self):
+        """ Wykres do panelu telemetrii: QPainter od razu, Matplotlib importowany w tle """
+        if self.plot is not None: return
+        if self.trend == "native": self.set_plot(NativeTrend); return
+        self.plot_slot.setEnabled(False); self.plot_slot.setText("ŁADOWANIE WYKRESU...")
+        t0 = time.perf_counter(); done = {}
+
+        def work():
+            try: done["module"] = importlib.import_module("plot")
+            except ImportError as e: done["error"] = e
+        thread = threading.Thread(target=work, name="import-plot", daemon=True); thread.start()
+
+        def poll():
+            if thread.is_alive(): return
+            self.plot_poll.stop()
+            STARTUP.add("import Matplotlib (w tle)", time.perf_counter() - t0); STARTUP.t = time.perf_counter()
+            if "error" in done:
+                self.add_log("SYSTEM", f"Brak Matplotlib ({done['error']}) - wykres QPainter"); self.set_plot(NativeTrend)
+            else: self.set_plot(done["module"].TrendPlot)
+        self.plot_poll = QTimer(self); self.plot_poll.timeout.connect(poll); self.plot_poll.start(20)
+
+    def set_plot(self, cls):
+        self.plot = cls(self.store, SPANS[self.cb_span.currentText()], rate_hz=self.plot_rate)
+        self.plot.prof = self.prof
+        self.plot.timer.stop(); self.sched.task("wykres", cls.__name__, self.plot.render) # Rytm z klasy "wykres"
+        self.plot_layout.replaceWidget(self.plot_slot, self.plot); self.plot_slot.deleteLater()
+        STARTUP.lap(f"wykres: {cls.__name__}")
+        ms = STARTUP.mark("wykres gotowy") * 1000
+        if self.startup_profile:
+            self.add_log("SYSTEM", f"Wykres ({cls.__name__}) gotowy po {ms:.0f} ms"); print(STARTUP.report())
 
-            elif self.state == "EMPTYING":
-                self.lbl_stat.setText(">> OPRÓŻNIANIE DO MAGAZYNU")
-                self.lbl_stat.setStyleSheet("color: #00ff00")
-                self.pOut.set_on(True); self.pipes[2].set_active(True)
-                
-                vol = self.tMix.remove_liquid(PUMP_SPEED)
-                self.tOut.add_liquid(vol, self.tMix.temp)
-                
-                if self.tMix.level <= 0: self.to_state("DONE")
+    # --- LOGIKA GŁÓWNA ---
 
-            elif self.state == "DONE":
-                self.pOut.set_on(False); self.pipes[2].set_active(False)
-                self.timer.stop()
-                
-                delta = self.tOut.temp - self.spT.value()
-                res = "IDEALNIE" if abs(delta)<0.5 else "OK"
-                self.lbl_stat.setText(f"KONIEC. RÓŻNICA: {delta:+.2f}°C [{res}]")
-                self.lbl_stat.setStyleSheet("color: #00ff00; font-weight: bold; font-size: 16px;")
-                self.add_log("KONIEC", f"Temp Finalna: {self.tOut.temp:.2f}C")
-                self.btn_start.setEnabled(True)
-                self.btn_resume.setEnabled(False)
-        else:
+    def loop(self):
+        prof = self.prof if self.prof.enabled else None
+        # paintEvent-y poprzedniej klatki wykonały się już po jej zakończeniu - liczymy je tutaj
+        if prof: prof.begin(); prof.add("rysowanie", PAINT_STATS.take())
+        for type, msg in self.worker.events(): self.add_log(type, msg)
+        if prof: prof.lap("zdarzenia")
+        # Ostatni opublikowany zrzut - proces liczy się dalej w swoim wątku, niezależnie od tej klatki
+        proc = self.worker.snapshot
+        if proc.seq != self.shown_seq: self.show_snapshot(proc)
+        if prof: prof.lap("synoptyka"); prof.end()
+
+    def show_snapshot(self, proc):
+        self.shown_seq = proc.seq; changed = proc.state != self.shown_state; self.shown_state = proc.state
+        ui = self.ui
+        if changed and proc.active:
+            # Partia mogła wystartować z punktu kontrolnego, a nie z przycisku START
+            ui.set("start", False); ui.set("resume", proc.is_paused)
+
+        # Elementy wykonawcze z silnika -> synoptyka (pompy i rury tylko przy zmianie układu pomp)
+        ui.set("pumps", proc.pumps)
+
+        if proc.is_paused:
             # TRYB AWARYJNY (PAUZA Z FIZYKĄ)
-            self.lbl_stat.setText("!!! AWARYJNY STOP - STYGNIĘCIE !!!")
-            self.lbl_stat.setStyleSheet("color: red; font-weight: bold; font-size: 16px;")
-            
-            # Wymuszone wyłączenie elementów wykonawczych
-            self.tMix.heater_power = 0; self.tMix.cooling_power = 0
-            self.pA.set_on(False); self.pB.set_on(False); self.pOut.set_on(False)
-            
-            # Animacje też pauzują (chyba że chcesz by się kręciły)
-            # W tym bloku nie aktualizujemy logiki procesu, ale fizyka wyżej działa
+            self.show_status("!!! AWARYJNY STOP - STYGNIĘCIE !!!", "estop")
+        elif proc.state == "FILLING":
+            self.show_status(">> NAPEŁNIANIE ZBIORNIKA", "filling")
+        elif proc.state == "HEATING":
+            self.show_status(f">> REGULACJA PID (CEL: {proc.calculated_target:.1f}°C)", "heating")
+        elif proc.state == "EMPTYING":
+            self.show_status(">> OPRÓŻNIANIE DO MAGAZYNU", "emptying")
+        elif proc.state == "DONE" and changed:
+            res = "IDEALNIE" if abs(proc.delta)<0.5 else "OK"
+            self.show_status(f"KONIEC. RÓŻNICA: {proc.delta:+.2f}°C [{res}]", "done")
+            ui.set("start", True); ui.set("resume", False)
+        elif proc.state == "IDLE" and changed:
+            self.show_status("SYSTEM ZRESETOWANY", "idle")
+
+        if proc.alarms is not self.shown_alarms: self.show_alarms(proc.alarms)
+        ui.commit() # Wszystkie zmiany klatki naraz
 
         # Animacje (Zawsze odświeżamy GUI, ale rotacja tylko jak on=True)
-        self.pA.rotate(); self.pB.rotate(); self.pOut.rotate()
-        self.tA.update(); self.tB.update(); self.tMix.update(); self.tOut.update()
-        
-        # Wykres
-        sp = self.calculated_target if self.state=="HEATING" else self.spT.value()
-        net_power = self.tMix.heater_power - self.tMix.cooling_power
-        self.update_plot(self.tMix.temp, sp, net_power)
-
-    def to_state(self, s):
-        self.state = s; self.add_log("ZMIANA STANU", s)
-
-    def update_plot(self, pv, sp, cv):
-        self.history.append((pv, sp, cv))
-        d = list(self.history); x = range(len(d))
-        self.line_pv.set_data(x, [v[0] for v in d])
-        self.line_sp.set_data(x, [v[1] for v in d])
-        self.line_cv.set_data(x, [v[2] for v in d])
-        self.ax.set_xlim(0, MAX_HISTORY); self.ax.set_ylim(-110, 110)
-        self.cnv.draw()
+        for _, w in self.pump_widgets: w.rotate()
+        tanks = proc.tanks
+        for i, w in self.tank_widgets: w.set_view(tanks[i])
+
+    def show_status(self, text, mode):
+        """ Tekst statusu zawsze razem ze stylem - inaczej komunikat zostaje w kolorach poprzedniego trybu """
+        self.ui.set("status", text); self.ui.set("status.mode", mode)
+
+    def show_pumps(self, on):
+        for e, w in self.pump_widgets: w.set_on(on[e])
+        for e, w in self.pipe_widgets: w.set_active(on[e])
+
+    def show_alarms(self, alarms):
+        """ Lista alarmów - przebudowa tylko, gdy wątek procesu opublikował nową """
+        self.shown_alarms = alarms
+        selected = self.alarm_list.currentItem(); selected = selected and selected.data(Qt.UserRole)
+        self.alarm_list.clear()
+        for a in alarms:
+            state = ("AKTYWNY" if a.active else "NORMA") + ("" if a.acked else " / NIEPOTW.")
+            item = QListWidgetItem(f"P{a.priority} {a.id:<10} {a.text} ({a.value:.1f})  [{state}]")
+            item.setData(Qt.UserRole, a.id); item.setForeground(QColor(ALARM_COLORS.get((a.active, a.acked), "#888")))
+            self.alarm_list.addItem(item)
+            if a.id == selected: self.alarm_list.setCurrentItem(item)
+        unacked = sum(not a.acked for a in alarms); active = sum(a.active for a in alarms)
+        self.ui.set("alarms", f"ALARMY: {active} aktywne, {unacked} niepotwierdzone" if alarms else "ALARMY: BRAK")
+        self.ui.set("alarms.mode", "unacked" if unacked else "")
+
+    def ack_alarm(self):
+        item = self.alarm_list.currentItem()
+        if item is not None: self.worker.send("ACK", item.data(Qt.UserRole))
+
+    def scan(self):
+        """ Należne klasy zadań GUI, potem sen do następnej """
+        self.timer.start(math.ceil(self.sched.run_pending() * 1000))
+
+    def show_clock(self):
+        self.ui.set("lcd", str(datetime.timedelta(seconds=int(self.worker.snapshot.sim_time)))); self.ui.commit()
+
+    def show_paint_stats(self):
+        rate, ms = PAINT_STATS.report()
+        per = "  ".join(f"{k}: {n}" for k, (n, _) in sorted(PAINT_STATS.data.items()))
+        # Klasy zadań: koszt ostatni/maks., maks. spóźnienie startu i przekroczenia - maksima z ostatniej sekundy
+        writes, skipped = self.ui.take_stats()
+        self.statusBar().showMessage(f"RYSOWANIE: {rate:.0f} odśw./s, {ms:.1f} ms/s   [{per}]   "
+                                     f"WIĄZANIA: {writes} zapisów, {skipped} bez zmian   "
+                                     f"PROCES: {self.worker.sched.report()}   GUI: {self.sched.report()}"
+                                     + (f"   PUNKT KONTROLNY: {self.ckpt.written}x, {self.ckpt.size / 1024:.0f} KiB, "
+                                        f"zapis {self.ckpt.write_ms:.1f} ms" if self.ckpt else ""))
+        PAINT_STATS.reset()
+
+    def modbus_poll(self):
+        sp = (self.spA, self.spB, self.spT)
+        actions = {"START": self.start_process, "STOP": self.pause_process,
+                   "RESUME": self.resume_process, "RESET": self.reset_system}
+        for cmd, arg in self.modbus.commands():
+            if cmd == "SP": sp[arg[0]].setValue(arg[1])
+            else: actions[cmd]()
+
+    # --- PROFILER ---
+
+    def set_profiling(self, on):
+        for p in (self.prof, self.worker.prof): p.reset(); p.enabled = on
+        PAINT_STATS.take()
+        self.overlay.setVisible(on)
+        if on: self.show_profile(); self.overlay_timer.start(500)
+        else: self.overlay_timer.stop()
+
+    def show_profile(self):
+        self.overlay.setText(self.prof.report() + "\n\n" + self.worker.prof.report())
+        self.overlay.adjustSize()
+        self.overlay.move(self.width() - self.overlay.width() - 20, 60); self.overlay.raise_()
+
+    def export_profile(self):
+        export_csv(self.profile_csv, (self.prof, self.worker.prof))
+        self.add_log("SYSTEM", f"Profil zapisany: {self.profile_csv}")
+
+    def set_speed(self, speed):
+        self.worker.send("SPEED", speed)
+
+    def start_replay(self, path, batch=None, speed=1.0):
+        """ Odtwarzanie zapisanej partii z pliku historii (1x - 100x) """
+        from historian import HistorianReader, Replay
+        reader = HistorianReader(path)
+        if not reader.batches(): self.add_log("ODTWARZANIE", f"Brak danych w {path}"); return
+        replay = Replay(reader, batch, speed)
+        for key in ("start", "resume", "pause"): self.ui.set(key, False)
+        self.ui.commit()
+        self.setWindowTitle(f"SCADA - ODTWARZANIE (partia {replay.batch}, x{speed:g})")
+        self.add_log("ODTWARZANIE", f"{path}: partia {replay.batch}, {len(replay.data)} rekordów")
+        self.worker.send("REPLAY", replay)
+
+    def restore_checkpoint(self, path):
+        """ Ciepły restart: stan procesu, PID i historia telemetrii z punktu kontrolnego """
+        try: data = load_checkpoint(path)
+        except (OSError, ValueError) as e: self.add_log("SYSTEM", f"Brak punktu kontrolnego {path}: {e}"); return
+        s = checkpoint_state(data)
+        self.spA.setValue(s["temp_a"]); self.spB.setValue(s["temp_b"]); self.spT.setValue(s["target"])
+        self.worker.send("RESTORE", data)
 
     def add_log(self, type, msg):
-        r = self.log.rowCount(); self.log.insertRow(r)
-        t = datetime.datetime.now().strftime("%H:%M:%S")
-        self.log.setItem(r,0,QTableWidgetItem(t)); self.log.setItem(r,1,QTableWidgetItem(type))
-        self.log.setItem(r,2,QTableWidgetItem(str(msg)))
-        self.log.scrollToBottom()
+        # Wiersz trafi do widoku razem z innymi z tej klatki, do SQLite w paczce z wątku dziennika
+        self.events.append(type, msg)
 
     # --- BUTTON SLOTS ---
+    # Komendy idą kolejką do wątku procesu; stan przycisków wg ostatniego zrzutu
 
     def start_process(self):
-        if self.state != "IDLE" and self.state != "DONE": return
-        self.tA.temp = self.spA.value(); self.tB.temp = self.spB.value()
-        self.history.clear(); self.pid.integral=0; self.sim_time=0
-        self.to_state("FILLING")
-        self.is_paused = False
-        self.timer.start(REFRESH_RATE)
-        self.btn_start.setEnabled(False)
-        self.btn_resume.setEnabled(False)
-        self.log.setRowCount(0); self.add_log("SYSTEM", "START PROCESU")
+        if self.worker.snapshot.active: return
+        self.events.clear()
+        self.worker.send("START")
+        self.ui.set("start", False); self.ui.set("resume", False); self.ui.commit()
 
     def pause_process(self):
-        if self.state == "IDLE" or self.state == "DONE": return
-        # Nie zatrzymujemy timera, tylko wchodzimy w tryb pauzy logicznej
-        self.is_paused = True
-        self.add_log("SYSTEM", "AWARYJNE ZATRZYMANIE")
-        self.btn_resume.setEnabled(True)
+        # Fizyka liczy się dalej, wchodzimy tylko w tryb pauzy logicznej
+        if not self.worker.snapshot.active: return
+        self.worker.send("PAUSE")
+        self.ui.set("resume", True); self.ui.commit()
 
     def resume_process(self):
-        if self.state == "IDLE" or self.state == "DONE": return
-        self.is_paused = False
-        self.lbl_stat.setText("PROCES WZNOWIONY")
-        self.add_log("SYSTEM", "WZNOWIONO")
-        self.btn_resume.setEnabled(False)
+        if not self.worker.snapshot.active: return
+        self.worker.send("RESUME")
+        self.show_status("PROCES WZNOWIONY", STATUS_MODES.get(self.shown_state, "idle")) # Styl bieżącej fazy, nie E-STOP
+        self.ui.set("resume", False); self.ui.commit()
 
     def reset_system(self):
-        self.timer.stop(); self.state="IDLE"; self.is_paused = False
-        self.btn_start.setEnabled(True); self.btn_resume.setEnabled(False)
-        
-        self.tA.level=90; self.tB.level=90; self.tMix.level=0; self.tOut.level=0
-        self.tMix.heater_power=0; self.tMix.cooling_power=0; self.tMix.temp=20; self.tOut.temp=20
-        
-        self.pA.set_on(False); self.pB.set_on(False); self.pOut.set_on(False)
-        for p in self.pipes: p.set_active(False)
-        self.tA.update(); self.tMix.update(); self.tOut.update()
-        
-        self.lbl_stat.setText("SYSTEM ZRESETOWANY")
-        self.add_log("SYSTEM", "PEŁNY RESET")
+        self.worker.send("RESET")
+        self.ui.set("start", True); self.ui.set("resume", False); self.ui.set("pause", True)
+        self.show_status("SYSTEM ZRESETOWANY", "idle"); self.ui.commit()
+
+    def closeEvent(self, e):
+        self.worker.stop()
+        if self.ckpt:
+            # Ostatni stan przy zamknięciu - po ponownym uruchomieniu z --restore partia biegnie dalej
+            if self.worker.snapshot.active and self.worker.replay is None: self.worker.checkpoint()
+            self.ckpt.stop()
+        if self.prof.enabled: export_csv(self.profile_csv, (self.prof, self.worker.prof))
+        if self.hist: self.hist.close()
+        if self.journal: self.journal.close()
+        if self.modbus: self.modbus.stop()
+        if self.bus: self.bus.close()
+        super().closeEvent(e)
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = FutureSCADA()
+    ap = build_parser()
+    ap.add_argument("--plot-hz", type=float, default=PLOT_RATE, help="częstotliwość odświeżania wykresu [Hz]")
+    ap.add_argument("--replay", metavar="PLIK", default=None, help="odtwórz partię z pliku historii")
+    ap.add_argument("--batch", type=int, default=None, help="numer partii do odtworzenia (domyślnie ostatnia)")
+    ap.add_argument("--speed", type=float, default=1.0, help="przyspieszenie odtwarzania (1 - 100)")
+    ap.add_argument("--journal", metavar="PLIK", default=JOURNAL_FILE, help="baza SQLite dziennika zdarzeń")
+    ap.add_argument("--modbus", metavar="PORT", type=int, nargs="?", const=True, default=None,
+                    help="serwer Modbus-TCP (bez numeru - port domyślny z modbus.py)")
+    ap.add_argument("--bus", metavar="NAZWA", default=None,
+                    help="publikuj stan na magistralę telemetrii (pamięć współdzielona) dla podglądów viewer.py")
+    ap.add_argument("--checkpoint", metavar="PLIK", default=CHECKPOINT_FILE, help="plik punktów kontrolnych ('' = wyłączone)")
+    ap.add_argument("--checkpoint-every", metavar="S", type=float, default=CHECKPOINT_EVERY,
+                    help="okres punktów kontrolnych aktywnej partii [s]")
+    ap.add_argument("--trend", choices=TRENDS, default="mpl",
+                    help="wykres: Matplotlib ładowany w tle po starcie | natywny QPainter | Matplotlib na żądanie")
+    ap.add_argument("--startup-profile", action="store_true", help="czas importów i budowy okna per komponent")
+    ap.add_argument("--profile", action="store_true", help="profiler etapów ticku z nakładką (także F12)")
+    ap.add_argument("--profile-csv", metavar="PLIK", default=PROFILE_FILE,
+                    help="plik CSV ze statystykami profilera (Ctrl+E, zapis też przy zamknięciu)")
+    args, qt_args = ap.parse_known_args()
+    if args.headless:
+        run_headless(args.steps, args.verbose, args.historian, args.plant, args.restore)
+        sys.exit(0)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    STARTUP.lap("argumenty + QApplication")
+    # Podczas odtwarzania nie dopisujemy do historii
+    window = FutureSCADA(args.plot_hz, None if args.replay else (args.historian or HISTORIAN_FILE), args.journal, args.modbus,
+                         load_plant(args.plant) if args.plant else None, None if args.replay else args.checkpoint,
+                         args.trend, args.bus)
+    window.profile_csv = args.profile_csv; window.startup_profile = args.startup_profile
+    if window.ckpt: window.ckpt.every = args.checkpoint_every
+    if args.profile: window.set_profiling(True)
     window.show()
+    if args.restore and not args.replay: window.restore_checkpoint(args.restore)
+    if args.replay: window.start_replay(args.replay, args.batch, min(max(args.speed, 1.0), 100.0))
     sys.exit(app.exec_())
\ No newline at end of file
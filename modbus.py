@@ -0,0 +1,277 @@
+import sys
+import time
+import queue
+import struct
+import asyncio
+import argparse
+import threading
+
+from engine import STATES, MixingProcess
+
+# --- KONFIGURACJA ---
+MODBUS_PORT = 5020      # 502 wymaga uprawnień roota
+UNIT_ID = 1
+
+# --- MAPA REJESTRÓW ---
+# Input registers (FC4, tylko odczyt) - wartości skalowane do liczb całkowitych:
+#   0      stan procesu (indeks w engine.STATES)
+#   1      flagi: bit0 pompa A, bit1 pompa B, bit2 pompa OUT, bit3 E-STOP
+#   2..5   poziomy A, B, MIESZALNIK, MAGAZYN [L x10]
+#   6..9   temperatury A, B, MIESZALNIK, MAGAZYN [°C x100]
+#   10, 11 moc grzania / chłodzenia [% x10]
+#   12     wyjście PID (grzanie - chłodzenie) [% x10, ze znakiem]
+#   13     cel temperatury mieszalnika (z naddatkiem) [°C x100]
+#   14     różnica magazyn - cel [°C x100, ze znakiem]
+#   15, 16 czas procesu [s x10, uint32, starsze słowo pierwsze]
+# Holding registers (FC3/6/16): 0 temp. wsadu A, 1 temp. wsadu B, 2 temp. docelowa [°C x100]
+# Coils (FC1/5/15), zapis 1 = komenda: 0 START, 1 AWARYJNY STOP, 2 WZNÓW, 3 RESET
+#   (odczyt: 0 proces aktywny, 1 pauza)
+# Discrete inputs (FC2): 0 pompa A, 1 pompa B, 2 pompa OUT, 3 pauza, 4 partia zakończona
+# Adres urządzenia (unit) UNIT_ID albo 0xFF - inne dostają wyjątek 0x0B
+IR = struct.Struct(">HH4H4HHHhHhI")
+HR = struct.Struct(">3H")
+IR_COUNT = IR.size // 2; HR_COUNT = HR.size // 2
+COILS = ("START", "STOP", "RESUME", "RESET"); DISCRETE_COUNT = 5
+
+# Kody wyjątków Modbus
+ILLEGAL_FUNCTION, ILLEGAL_ADDRESS, ILLEGAL_VALUE = 1, 2, 3
+GATEWAY_TARGET_FAILED = 0x0B # Zapytanie do innego urządzenia niż UNIT_ID
+
+def u16(x): return min(max(int(round(x)), 0), 0xFFFF)
+def s16(x): return min(max(int(round(x)), -0x8000), 0x7FFF)
+
+def pack_bits(bits, addr, count):
+    """ Bity [addr, addr+count) spakowane jak w odpowiedzi FC1/FC2 (LSB pierwszy) """
+    v = (bits >> addr) & ((1 << count) - 1)
+    return v.to_bytes((count + 7) // 8, "little")
+
+class Snapshot:
+    """ Niezmienny obraz rejestrów - budowany raz na tick, czytany przez wszystkie zapytania """
+    __slots__ = ("ir", "hr", "coils", "discrete")
+
+    def __init__(self, ir=bytes(IR.size), hr=bytes(HR.size), coils=0, discrete=0):
+        self.ir = ir; self.hr = hr; self.coils = coils; self.discrete = discrete
+
+    @classmethod
+    def of(cls, proc):
+        t = (proc.tA, proc.tB, proc.tMix, proc.tOut)
+        heat = proc.tMix.heater_power; cool = proc.tMix.cooling_power
+        flags = proc.pump_a | proc.pump_b << 1 | proc.pump_out << 2 | proc.is_paused << 3
+        ir = IR.pack(STATES.index(proc.state), flags,
+                     *(u16(x.level * 10) for x in t), *(u16(x.temp * 100) for x in t),
+                     u16(heat * 10), u16(cool * 10), s16((heat - cool) * 10),
+                     u16(proc.setpoint * 100), s16(proc.delta * 100),
+                     min(int(proc.sim_time * 10), 0xFFFFFFFF))
+        hr = HR.pack(u16(proc.temp_a * 100), u16(proc.temp_b * 100), u16(proc.target * 100))
+        return cls(ir, hr, proc.active | proc.is_paused << 1, flags | (proc.state == "DONE") << 4)
+
+# --- SERWER ---
+
+class ModbusServer:
+    """ Serwer Modbus-TCP (asyncio) we własnym wątku - nie blokuje pętli zdarzeń Qt.
+        Odczyty obsługiwane z ostatniego obrazu rejestrów, zapisy trafiają do kolejki komend,
+        którą właściciel procesu opróżnia w swoim ticku. """
+    def __init__(self, host="0.0.0.0", port=MODBUS_PORT, unit=UNIT_ID):
+        self.host = host; self.port = port; self.unit = unit
+        self.snapshot = Snapshot()
+        self.cmds = queue.SimpleQueue()
+        self.requests = 0; self.clients = 0
+        self.loop = None; self.thread = None
+        self.ready = threading.Event()
+
+    # --- STRONA PROCESU ---
+
+    def publish(self, proc):
+        # Podmiana referencji jest atomowa - wątek serwera widzi stary albo nowy obraz, nigdy pół
+        self.snapshot = Snapshot.of(proc)
+
+    def commands(self):
+        """ Komendy z zapisów klientów: ("START" | "STOP" | "RESUME" | "RESET", None) lub ("SP", (nr, °C)) """
+        while True:
+            try: yield self.cmds.get_nowait()
+            except queue.Empty: return
+
+    # --- WĄTEK SERWERA ---
+
+    def start(self):
+        self.thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name="modbus", daemon=True)
+        self.thread.start(); self.ready.wait()
+        if self.loop is None: raise OSError(f"Modbus: nie można otworzyć portu {self.port}")
+        return self
+
+    async def serve(self):
+        self.stopping = asyncio.Event()
+        try: server = await asyncio.start_server(self.handle, self.host, self.port)
+        except OSError: self.ready.set(); return
+        self.port = server.sockets[0].getsockname()[1] # port 0 = dowolny wolny
+        self.loop = asyncio.get_running_loop(); self.ready.set()
+        async with server: await self.stopping.wait()
+
+    def stop(self):
+        if self.loop is None: return
+        self.loop.call_soon_threadsafe(self.stopping.set); self.thread.join()
+        self.loop = None
+
+    async def handle(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                head = await reader.readexactly(7)
+                tid, proto, length, unit = struct.unpack(">HHHB", head)
+                if not 2 <= length <= 254: break # Nagłówek MBAP bez sensu - nie da się odnaleźć następnej ramki
+                pdu = await reader.readexactly(length - 1)
+                if proto != 0: continue
+                # Unit 0xFF = "to urządzenie" w Modbus-TCP; inne adresy nie są obsługiwane przez ten serwer
+                if unit in (self.unit, 0xFF): resp = self.process(pdu)
+                else: resp = bytes(((pdu[0] | 0x80) & 0xFF, GATEWAY_TARGET_FAILED))
+                writer.write(struct.pack(">HHHB", tid, 0, len(resp) + 1, unit) + resp)
+                self.requests += 1
+                # Klienci zwykle czekają na odpowiedź, ale przy potokowaniu nie buforujemy bez końca
+                if writer.transport.get_write_buffer_size() > 1 << 16: await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1; writer.close()
+
+    def process(self, pdu):
+        """ PDU zapytania -> PDU odpowiedzi (lub wyjątku) """
+        if not pdu: return bytes((0x80, ILLEGAL_FUNCTION))
+        fc = pdu[0]
+        try:
+            if fc in (1, 2, 3, 4):
+                addr, count = struct.unpack_from(">HH", pdu, 1)
+                snap = self.snapshot
+                if fc in (3, 4):
+                    regs = snap.hr if fc == 3 else snap.ir
+                    if not 1 <= count <= 125: return bytes((fc | 0x80, ILLEGAL_VALUE))
+                    if addr + count > len(regs) // 2: return bytes((fc | 0x80, ILLEGAL_ADDRESS))
+                    data = regs[addr * 2:(addr + count) * 2]
+                else:
+                    bits, size = (snap.coils, len(COILS)) if fc == 1 else (snap.discrete, DISCRETE_COUNT)
+                    if not 1 <= count <= 2000: return bytes((fc | 0x80, ILLEGAL_VALUE))
+                    if addr + count > size: return bytes((fc | 0x80, ILLEGAL_ADDRESS))
+                    data = pack_bits(bits, addr, count)
+                return bytes((fc, len(data))) + data
+
+            if fc == 5:
+                addr, value = struct.unpack_from(">HH", pdu, 1)
+                if value not in (0x0000, 0xFF00): return bytes((fc | 0x80, ILLEGAL_VALUE))
+                if addr >= len(COILS): return bytes((fc | 0x80, ILLEGAL_ADDRESS))
+                if value: self.cmds.put((COILS[addr], None))
+                return pdu[:5]
+            if fc == 15:
+                addr, count, n = struct.unpack_from(">HHB", pdu, 1)
+                if not 1 <= count <= 1968 or n != (count + 7) // 8 or len(pdu) != 6 + n:
+                    return bytes((fc | 0x80, ILLEGAL_VALUE))
+                if addr + count > len(COILS): return bytes((fc | 0x80, ILLEGAL_ADDRESS))
+                bits = int.from_bytes(pdu[6:6 + n], "little")
+                for i in range(count):
+                    if bits >> i & 1: self.cmds.put((COILS[addr + i], None))
+                return pdu[:5]
+            if fc in (6, 16):
+                if fc == 6:
+                    addr, = struct.unpack_from(">H", pdu, 1); values = struct.unpack_from(">H", pdu, 3)
+                else:
+                    addr, count, n = struct.unpack_from(">HHB", pdu, 1)
+                    # Liczba bajtów musi zgadzać się z liczbą rejestrów - nie przyjmujemy uciętych danych
+                    if not 1 <= count <= 123 or n != 2 * count or len(pdu) != 6 + n:
+                        return bytes((fc | 0x80, ILLEGAL_VALUE))
+                    values = struct.unpack_from(f">{count}H", pdu, 6)
+                if addr + len(values) > HR_COUNT: return bytes((fc | 0x80, ILLEGAL_ADDRESS))
+                for i, v in enumerate(values): self.cmds.put(("SP", (addr + i, v / 100.0)))
+                return pdu[:5]
+        except struct.error:
+            return bytes((fc | 0x80, ILLEGAL_VALUE))
+        return bytes((fc | 0x80, ILLEGAL_FUNCTION))
+
+# --- KLIENT TESTOWY ---
+
+class ModbusError(Exception): pass
+
+class ModbusClient:
+    """ Minimalny klient Modbus-TCP (asyncio) - do testów i benchmarku """
+    def __init__(self, host="127.0.0.1", port=MODBUS_PORT, unit=UNIT_ID):
+        self.host = host; self.port = port; self.unit = unit; self.tid = 0
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    def close(self): self.writer.close()
+
+    async def request(self, pdu):
+        self.tid = (self.tid + 1) & 0xFFFF
+        self.writer.write(struct.pack(">HHHB", self.tid, 0, len(pdu) + 1, self.unit) + pdu)
+        tid, _, length, _ = struct.unpack(">HHHB", await self.reader.readexactly(7))
+        resp = await self.reader.readexactly(length - 1)
+        if tid != self.tid: raise ModbusError(f"zła transakcja {tid} != {self.tid}")
+        if resp[0] & 0x80: raise ModbusError(f"wyjątek {resp[1]} dla funkcji {resp[0] & 0x7F}")
+        return resp
+
+    async def read_registers(self, addr, count, fc=4):
+        resp = await self.request(struct.pack(">BHH", fc, addr, count))
+        return struct.unpack_from(f">{count}H", resp, 2)
+
+    async def read_bits(self, addr, count, fc=2):
+        resp = await self.request(struct.pack(">BHH", fc, addr, count))
+        bits = int.from_bytes(resp[2:], "little")
+        return [bool(bits >> i & 1) for i in range(count)]
+
+    async def write_register(self, addr, value):
+        await self.request(struct.pack(">BHH", 6, addr, value))
+
+    async def write_coil(self, addr, on=True):
+        await self.request(struct.pack(">BHH", 5, addr, 0xFF00 if on else 0))
+
+    async def read_plant(self):
+        """ Cały blok input registers zdekodowany do słownika """
+        regs = bytes(b for r in await self.read_registers(0, IR_COUNT) for b in r.to_bytes(2, "big"))
+        v = IR.unpack(regs)
+        return {"state": STATES[v[0]], "flags": v[1],
+                "level": [x / 10 for x in v[2:6]], "temp": [x / 100 for x in v[6:10]],
+                "heater": v[10] / 10, "cooling": v[11] / 10, "cv": v[12] / 10,
+                "sp": v[13] / 100, "delta": v[14] / 100, "t": v[15] / 10}
+
+# --- BENCHMARK ---
+
+async def bench_clients(port, clients, requests):
+    lat = []
+    async def worker():
+        c = await ModbusClient(port=port).connect()
+        for _ in range(requests):
+            t0 = time.perf_counter(); await c.read_registers(0, IR_COUNT)
+            lat.append(time.perf_counter() - t0)
+        c.close()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return time.perf_counter() - t0, sorted(lat)
+
+def bench(clients, requests, dt=0.05):
+    """ Serwer + proces w tle (publikacja co tick) + N klientów odpytujących cały blok rejestrów """
+    server = ModbusServer("127.0.0.1", 0).start()
+    proc = MixingProcess(); proc.start()
+    running = True
+    def plant():
+        while running:
+            for cmd, arg in server.commands(): pass
+            proc.step(dt); server.publish(proc); time.sleep(dt)
+    th = threading.Thread(target=plant, daemon=True); th.start()
+
+    async def main():
+        c = await ModbusClient(port=server.port).connect()
+        print("ODCZYT:", await c.read_plant()); c.close()
+        return await bench_clients(server.port, clients, requests)
+    elapsed, lat = asyncio.run(main())
+    running = False; th.join(); server.stop()
+
+    n = len(lat); pct = lambda p: lat[min(int(p * n), n - 1)] * 1000
+    print(f"{clients} klientów x {requests} zapytań FC4 ({IR_COUNT} rejestrów): {n / elapsed:,.0f} zapytań/s")
+    print(f"OPÓŹNIENIE: p50 {pct(0.5):.3f} ms, p95 {pct(0.95):.3f} ms, p99 {pct(0.99):.3f} ms, max {lat[-1]*1000:.3f} ms")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Modbus-TCP - benchmark serwera rejestrów mieszalni")
+    ap.add_argument("--clients", type=int, default=50, help="liczba równoległych klientów")
+    ap.add_argument("--requests", type=int, default=1000, help="zapytań na klienta")
+    args = ap.parse_args()
+    bench(args.clients, args.requests)
+    sys.exit(0)
@@ -0,0 +1,107 @@
+import time
+from collections import deque
+
+from PyQt5.QtCore import QTimer
+import matplotlib
+matplotlib.use('Qt5Agg')
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from telemetry import SPANS
+from trend import PLOT_RATE, Y_LIMITS
+
+class TrendPlot(FigureCanvas):
+    """ Wykres PV/SP/CV: statyczne tło (osie, siatka, legenda) w cache, blit tylko trzech linii """
+    def __init__(self, store, span=SPANS["20 s"], rate_hz=PLOT_RATE):
+        self.fig = Figure(facecolor='#1a1a1a')
+        super().__init__(self.fig)
+        self.ax = self.fig.add_subplot(111, facecolor='#111')
+        self.ax.grid(color='#333', linestyle='--'); self.ax.tick_params(colors='#888')
+        for s in self.ax.spines.values(): s.set_color('#444')
+        self.ax.set_ylim(*Y_LIMITS)
+
+        # animated=True -> linie nie trafiają do tła, rysujemy je sami
+        self.line_pv, = self.ax.plot([],[], '#ff3333', lw=2, label='PV (Temp)', animated=True)
+        self.line_sp, = self.ax.plot([],[], '#00ff00', lw=1.5, ls='--', label='SP (Cel)', animated=True)
+        self.line_cv, = self.ax.plot([],[], '#00aaff', lw=1, alpha=0.6, label='Moc (+/-)', animated=True)
+        self.lines = (self.line_pv, self.line_sp, self.line_cv)
+        self.ax.legend(facecolor='#222', edgecolor='#444', labelcolor='white')
+
+        # Dane czytamy z magazynu telemetrii (telemetry.TelemetryStore) - wykres niczego nie kopiuje
+        self.store = store; self.drawn_seq = -1
+        self.set_span(span)
+
+        self.use_blit = True
+        self.bg = None
+        self.frame_times = deque(maxlen=200)
+        self.prof = None # profiler.Profiler GUI - koszt klatki wykresu jako etap "wykres"
+        self.mpl_connect('draw_event', self.on_draw)
+
+        self.timer = QTimer(self); self.timer.timeout.connect(self.render)
+        self.set_rate(rate_hz)
+
+    def set_rate(self, hz):
+        self.timer.start(max(1, int(1000 / hz)))
+
+    def set_span(self, seconds):
+        """ Okno czasowe wykresu - oś X to sekundy względem ostatniej próbki """
+        self.span = seconds
+        self.ax.set_xlim(-seconds, 0)
+        self.bg = None; self.drawn_seq = -1
+        self.draw_idle() # Nowe tło (inne opisy osi)
+
+    # --- RYSOWANIE ---
+
+    def on_draw(self, event):
+        # Pełny render (start, zmiana rozmiaru) - odświeżamy tło i dorysowujemy linie
+        self.bg = self.copy_from_bbox(self.ax.bbox)
+        for l in self.lines: self.ax.draw_artist(l)
+
+    def render(self):
+        if self.store.seq == self.drawn_seq or not self.isVisible(): return
+        t0 = time.perf_counter()
+
+        with self.store.lock: # Próbki dopisuje wątek procesu - kopiujemy okno pod blokadą
+            w = self.store.query(self.span)
+            x = w.t - w.t[-1] if len(w) else w.t
+            self.line_pv.set_data(x, w["pv"].copy()); self.line_sp.set_data(x, w["sp"].copy())
+            self.line_cv.set_data(x, w["cv"].copy())
+
+        if self.use_blit and self.bg is not None:
+            self.restore_region(self.bg)
+            for l in self.lines: self.ax.draw_artist(l)
+            self.blit(self.ax.bbox)
+        else:
+            self.draw()
+
+        self.drawn_seq = self.store.seq
+        dt = time.perf_counter() - t0
+        self.frame_times.append(dt)
+        if self.prof is not None and self.prof.enabled: self.prof.add("wykres", dt)
+
+    def frame_cost_ms(self):
+        """ Średni koszt klatki wykresu [ms] z ostatnich próbek """
+        if not self.frame_times: return 0.0
+        return 1000.0 * sum(self.frame_times) / len(self.frame_times)
+
+# --- POMIAR: pełny render vs blit ---
+
+if __name__ == "__main__":
+    import os, sys, math
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from telemetry import TelemetryStore
+    app = QApplication(sys.argv)
+
+    store = TelemetryStore()
+    plot = TrendPlot(store); plot.timer.stop()
+    plot.resize(800, 500); plot.show(); app.processEvents()
+    plot.draw()
+
+    for use_blit in (False, True):
+        plot.use_blit = use_blit; plot.frame_times.clear()
+        for k in range(200):
+            store.push(k * store.dt, 50 + 10 * math.sin(k / 20), 60, 80 * math.cos(k / 30), (0,)*4, (0,)*4)
+            plot.render()
+        print(f"{'BLIT' if use_blit else 'PEŁNY RENDER'}: {plot.frame_cost_ms():.2f} ms/klatkę")
+    sys.exit(0)
@@ -0,0 +1,80 @@
+import csv
+import time
+
+import numpy as np
+
+from engine import REFRESH_RATE
+
+# --- KONFIGURACJA ---
+WINDOW = 1000           # Ile ostatnich ticków trzymamy do percentyli
+PERCENTILES = (50, 95, 99)
+
+class Profiler:
+    """ Czas każdego etapu ticku (perf_counter) w pierścieniu ostatnich WINDOW ticków.
+        Wyłączony kosztuje tylko sprawdzenie `enabled` w miejscu wywołania. """
+    def __init__(self, name, stages, budget_ms=REFRESH_RATE, window=WINDOW, enabled=False):
+        self.name = name; self.stages = tuple(stages); self.budget = budget_ms / 1000.0
+        self.idx = {s: i for i, s in enumerate(self.stages)}
+        self.samples = np.zeros((window, len(self.stages) + 1)) # etapy + suma ticku
+        self.acc = [0.0] * len(self.stages)
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.head = 0; self.count = 0; self.ticks = 0; self.overruns = 0
+        self.acc = [0.0] * len(self.stages); self.t = time.perf_counter()
+
+    # --- POMIAR ---
+
+    def begin(self):
+        self.t = time.perf_counter()
+
+    def lap(self, stage):
+        """ Czas od poprzedniego begin()/lap() doliczany do etapu """
+        now = time.perf_counter()
+        self.acc[self.idx[stage]] += now - self.t; self.t = now
+
+    def add(self, stage, seconds):
+        """ Czas zmierzony gdzie indziej (np. paintEvent, render wykresu) - wchodzi do bieżącego ticku """
+        self.acc[self.idx[stage]] += seconds
+
+    def discard(self):
+        """ Porzuca bieżący tick (np. cykl bez pracy) - nie trafia do statystyk """
+        self.acc = [0.0] * len(self.stages)
+
+    def end(self):
+        """ Zamyka tick: zapis etapów do pierścienia, kontrola budżetu """
+        row = self.samples[self.head]; acc = self.acc
+        row[:-1] = acc; total = row[-1] = sum(acc)
+        self.acc = [0.0] * len(self.stages)
+        self.head = (self.head + 1) % len(self.samples)
+        if self.count < len(self.samples): self.count += 1
+        self.ticks += 1
+        if total > self.budget: self.overruns += 1
+
+    # --- WYNIKI ---
+
+    def stats(self):
+        """ [(etap, p50, p95, p99, max)] w ms - ostatni wiersz to cały tick """
+        if not self.count: return []
+        data = self.samples[:self.count] * 1000.0
+        pct = np.percentile(data, PERCENTILES, axis=0); mx = data.max(axis=0)
+        names = self.stages + ("TICK",)
+        return [(n, *pct[:, i].tolist(), float(mx[i])) for i, n in enumerate(names)]
+
+    def report(self):
+        lines = [f"{self.name}: {self.ticks} ticków, przekroczenia {self.budget * 1000:.0f} ms: {self.overruns}",
+                 f"  {'etap':<12}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for name, p50, p95, p99, mx in self.stats():
+            lines.append(f"  {name:<12}{p50:>8.3f}{p95:>8.3f}{p99:>8.3f}{mx:>8.3f}")
+        return "\n".join(lines)
+
+def export_csv(path, profilers):
+    """ Statystyki wielu profili w jednym pliku CSV (ms) """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(("profil", "etap", "p50_ms", "p95_ms", "p99_ms", "max_ms", "ticki", "przekroczenia", "budzet_ms"))
+        for p in profilers:
+            for row in p.stats():
+                w.writerow((p.name, row[0], *(f"{v:.4f}" for v in row[1:]), p.ticks, p.overruns,
+                            f"{p.budget * 1000:g}"))
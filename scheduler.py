@@ -0,0 +1,83 @@
+import time
+
+# --- KLASY ZADAŃ ---
+# Jak w sterowniku PLC: każda klasa ma stały okres i priorytet (0 = najważniejsza). Gdy kilka klas
+# jest należnych naraz, pierwsza rusza ta o najwyższym priorytecie, a po każdej klasie szybsze są
+# sprawdzane ponownie - wolna praca nie opóźnia szybkiej pętli o więcej niż jedno swoje zadanie.
+# Brak wywłaszczania (jeden wątek), brak nadrabiania: pominięte cykle liczone są jako przekroczenia.
+
+class ScanClass:
+    """ Klasa zadań cyklicznych: zadania w kolejności rejestracji + statystyki czasu """
+    def __init__(self, name, period, priority):
+        self.name = name; self.period = period; self.priority = priority
+        self.tasks = []
+        self.next_t = 0.0
+        self.runs = 0
+        self.exec_ms = 0.0      # Koszt ostatniego cyklu
+        self.exec_max = 0.0     # Maks. koszt cyklu od ostatniego odczytu statystyk
+        self.jitter_max = 0.0   # Maks. spóźnienie startu cyklu od ostatniego odczytu statystyk [ms]
+        self.overruns = 0       # Cykle dłuższe niż okres lub pominięte
+
+    def run(self, now, clock):
+        late = now - self.next_t
+        self.jitter_max = max(self.jitter_max, late * 1000)
+        for name, fn in self.tasks: fn()
+        end = clock()
+        self.exec_ms = (end - now) * 1000; self.exec_max = max(self.exec_max, self.exec_ms)
+        self.runs += 1
+        if end - now > self.period: self.overruns += 1
+        # Następny cykl w stałej siatce; pominięte cykle (spóźnienie > okres) przepadają
+        self.next_t += self.period
+        if self.next_t <= end:
+            missed = int((end - self.next_t) / self.period) + 1
+            self.overruns += missed; self.next_t += missed * self.period
+
+class Scheduler:
+    """ Cykliczny wykonawca klas zadań. run_pending() wykonuje należne klasy i zwraca czas do kolejnej -
+        pętla wątku (run) czeka tyle na zdarzeniu zatrzymania, w wątku GUI czeka jednorazowy QTimer. """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.classes = []; self.by_name = {}
+
+    def add(self, name, period, priority):
+        c = ScanClass(name, period, priority); c.next_t = self.clock()
+        self.classes.append(c); self.classes.sort(key=lambda c: c.priority)
+        self.by_name[name] = c
+        return c
+
+    def task(self, cls, name, fn):
+        """ Rejestracja zadania w klasie (wykonywane w kolejności rejestracji) """
+        c = self.by_name[cls]
+        if not c.tasks: c.next_t = self.clock() # Klasa była pusta - cykle liczymy od teraz
+        c.tasks.append((name, fn))
+
+    def run_pending(self):
+        while True:
+            now = self.clock()
+            due = next((c for c in self.classes if c.tasks and c.next_t <= now), None)
+            if due is None: break
+            due.run(now, self.clock)
+        waits = [c.next_t for c in self.classes if c.tasks]
+        return max(min(waits) - self.clock(), 0.0) if waits else 1.0
+
+    def run(self, stopping):
+        """ Pętla wątku do ustawienia zdarzenia `stopping` """
+        while not stopping.is_set():
+            stopping.wait(self.run_pending())
+
+    def reset(self):
+        now = self.clock()
+        for c in self.classes: c.next_t = now
+
+    def stats(self):
+        """ [(klasa, okres [ms], koszt ostatni, koszt maks., spóźnienie maks. [ms], przekroczenia)] - zeruje maksima """
+        out = []
+        for c in self.classes:
+            if not c.tasks: continue
+            out.append((c.name, c.period * 1000, c.exec_ms, c.exec_max, c.jitter_max, c.overruns))
+            c.exec_max = 0.0; c.jitter_max = 0.0
+        return out
+
+    def report(self):
+        return "  ".join(f"{name} {period:g} ms: {last:.2f}/{mx:.2f} ms, spóźn. {jit:.1f} ms, przekr. {over}"
+                         for name, period, last, mx, jit, over in self.stats())
@@ -0,0 +1,39 @@
+import time
+
+from engine import REFRESH_RATE
+
+# --- KONFIGURACJA ---
+SIM_DT = REFRESH_RATE / 1000.0  # Stały krok fizyki [s]
+MAX_FRAME = 0.5                 # Maks. czas rzeczywisty rozliczany w jednej klatce [s]
+MAX_SUBSTEPS = 1000             # Limit kroków na klatkę (ochrona przed "spiralą śmierci")
+SPEEDS = (1, 10, 100)           # Przyspieszenia do wyboru przez operatora
+
+class SimClock:
+    """ Zegar symulacji: mierzy rzeczywisty czas między klatkami i zamienia go na stałe kroki fizyki """
+    def __init__(self, dt=SIM_DT, speed=1.0, now=time.perf_counter):
+        self.dt = dt; self.speed = speed; self.now = now
+        self.reset()
+
+    def reset(self):
+        self.last = self.now(); self.acc = 0.0
+        self.real_dt = 0.0   # Czas rzeczywisty ostatniej klatki (po przycięciu)
+        self.dropped = 0.0   # Czas symulacji porzucony przez limity [s]
+        self.late = 0        # Ile klatek trafiło w limit
+
+    def tick(self):
+        """ Liczba kroków SIM_DT do wykonania w tej klatce (nadrabia opóźnienia GUI) """
+        t = self.now(); real = t - self.last; self.last = t
+        if real > MAX_FRAME:
+            # Długie zawieszenie (np. przeciąganie okna) - nie nadrabiamy go w całości
+            self.dropped += (real - MAX_FRAME) * self.speed; self.late += 1
+            real = MAX_FRAME
+        self.real_dt = real
+        self.acc += real * self.speed
+
+        n = int(self.acc / self.dt + 1e-9) # Tolerancja na błąd zaokrągleń akumulatora
+        if n > MAX_SUBSTEPS:
+            self.dropped += (n - MAX_SUBSTEPS) * self.dt; self.late += 1
+            n = MAX_SUBSTEPS; self.acc = 0.0
+        else:
+            self.acc -= n * self.dt
+        return n
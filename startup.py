@@ -0,0 +1,31 @@
+import time
+
+class StartupProfile:
+    """ Czas uruchomienia: importy i budowa okna etapami (lap / add) oraz chwile od startu (mark).
+        Bez zależności - importowany jako pierwszy, żeby mierzyć wszystko, co po nim. """
+    def __init__(self):
+        self.t0 = self.t = time.perf_counter()
+        self.stages = []; self.marks = []
+
+    def lap(self, name):
+        """ Czas od poprzedniego lap()/mark() jako etap `name` """
+        now = time.perf_counter()
+        self.stages.append((name, now - self.t)); self.t = now
+
+    def add(self, name, seconds):
+        """ Etap zmierzony osobno (np. import w tle) """
+        self.stages.append((name, seconds))
+
+    def mark(self, name):
+        """ Chwila od startu (np. okno interaktywne) - zwraca ją w sekundach """
+        now = time.perf_counter(); self.t = now
+        self.marks.append((name, now - self.t0))
+        return now - self.t0
+
+    def report(self):
+        lines = ["PROFIL URUCHOMIENIA (od importu main.py)", f"  {'etap':<40}{'ms':>9}"]
+        for name, s in self.stages: lines.append(f"  {name:<40}{s * 1000:>9.1f}")
+        for name, s in self.marks: lines.append(f"  @ {name:<38}{s * 1000:>9.1f}")
+        return "\n".join(lines)
+
+STARTUP = StartupProfile()
@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import glob
+import mmap
+import time
+import signal
+import argparse
+import multiprocessing
+from collections import namedtuple
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from engine import STATES
+
+# --- KONFIGURACJA ---
+BUS_PREFIX = "scada-"   # Segmenty pamięci współdzielonej: /dev/shm/scada-<nazwa>
+RETRIES = 30            # Ile razy czytelnik ponawia odczyt trafiający na zapis w toku
+STALE_AFTER = 2.0       # Brak pulsu przez tyle sekund = symulator nie działa
+
+# --- UKŁAD SEGMENTU ---
+# Nagłówek | opis JSON (identyfikatory i nazwy węzłów, pojemności, pompy - stały) | blok float64:
+#   sim_time, stan (indeks w STATES), pauza, wyjście PID, wartość zadana, cel mieszalnika, różnica,
+#   poziomy[n], temperatury[n], grzanie[n], chłodzenie[n], pompy[m]
+# Seqlock: pisarz zwiększa seq przed zapisem (nieparzysty = zapis w toku) i po nim (parzysty). Czytelnik
+# kopiuje blok i sprawdza, czy seq się nie zmienił - pisarz nigdy nie czeka na czytelników, czytelnicy
+# nie piszą do segmentu. Kolejność zapisów gwarantuje model pamięci x86 (TSO) i GIL po stronie pisarza.
+# Puls (beat) to czas ostatniego znaku życia pisarza - odświeżany bez zmiany seq, czytelnicy nie kopiują stanu.
+MAGIC = b"SCADABUS"
+VERSION = 2
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("nodes", "<u4"), ("pumps", "<u4"), ("meta_size", "<u4"),
+                   ("pid", "<u4"), ("pad", "<u4"), ("seq", "<u8"), ("stamp", "<f8"), ("writes", "<u8"),
+                   ("beat", "<f8")])
+SCALARS = ("sim_time", "state", "paused", "cv", "setpoint", "target", "delta")
+NODE_FIELDS = ("level", "temp", "heater", "cooling")
+
+BusFrame = namedtuple("BusFrame", "seq stamp " + " ".join(SCALARS + NODE_FIELDS) + " pumps")
+
+def shm_name(name):
+    return name if name.startswith(BUS_PREFIX) else BUS_PREFIX + name
+
+def discover():
+    """ Nazwy magistral widoczne w systemie (Linux: /dev/shm), bez prefiksu """
+    return sorted(os.path.basename(p)[len(BUS_PREFIX):] for p in glob.glob(f"/dev/shm/{BUS_PREFIX}*"))
+
+def alive(pid):
+    """ Czy proces o danym pid nadal istnieje (ten sam host - pamięć współdzielona jest lokalna) """
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: return True # Istnieje, tylko należy do innego użytkownika
+    except OSError: return False
+    return True
+
+def owner(name):
+    """ pid pisarza zapisany w nagłówku istniejącego segmentu, None gdy nagłówka nie da się odczytać """
+    try:
+        r = BusReader(name)
+        try: return r.layout.pid
+        finally: r.close()
+    except (OSError, ValueError): return None
+
+class Layout:
+    """ Widoki NumPy na segment (bez kopiowania) - wspólne dla pisarza i czytelnika """
+    def __init__(self, buf):
+        h = np.ndarray((), HEADER, buffer=buf)
+        if h["magic"] != MAGIC: raise ValueError("magistrala: to nie jest segment telemetrii")
+        if h["version"] != VERSION: raise ValueError(f"magistrala: nieobsługiwana wersja {h['version']}")
+        n = int(h["nodes"]); m = int(h["pumps"]); off = HEADER.itemsize
+        self.meta = json.loads(bytes(buf[off:off + int(h["meta_size"])]).rstrip(b" "))
+        self.seq = np.ndarray((1,), "<u8", buffer=buf, offset=HEADER.fields["seq"][1])
+        self.stamp = np.ndarray((1,), "<f8", buffer=buf, offset=HEADER.fields["stamp"][1])
+        self.writes = np.ndarray((1,), "<u8", buffer=buf, offset=HEADER.fields["writes"][1])
+        self.beat = np.ndarray((1,), "<f8", buffer=buf, offset=HEADER.fields["beat"][1])
+        self.pid = int(h["pid"])
+        self.data = np.ndarray((len(SCALARS) + len(NODE_FIELDS) * n + m,), "<f8", buffer=buf, offset=off + int(h["meta_size"]))
+        self.n = n; self.m = m
+
+    @staticmethod
+    def size(meta, n, m):
+        return HEADER.itemsize + len(meta) + 8 * (len(SCALARS) + len(NODE_FIELDS) * n + m)
+
+def arrays(data, n):
+    """ Tablice bloku (poziomy, temperatury, grzanie, chłodzenie, pompy) jako widoki bez kopiowania """
+    k = len(SCALARS); out = []
+    for _ in NODE_FIELDS: out.append(data[k:k + n]); k += n
+    out.append(data[k:])
+    return out
+
+# --- PISARZ (symulator) ---
+
+class BusWriter:
+    """ Segment telemetrii jednego symulatora - tworzy go, zapisuje stan procesu, usuwa przy close() """
+    def __init__(self, name, graph, plant=""):
+        self.name = shm_name(name)
+        meta = json.dumps({"plant": plant, "ids": graph.ids, "names": graph.names,
+                           "capacity": [c if c != float("inf") else None for c in graph.capacity],
+                           "tanks": graph.n_tanks, "pumps": graph.pump_ids}, ensure_ascii=False).encode("utf-8")
+        meta += b" " * (-len(meta) % 8) # Blok danych wyrównany do 8 bajtów
+        n = len(graph.ids); m = len(graph.pump_ids); size = Layout.size(meta, n, m)
+        try: self.shm = shared_memory.SharedMemory(self.name, create=True, size=size)
+        except FileExistsError:
+            # Zastępujemy tylko segment po symulatorze, który nie posprzątał - działający zachowuje swoją magistralę
+            pid = owner(self.name)
+            if pid is not None and alive(pid):
+                raise FileExistsError(f"magistrala {self.name}: używa jej działający proces {pid}") from None
+            old = shared_memory.SharedMemory(self.name); old.close(); old.unlink()
+            self.shm = shared_memory.SharedMemory(self.name, create=True, size=size)
+        h = np.ndarray((), HEADER, buffer=self.shm.buf)
+        h["magic"] = MAGIC; h["version"] = VERSION; h["nodes"] = n; h["pumps"] = m; h["meta_size"] = len(meta)
+        h["pid"] = os.getpid(); del h
+        self.shm.buf[HEADER.itemsize:HEADER.itemsize + len(meta)] = meta
+        self.layout = Layout(self.shm.buf)
+        d = self.layout.data; k = len(SCALARS)
+        self.scalars = d[:k]
+        self.level, self.temp, self.heater, self.cooling, self.pumps = arrays(d, n)
+
+    def write(self, proc):
+        g = proc.graph; seq = self.layout.seq; m = proc.mix
+        seq[0] += 1 # Nieparzysty - zapis w toku
+        self.scalars[:] = (proc.sim_time, STATES.index(proc.state), proc.is_paused, g.heater[m] - g.cooling[m],
+                           proc.setpoint, proc.calculated_target, proc.delta)
+        self.level[:] = g.level; self.temp[:] = g.temp; self.heater[:] = g.heater; self.cooling[:] = g.cooling
+        self.pumps[:] = g.active
+        self.layout.stamp[0] = self.layout.beat[0] = time.perf_counter(); self.layout.writes[0] += 1
+        seq[0] += 1
+
+    def beat(self):
+        """ Znak życia bez nowego stanu - czytelnicy nie uznają bezczynnego symulatora za martwy """
+        self.layout.beat[0] = time.perf_counter()
+
+    def close(self):
+        self.scalars = self.level = self.temp = self.heater = self.cooling = self.pumps = self.layout = None
+        self.shm.close(); self.shm.unlink()
+
+# --- CZYTELNIK (podgląd) ---
+
+class BusReader:
+    """ Podłączenie tylko do odczytu: widoki NumPy wprost na segment, spójny odczyt seqlockiem do bufora
+        czytelnika (kopia kilkuset bajtów bez alokacji). Kilku czytelników nie wpływa na pisarza. """
+    def __init__(self, name):
+        self.name = shm_name(name)
+        path = f"/dev/shm/{self.name}"
+        if os.path.isdir("/dev/shm"):
+            # Linux: mapowanie PROT_READ - zapis do segmentu jest niemożliwy, nie angażujemy resource_tracker
+            fd = os.open(path, os.O_RDONLY)
+            try: self.mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            finally: os.close(fd)
+            self.shm = None; buf = memoryview(self.mm)
+        else:
+            self.shm = shared_memory.SharedMemory(self.name); self.mm = None
+            # Python < 3.13 rejestruje też podłączony segment i usuwa go przy wyjściu czytelnika - wyrejestrowujemy
+            try: resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception: pass
+            buf = self.shm.buf.toreadonly()
+        self.layout = Layout(buf); self.buf = buf
+        self.meta = self.layout.meta
+        self.copy = np.empty_like(self.layout.data); self.view = arrays(self.copy, self.layout.n)
+        self.last_seq = None; self.stamp = 0.0
+        self.reads = 0; self.busy = 0; self.torn = 0
+
+    def read(self):
+        """ BusFrame z nowym stanem albo None, gdy od poprzedniego odczytu nic się nie zmieniło. Zapis w toku
+            (nieparzysty seq) lub przerwana kopia - krótka ponowna próba (oddając procesor pisarzowi),
+            najwyżej RETRIES razy; potem None i sprawdzenie przy następnym odpytaniu """
+        seq = self.layout.seq; data = self.layout.data
+        for _ in range(RETRIES):
+            s1 = int(seq[0])
+            if s1 == self.last_seq: return None
+            if s1 & 1: time.sleep(0); continue
+            np.copyto(self.copy, data); stamp = float(self.layout.stamp[0])
+            if int(seq[0]) == s1:
+                self.last_seq = s1; self.stamp = stamp; self.reads += 1
+                return BusFrame(s1, stamp, *self.copy[:len(SCALARS)].tolist(), *self.view)
+            self.torn += 1
+        self.busy += 1 # Pisarz nie skończył w czasie prób - odczyt odłożony do następnego odpytania
+        return None
+
+    def age(self):
+        """ Sekundy od ostatniego pulsu pisarza (zapisu stanu albo beat()) """
+        return time.perf_counter() - float(self.layout.beat[0])
+
+    def close(self):
+        self.layout = self.copy = self.view = None
+        self.buf.release(); self.buf = None
+        if self.mm is not None: self.mm.close()
+        else: self.shm.close()
+
+# --- SYMULATOR BEZ GUI ---
+
+def simulate(name, plant=None, speed=1.0, batches=0):
+    """ Proces + wątek procesu publikujący na magistralę; partie jedna po drugiej (0 = bez końca) """
+    from engine import MixingProcess
+    from topology import load_plant
+    from worker import ProcessWorker
+    desc = load_plant(plant) if plant else load_plant()
+    proc = MixingProcess(plant=desc)
+    try: bus = BusWriter(name, proc.graph, desc.get("name", ""))
+    except FileExistsError as e: sys.exit(str(e))
+    worker = ProcessWorker(proc, bus=bus).start(); worker.send("SPEED", speed)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # kill też usuwa segment (finally)
+    print(f"MAGISTRALA {bus.name}: {len(proc.graph.ids)} węzłów, {len(proc.graph.pump_ids)} pomp, x{speed:g} (Ctrl+C - koniec)")
+    done = 0
+    try:
+        while not batches or done < batches:
+            worker.send("RESET"); worker.send("START"); time.sleep(0.5)
+            while worker.snapshot.active: time.sleep(0.1)
+            done += 1
+            print(f"partia {done}: {worker.snapshot.state}, różnica {worker.snapshot.delta:+.2f}°C, zapisów {int(bus.layout.writes[0])}")
+    except KeyboardInterrupt: pass
+    finally:
+        worker.stop(); bus.close()
+
+# --- POMIAR ---
+
+def reader_main(name, poll, ready, stop, out):
+    r = BusReader(name); lat = []; polls = 0
+    r.read(); ready.put(os.getpid()) # Stan sprzed startu pomiaru nie liczy się do opóźnień
+    while not stop.is_set():
+        f = r.read(); polls += 1
+        if f is not None: lat.append(time.perf_counter() - f.stamp)
+        if poll: time.sleep(poll)
+    out.put((r.reads, r.busy, r.torn, polls, lat)); r.close()
+
+def bench(readers, seconds, rate, poll):
+    from engine import MixingProcess
+    proc = MixingProcess(); proc.start()
+    for _ in range(200): proc.step(0.05) # Stan w trakcie napełniania
+    bus = BusWriter("bench", proc.graph); bus.write(proc)
+    ctx = multiprocessing.get_context("spawn"); ready = ctx.Queue(); out = ctx.Queue(); stop = ctx.Event()
+    procs = [ctx.Process(target=reader_main, args=(bus.name, poll, ready, stop, out)) for _ in range(readers)]
+    for p in procs: p.start()
+    for _ in procs: ready.get() # Wszyscy czytelnicy podłączeni
+    t0 = time.perf_counter(); n = 0; cost = 0.0; period = 1.0 / rate if rate else 0.0
+    while time.perf_counter() - t0 < seconds:
+        proc.sim_time += 0.05; w0 = time.perf_counter(); bus.write(proc); cost += time.perf_counter() - w0; n += 1
+        if period: time.sleep(max(period - (time.perf_counter() - w0), 0))
+    span = time.perf_counter() - t0; stop.set()
+    results = [out.get() for _ in procs]
+    for p in procs: p.join()
+    bus.close()
+    print(f"PISARZ: {n / span:,.0f} zapisów/s, zapis {cost / max(n, 1) * 1e6:.2f} µs, czytelników: {readers}")
+    for i, (reads, busy, torn, polls, lat) in enumerate(results):
+        lat = np.array(lat) * 1000 if lat else np.zeros(1)
+        print(f"  czytelnik {i}: {reads / span:,.0f} odczytów/s ({polls:,} sprawdzeń, {busy} odłożonych - zapis w toku, "
+              f"{torn} przerwanych), "
+              f"opóźnienie p50 {np.percentile(lat, 50):.3f} ms, p99 {np.percentile(lat, 99):.3f} ms, maks. {lat.max():.3f} ms")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Magistrala telemetrii w pamięci współdzielonej: symulator, lista, pomiar")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("sim", help="symulator bez GUI publikujący na magistralę")
+    s.add_argument("name"); s.add_argument("--plant", metavar="PLIK", default=None)
+    s.add_argument("--speed", type=float, default=1.0); s.add_argument("--batches", type=int, default=0, help="0 = bez końca")
+    sub.add_parser("ls", help="magistrale widoczne w systemie")
+    b = sub.add_parser("bench", help="tempo zapisu i opóźnienie czytelników")
+    b.add_argument("--readers", type=int, default=8); b.add_argument("--seconds", type=float, default=5.0)
+    b.add_argument("--rate", type=float, default=0, help="zapisy/s (0 = tak szybko jak się da)")
+    b.add_argument("--poll", type=float, default=0.001, help="przerwa między sprawdzeniami czytelnika [s]")
+    args = ap.parse_args()
+    if args.cmd == "sim": simulate(args.name, args.plant, args.speed, args.batches)
+    elif args.cmd == "ls":
+        for name in discover():
+            r = BusReader(name); f = r.read()
+            print(f"{name}: {r.meta['plant'] or '-'}, pid {r.layout.pid}, zapisów {int(r.layout.writes[0])}, "
+                  f"stan {STATES[int(f.state)] if f else '?'}, puls {r.age():.1f} s temu"); r.close()
+    else: bench(args.readers, args.seconds, args.rate, args.poll)
+    sys.exit(0)
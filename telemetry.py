@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+
+from engine import REFRESH_RATE
+
+# --- KONFIGURACJA ---
+CHANNELS = ("t", "pv", "sp", "cv",
+            "level_a", "level_b", "level_mix", "level_out",
+            "temp_a", "temp_b", "temp_mix", "temp_out")
+CH = {name: i for i, name in enumerate(CHANNELS)}
+
+RAW_SECONDS = 60          # Surowe próbki: ostatnia minuta (1200 punktów przy 50 ms)
+TIERS = ((120, 600),      # 6 s na kubełek x 600 = ostatnia godzina
+         (8, 600))        # 48 s na kubełek x 600 = ostatnia zmiana (8 h)
+SPANS = {"20 s": 20, "1 min": 60, "1 h": 3600, "ZMIANA (8 h)": 8 * 3600}
+
+class Ring:
+    """ Bufor pierścieniowy wierszy o podwójnej długości - ostatnie N wierszy to zawsze ciągły widok """
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.buf = np.zeros((2 * capacity, width))
+        self.head = 0; self.count = 0
+
+    def push(self, row):
+        i = self.head; n = self.capacity
+        self.buf[i] = row; self.buf[i + n] = row
+        self.head = (i + 1) % n
+        if self.count < n: self.count += 1
+
+    def last(self, n):
+        """ Widok ostatnich n wierszy (bez kopiowania) """
+        n = min(n, self.count)
+        end = self.head + self.capacity if self.count == self.capacity else self.head
+        return self.buf[end - n:end]
+
+    def clear(self):
+        self.head = 0; self.count = 0
+
+class Tier:
+    """ Poziom zagęszczenia: kubełki po `factor` wierszy poziomu niższego (min / max / średnia) """
+    def __init__(self, factor, capacity, width, bucket_dt):
+        self.factor = factor; self.bucket_dt = bucket_dt
+        self.lo = Ring(capacity, width); self.hi = Ring(capacity, width); self.mean = Ring(capacity, width)
+        self.acc_lo = np.empty(width); self.acc_hi = np.empty(width); self.acc_sum = np.empty(width)
+        self.acc_n = 0; self.next = None
+
+    def push(self, lo, hi, mean):
+        if self.acc_n == 0:
+            self.acc_lo[:] = lo; self.acc_hi[:] = hi; self.acc_sum[:] = mean
+        else:
+            np.minimum(self.acc_lo, lo, out=self.acc_lo)
+            np.maximum(self.acc_hi, hi, out=self.acc_hi)
+            self.acc_sum += mean
+        self.acc_n += 1
+        if self.acc_n < self.factor: return
+
+        # Kubełek pełny - zamykamy go i przekazujemy wyżej
+        self.acc_sum /= self.acc_n
+        self.lo.push(self.acc_lo); self.hi.push(self.acc_hi); self.mean.push(self.acc_sum)
+        self.acc_n = 0
+        if self.next is not None: self.next.push(self.lo.last(1)[0], self.hi.last(1)[0], self.mean.last(1)[0])
+
+    def clear(self):
+        self.lo.clear(); self.hi.clear(); self.mean.clear(); self.acc_n = 0
+
+class Window:
+    """ Gotowe do narysowania dane okna: czas, wartość (średnia kubełka) i obwiednia min/max - same widoki """
+    def __init__(self, rows, lo=None, hi=None):
+        self.rows = rows
+        self.lo = rows if lo is None else lo
+        self.hi = rows if hi is None else hi
+
+    def __len__(self): return len(self.rows)
+
+    @property
+    def t(self): return self.lo[:, 0]
+
+    def __getitem__(self, name): return self.rows[:, CH[name]]
+
+class TelemetryStore:
+    """ Historia wszystkich tagów: surowy pierścień + kaskada zagęszczeń, zero alokacji na próbkę """
+    def __init__(self, dt=REFRESH_RATE / 1000.0, raw_seconds=RAW_SECONDS, tiers=TIERS):
+        width = len(CHANNELS)
+        self.dt = dt
+        self.raw = Ring(int(round(raw_seconds / dt)), width)
+        self.row = np.zeros(width)
+        self.tiers = []; bucket_dt = dt
+        for factor, capacity in tiers:
+            bucket_dt *= factor
+            self.tiers.append(Tier(factor, capacity, width, bucket_dt))
+        for lower, upper in zip(self.tiers, self.tiers[1:]): lower.next = upper
+        self.seq = 0 # Licznik próbek - widok wie, czy jest coś nowego
+        self.lock = threading.Lock() # Zapis z wątku procesu, odczyt z GUI - blokuje wywołujący
+
+    def push(self, t, pv, sp, cv, levels, temps):
+        r = self.row
+        r[0] = t; r[1] = pv; r[2] = sp; r[3] = cv
+        r[4:8] = levels; r[8:12] = temps
+        self.raw.push(r)
+        if self.tiers: self.tiers[0].push(r, r, r)
+        self.seq += 1
+
+    def push_process(self, proc):
+        """ Próbka prosto z engine.MixingProcess """
+        mix = proc.tMix
+        self.push(proc.sim_time, mix.temp, proc.setpoint, mix.heater_power - mix.cooling_power,
+                  (proc.tA.level, proc.tB.level, mix.level, proc.tOut.level),
+                  (proc.tA.temp, proc.tB.temp, mix.temp, proc.tOut.temp))
+
+    def query(self, seconds):
+        """ Ostatnie `seconds` sekund z najdokładniejszego poziomu, który je obejmuje """
+        if seconds <= self.raw.capacity * self.dt or not self.tiers:
+            return Window(self.raw.last(int(round(seconds / self.dt))))
+        for tier in self.tiers:
+            if seconds <= tier.mean.capacity * tier.bucket_dt or tier is self.tiers[-1]:
+                n = int(round(seconds / tier.bucket_dt))
+                return Window(tier.mean.last(n), tier.lo.last(n), tier.hi.last(n))
+
+    def clear(self):
+        self.raw.clear()
+        for tier in self.tiers: tier.clear()
+        self.seq += 1
@@ -0,0 +1,38 @@
+from alarms import AlarmEngine, TagTable
+
+def engine(*rules):
+    value = [0.0]; tags = TagTable(); tags.block(["X"], lambda: [value[0]])
+    events = []; alarms = AlarmEngine(tags, rules); alarms.on_event = lambda type, msg: events.append(msg)
+    return alarms, value, events
+
+def active(alarms):
+    return [(a.id, a.active, a.acked) for a in alarms.view]
+
+def test_deadband_holds_alarm_until_value_clears_band():
+    alarms, value, _ = engine({"id": "HI", "tag": "X", "hi": 10, "deadband": 2})
+    value[0] = 11; alarms.scan(0.0)
+    assert active(alarms) == [("HI", True, False)]
+    value[0] = 9; alarms.scan(1.0) # Poniżej progu, ale w histerezie
+    assert alarms.view[0].active
+    value[0] = 7.9; alarms.scan(2.0)
+    assert active(alarms) == [("HI", False, False)]
+
+def test_on_delay_counts_process_time():
+    alarms, value, _ = engine({"id": "HI", "tag": "X", "hi": 10, "on_delay": 5})
+    value[0] = 11; alarms.scan(0.0); alarms.scan(4.9)
+    assert not alarms.view
+    alarms.scan(5.0)
+    assert active(alarms) == [("HI", True, False)]
+
+def test_latched_alarm_stays_until_acknowledged():
+    alarms, value, events = engine({"id": "OVF", "tag": "X", "hi": 0, "latch": True})
+    value[0] = 1; alarms.scan(0.0); value[0] = 0; alarms.scan(1.0)
+    assert active(alarms) == [("OVF", True, False)]
+    alarms.ack("OVF")
+    assert not alarms.view
+    assert events[-1] == "OVF: potwierdzony"
+
+def test_unchanged_tags_skip_evaluation():
+    alarms, value, _ = engine({"id": "HI", "tag": "X", "hi": 10})
+    value[0] = 1; alarms.scan(0.0); alarms.scan(1.0)
+    assert alarms.evaluated == 0
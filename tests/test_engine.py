@@ -0,0 +1,27 @@
+from engine import MixingProcess, run_headless
+from topology import synthetic
+
+def test_headless_batch_reaches_done():
+    proc = run_headless(100000)
+    assert proc.state == "DONE"
+    assert abs(proc.delta) < 0.5
+
+def test_unreachable_target_is_reported():
+    proc = MixingProcess(); proc.target = 95.0; events = []
+    proc.on_event = lambda type, msg: events.append(msg)
+    proc.start(); proc.run_batch(100000)
+    assert proc.state == "DONE"
+    assert sum("Cel nieosiągalny" in m for m in events) == 1
+
+def test_synthetic_plant_reaches_done():
+    proc = run_headless(100000, plant=synthetic(30))
+    assert proc.state == "DONE"
+    assert abs(proc.delta) < 0.5
+
+def test_large_batch_ends_by_heating_timeout():
+    # Duży wsad: PID nie domyka celu w rozsądnym czasie - partia kończy się limitem czasu grzania, a nie wisi w HEATING
+    proc = MixingProcess(plant=synthetic(300)); events = []
+    proc.on_event = lambda type, msg: events.append(msg)
+    proc.start(); proc.run_batch(100000)
+    assert proc.state == "DONE"
+    assert any("Przekroczony czas grzania" in m for m in events)
@@ -0,0 +1,30 @@
+from engine import MixingProcess
+from historian import Historian, HistorianReader, Replay, apply_record
+
+def record_batches(path, count=2):
+    hist = Historian(str(path)); proc = MixingProcess()
+    for _ in range(count):
+        proc.reset(log=False); proc.start(); hist.begin_batch()
+        proc.run_batch(100000, observer=hist.record)
+    hist.close()
+
+def test_range_and_phase(tmp_path):
+    path = tmp_path / "h.hst"; record_batches(path)
+    rd = HistorianReader(str(path))
+    assert rd.batches() == [1, 2]
+    rows = rd.range(2, 10.0, 20.0)
+    assert len(rows) and (rows["batch"] == 2).all()
+    assert rows["t"][0] >= 10.0 and rows["t"][-1] < 20.0
+    heating = rd.phase(1, "HEATING")
+    assert len(heating) and (heating["state"] == heating["state"][0]).all()
+
+def test_replay_reaches_recorded_end(tmp_path):
+    path = tmp_path / "h.hst"; record_batches(path, 1)
+    replay = Replay(HistorianReader(str(path)), speed=100.0)
+    proc = MixingProcess(); n = 0
+    while not replay.finished:
+        recs = replay.advance(0.05); n += len(recs)
+        if len(recs): apply_record(proc, recs[-1])
+    assert n == len(replay.data)
+    assert proc.state == "DONE"
+    assert proc.tOut.level == float(replay.data["level"][-1][3])
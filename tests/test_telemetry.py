@@ -0,0 +1,18 @@
+from telemetry import Ring, TelemetryStore
+
+def test_ring_keeps_last_rows_contiguous():
+    r = Ring(4, 1)
+    for i in range(6): r.push([i])
+    assert r.count == 4
+    assert r.last(3)[:, 0].tolist() == [3, 4, 5]
+    assert r.last(10)[:, 0].tolist() == [2, 3, 4, 5]
+
+def test_tiers_downsample_min_max_mean():
+    store = TelemetryStore(dt=1.0, raw_seconds=10, tiers=((5, 10),))
+    for i in range(10): store.push(i, float(i), 0, 0, (0, 0, 0, 0), (0, 0, 0, 0))
+    w = store.query(20) # Ponad surowy pierścień - kubełki po 5 próbek
+    assert len(w) == 2
+    assert w["pv"].tolist() == [2.0, 7.0]
+    assert w.lo[:, 1].tolist() == [0.0, 5.0] and w.hi[:, 1].tolist() == [4.0, 9.0]
+    store.clear()
+    assert len(store.query(5)) == 0 and store.tiers[0].acc_n == 0
@@ -0,0 +1,25 @@
+import pytest
+
+from topology import FlowGraph, load_plant, synthetic
+
+def test_transfer_conserves_mass():
+    g = FlowGraph(synthetic(50))
+    g.set_active(g.pumps("FILLING"), True)
+    mass0 = sum(g.level)
+    for _ in range(200): g.transfer(); g.physics(0.05)
+    assert sum(g.level) == pytest.approx(mass0)
+    g.set_active(g.pumps("FILLING"), False); g.set_active(g.pumps("EMPTYING"), True)
+    for _ in range(200): g.transfer()
+    assert sum(g.level) == pytest.approx(mass0)
+
+def test_overflow_is_counted_as_spill():
+    desc = {"tanks": [{"id": "A", "capacity": 100, "level": 80}, {"id": "B", "capacity": 50, "level": 40}],
+            "pumps": [{"id": "P", "from": "A", "to": "B", "speed": 5}]}
+    g = FlowGraph(desc); g.set_active([0], True)
+    for _ in range(20): g.transfer()
+    assert sum(g.level) + sum(g.spill) == pytest.approx(120)
+    assert g.spill[g.index["B"]] > 0
+
+def test_load_plant_returns_private_copy():
+    plant = load_plant(); plant["tanks"].clear()
+    assert load_plant()["tanks"]
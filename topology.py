@@ -0,0 +1,178 @@
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import functools
+from array import array
+
+from engine import AMBIENT_TEMP, COOLING_K, PUMP_SPEED
+
+# --- KONFIGURACJA ---
+PLANT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instalacja.json")
+ROLES = ("feed", "mixer", "store")  # Zbiorniki wsadu, mieszalnik (grzany, z PID), magazyn
+PHASES = ("FILLING", "EMPTYING")    # Fazy procesu, w których pracuje pompa
+
+# --- OPIS INSTALACJI ---
+# JSON: "tanks" (id, name, role, capacity, level, temp, thermal, color, cell, align),
+# "nodes" - węzły mieszające bez pojemności (id), "pumps" - krawędzie grafu (id, from, to, phase,
+# speed [L/krok, null = cały napływ węzła], shape, cell), "pipes" (pump, orient, cell), "grid" (stretch).
+# "cell" = [wiersz, kolumna(, wiersze, kolumny)] w siatce synoptyki; elementy bez "cell" nie są rysowane.
+
+@functools.lru_cache(maxsize=None)
+def read_plant(path):
+    with open(path, encoding="utf-8") as f: return json.load(f)
+
+def load_plant(path=PLANT_FILE):
+    """ Opis instalacji z pliku - plik czytany raz, każdy wywołujący dostaje własną kopię (może ją zmieniać) """
+    return copy.deepcopy(read_plant(path))
+
+def topo_depth(n, edges):
+    """ Głębokość węzłów (najdłuższa ścieżka od źródła) metodą Kahna; cykl -> ValueError """
+    out = [[] for _ in range(n)]; indeg = [0] * n
+    for s, d in edges: out[s].append(d); indeg[d] += 1
+    depth = [0] * n; ready = [i for i in range(n) if indeg[i] == 0]; seen = 0
+    while ready:
+        i = ready.pop(); seen += 1
+        for d in out[i]:
+            depth[d] = max(depth[d], depth[i] + 1)
+            indeg[d] -= 1
+            if indeg[d] == 0: ready.append(d)
+    if seen != n: raise ValueError("instalacja: cykl w grafie przepływu")
+    return depth
+
+class TankRef:
+    """ Zbiornik jako widok na tablice grafu - ten sam interfejs co engine.Tank (level, temp, moce) """
+    __slots__ = ("g", "i", "name", "capacity")
+
+    def __init__(self, graph, i):
+        self.g = graph; self.i = i
+        self.name = graph.names[i]; self.capacity = graph.capacity[i]
+
+    level = property(lambda s: s.g.level[s.i], lambda s, v: s.g.level.__setitem__(s.i, v))
+    temp = property(lambda s: s.g.temp[s.i], lambda s, v: s.g.temp.__setitem__(s.i, v))
+    heater_power = property(lambda s: s.g.heater[s.i], lambda s, v: s.g.heater.__setitem__(s.i, v))
+    cooling_power = property(lambda s: s.g.cooling[s.i], lambda s, v: s.g.cooling.__setitem__(s.i, v))
+
+class FlowGraph:
+    """ Instalacja skompilowana do płaskich tablic: stan węzłów + pompy (krawędzie) w porządku topologicznym.
+        Jeden tick transportu to jedno przejście po aktywnych krawędziach - węzeł mieszający dostaje
+        cały napływ, zanim jego krawędzie wyjściowe zostaną przeliczone. """
+    def __init__(self, desc):
+        tanks = desc.get("tanks", []); nodes = desc.get("nodes", [])
+        if not tanks: raise ValueError("instalacja: brak zbiorników")
+        items = tanks + nodes
+        self.ids = [t["id"] for t in items]
+        if len(set(self.ids)) != len(self.ids): raise ValueError("instalacja: powtórzony identyfikator węzła")
+        self.index = {k: i for i, k in enumerate(self.ids)}
+        self.n_tanks = len(tanks)
+        self.names = [t.get("name", t["id"]) for t in items]
+        self.roles = [t.get("role") for t in tanks] + ["node"] * len(nodes)
+        for t in tanks:
+            if t.get("role") not in ROLES + (None,): raise ValueError(f"zbiornik {t['id']}: nieznana rola {t['role']}")
+
+        # Stan węzłów (węzeł mieszający = nieograniczona pojemność, zwykle pusty po ticku)
+        self.capacity = array("d", [float(t["capacity"]) for t in tanks] + [float("inf")] * len(nodes))
+        self.init_level = array("d", [float(t.get("level", 0.0)) for t in items])
+        self.init_temp = array("d", [float(t.get("temp", AMBIENT_TEMP)) for t in items])
+        self.level = array("d", self.init_level); self.temp = array("d", self.init_temp)
+        self.heater = array("d", bytes(8 * len(items))); self.cooling = array("d", bytes(8 * len(items)))
+        self.spill = array("d", bytes(8 * len(items))) # Ciecz utracona przez przelew węzła [L] (od resetu)
+        self.thermal = tuple(i for i, t in enumerate(tanks) if t.get("thermal"))
+
+        # Krawędzie posortowane wg głębokości źródła - napływ do węzła zawsze przed odpływem
+        edges = []
+        for p in desc.get("pumps", []):
+            try: s = self.index[p["from"]]; d = self.index[p["to"]]
+            except KeyError as e: raise ValueError(f"pompa {p['id']}: nieznany węzeł {e}") from None
+            if p.get("phase") not in PHASES + (None,): raise ValueError(f"pompa {p['id']}: nieznana faza {p['phase']}")
+            speed = p.get("speed", PUMP_SPEED)
+            edges.append((p["id"], s, d, -1.0 if speed is None else float(speed), p.get("phase")))
+        depth = topo_depth(len(items), [(s, d) for _, s, d, _, _ in edges])
+        edges.sort(key=lambda e: depth[e[1]])
+        self.pump_ids = [e[0] for e in edges]
+        self.pump_index = {k: i for i, k in enumerate(self.pump_ids)}
+        self.src = array("i", [e[1] for e in edges]); self.dst = array("i", [e[2] for e in edges])
+        self.speed = array("d", [e[3] for e in edges]); self.phase = [e[4] for e in edges]
+        self.active = array("b", bytes(len(edges)))
+        self.running = [] # Aktywne krawędzie w porządku topologicznym
+
+    def reset(self):
+        self.level[:] = self.init_level; self.temp[:] = self.init_temp
+        for i in range(len(self.heater)): self.heater[i] = 0.0; self.cooling[i] = 0.0; self.spill[i] = 0.0
+        self.set_active(range(len(self.active)), False)
+
+    def tank(self, key):
+        return TankRef(self, self.index[key] if isinstance(key, str) else key)
+
+    def tanks(self, role=None):
+        return [TankRef(self, i) for i in range(self.n_tanks) if role is None or self.roles[i] == role]
+
+    def pumps(self, phase):
+        return [e for e, ph in enumerate(self.phase) if ph == phase]
+
+    def set_active(self, edges, on):
+        for e in edges: self.active[e] = on
+        self.running = [e for e in range(len(self.active)) if self.active[e]]
+
+    # --- TICK ---
+
+    def transfer(self):
+        """ Transport masy i ciepła po aktywnych pompach (semantyka Tank.remove_liquid / add_liquid) """
+        level = self.level; temp = self.temp; cap = self.capacity
+        src = self.src; dst = self.dst; speed = self.speed; spill = self.spill
+        for e in self.running:
+            s = src[e]; d = dst[e]
+            amount = level[s]; k = speed[e]
+            if 0.0 <= k < amount: amount = k
+            level[s] -= amount
+            m_old = level[d]; m_new = m_old + amount
+            if m_new <= cap[d]: # Inaczej przelew - jak Tank.add_liquid ciecz przepada, liczymy ją w spill
+                if m_new > 0.001: temp[d] = (m_old * temp[d] + amount * temp[s]) / m_new
+                level[d] = m_new
+            else: spill[d] += amount
+
+    def physics(self, dt):
+        """ Grzanie/chłodzenie i pasywne straty zbiorników z "thermal" (jak Tank.update_physics) """
+        level = self.level; temp = self.temp; heater = self.heater; cooling = self.cooling
+        for i in self.thermal:
+            t = temp[i]
+            if level[i] > 1:
+                mass_inertia = level[i] * 0.2 + 2.0
+                if heater[i] > 0: t += (heater[i] / 100.0) * 45.0 * dt / mass_inertia
+                if cooling[i] > 0: t -= (cooling[i] / 100.0) * 60.0 * dt / mass_inertia
+            t -= COOLING_K * (t - AMBIENT_TEMP) * 20.0 * dt
+            temp[i] = max(t, AMBIENT_TEMP)
+
+# --- POMIAR: instalacja syntetyczna ---
+
+def synthetic(feeds, fan_in=10):
+    """ `feeds` zbiorników wsadu -> węzły mieszające po `fan_in` -> mieszalnik -> magazyn """
+    tanks = [{"id": f"F{i}", "role": "feed", "capacity": 100, "level": 90, "temp": 15.0 + 80.0 * i / max(feeds - 1, 1)}
+             for i in range(feeds)]
+    tanks += [{"id": "MIX", "role": "mixer", "capacity": 10 ** 6, "thermal": True},
+              {"id": "OUT", "role": "store", "capacity": 10 ** 6, "thermal": True}]
+    nodes = [{"id": f"J{j}"} for j in range((feeds + fan_in - 1) // fan_in)]
+    pumps = [{"id": f"P{i}", "from": f"F{i}", "to": f"J{i // fan_in}", "phase": "FILLING"} for i in range(feeds)]
+    pumps += [{"id": f"PJ{j}", "from": n["id"], "to": "MIX", "phase": "FILLING", "speed": None} for j, n in enumerate(nodes)]
+    pumps += [{"id": "P-OUT", "from": "MIX", "to": "OUT", "phase": "EMPTYING"}]
+    return {"name": f"syntetyczna {feeds}", "tanks": tanks, "nodes": nodes, "pumps": pumps}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Graf przepływu instalacji - kompilacja i pomiar ticku")
+    ap.add_argument("--feeds", type=int, nargs="+", default=[10, 100, 500], help="liczby zbiorników wsadu")
+    ap.add_argument("--ticks", type=int, default=1000)
+    args = ap.parse_args()
+    g = FlowGraph(load_plant())
+    print(f"{PLANT_FILE}: {len(g.ids)} węzłów, pompy w kolejności: {', '.join(g.pump_ids)}")
+    for n in args.feeds:
+        t0 = time.perf_counter(); g = FlowGraph(synthetic(n)); t_build = time.perf_counter() - t0
+        g.set_active(g.pumps("FILLING"), True)
+        mass0 = sum(g.level)
+        t0 = time.perf_counter()
+        for _ in range(args.ticks): g.transfer(); g.physics(0.05)
+        t = (time.perf_counter() - t0) / args.ticks
+        print(f"{n:>5} zbiorników, {len(g.src):>5} pomp: kompilacja {t_build*1000:.2f} ms, "
+              f"tick {t*1e6:.1f} µs, bilans masy {sum(g.level) - mass0:+.2e} L")
+    sys.exit(0)
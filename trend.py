@@ -0,0 +1,111 @@
+import time
+from collections import deque
+
+import numpy as np
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import QTimer, Qt, QRectF
+from PyQt5.QtGui import QPainter, QColor, QPen, QPixmap, QPolygonF
+
+from telemetry import SPANS
+
+# --- KONFIGURACJA ---
+PLOT_RATE = 8         # Odświeżanie wykresu [Hz], niezależne od kroku fizyki
+Y_LIMITS = (-110, 110)
+# Kanał, kolor, grubość, styl - jak linie wykresu Matplotlib (plot.TrendPlot)
+LINES = (("pv", "#ff3333", 2.0, Qt.SolidLine, "PV (Temp)"),
+         ("sp", "#00ff00", 1.5, Qt.DashLine, "SP (Cel)"),
+         ("cv", "#00aaff", 1.0, Qt.SolidLine, "Moc (+/-)"))
+MARGIN = (46, 12, 16, 24) # lewy, górny, prawy, dolny [px] - miejsce na opisy osi
+
+def polygon(x, y):
+    """ QPolygonF wypełniony wprost z tablic NumPy (bez pętli po punktach) """
+    n = len(x); poly = QPolygonF(n)
+    if n:
+        buf = poly.data(); buf.setsize(16 * n)
+        xy = np.frombuffer(buf, np.float64).reshape(n, 2)
+        xy[:, 0] = x; xy[:, 1] = y
+    return poly
+
+class NativeTrend(QWidget):
+    """ Lekki wykres PV/SP/CV na QPainter - bez Matplotlib. Ten sam interfejs co plot.TrendPlot:
+        siatka i opisy osi w pixmapie (przebudowa przy zmianie rozmiaru / okna), co klatkę tylko linie. """
+    def __init__(self, store, span=SPANS["20 s"], rate_hz=PLOT_RATE):
+        super().__init__()
+        self.setMinimumHeight(150)
+        self.store = store; self.drawn_seq = -1
+        self.bg = None; self.polys = ()
+        self.pens = [QPen(QColor(c), w, s) for _, c, w, s, _ in LINES]
+        self.frame_times = deque(maxlen=200)
+        self.prof = None # profiler.Profiler GUI - koszt klatki wykresu jako etap "wykres"
+        self.set_span(span)
+
+        self.timer = QTimer(self); self.timer.timeout.connect(self.render)
+        self.set_rate(rate_hz)
+
+    def set_rate(self, hz):
+        self.timer.start(max(1, int(1000 / hz)))
+
+    def set_span(self, seconds):
+        """ Okno czasowe wykresu - oś X to sekundy względem ostatniej próbki """
+        self.span = seconds
+        self.bg = None; self.drawn_seq = -1
+        self.update()
+
+    def plot_rect(self):
+        l, t, r, b = MARGIN
+        return QRectF(l, t, max(self.width() - l - r, 1), max(self.height() - t - b, 1))
+
+    # --- RYSOWANIE ---
+
+    def background(self):
+        """ Tło, siatka, opisy osi i legenda - statyczne, w pixmapie """
+        pm = QPixmap(self.size()); pm.fill(QColor("#1a1a1a"))
+        p = QPainter(pm); r = self.plot_rect(); lo, hi = Y_LIMITS
+        p.fillRect(r, QColor("#111"))
+        grid = QPen(QColor("#333"), 1, Qt.DashLine); text = QColor("#888")
+        for k in range(5):
+            y = r.top() + r.height() * k / 4; v = hi - (hi - lo) * k / 4
+            p.setPen(grid); p.drawLine(int(r.left()), int(y), int(r.right()), int(y))
+            p.setPen(text); p.drawText(QRectF(0, y - 10, r.left() - 4, 20), Qt.AlignRight | Qt.AlignVCenter, f"{v:.0f}")
+        for k in range(5):
+            x = r.left() + r.width() * k / 4; s = -self.span + self.span * k / 4
+            p.setPen(grid); p.drawLine(int(x), int(r.top()), int(x), int(r.bottom()))
+            p.setPen(text); p.drawText(QRectF(x - 30, r.bottom() + 2, 60, 20), Qt.AlignCenter, f"{s:g}")
+        p.setPen(QColor("#444")); p.drawRect(r)
+        for i, (pen, line) in enumerate(zip(self.pens, LINES)):
+            y = r.top() + 12 + 16 * i
+            p.setPen(pen); p.drawLine(int(r.right() - 110), int(y), int(r.right() - 90), int(y))
+            p.setPen(QColor("white")); p.drawText(int(r.right() - 84), int(y + 4), line[4])
+        p.end()
+        return pm
+
+    def render(self):
+        if self.store.seq == self.drawn_seq or not self.isVisible(): return
+        t0 = time.perf_counter()
+        r = self.plot_rect(); lo, hi = Y_LIMITS
+        with self.store.lock: # Próbki dopisuje wątek procesu - przeliczamy okno na piksele pod blokadą
+            w = self.store.query(self.span)
+            x = w.t - w.t[-1] if len(w) else w.t
+            px = r.left() + (x + self.span) * (r.width() / self.span)
+            self.polys = tuple(polygon(px, r.top() + (hi - np.clip(w[name], lo, hi)) * (r.height() / (hi - lo)))
+                               for name, *_ in LINES)
+        self.drawn_seq = self.store.seq
+        self.repaint()
+        dt = time.perf_counter() - t0
+        self.frame_times.append(dt)
+        if self.prof is not None and self.prof.enabled: self.prof.add("wykres", dt)
+
+    def paintEvent(self, e):
+        if self.bg is None or self.bg.size() != self.size(): self.bg = self.background()
+        p = QPainter(self); p.drawPixmap(0, 0, self.bg)
+        p.setRenderHint(QPainter.Antialiasing); p.setClipRect(self.plot_rect())
+        for pen, poly in zip(self.pens, self.polys):
+            p.setPen(pen); p.drawPolyline(poly)
+
+    def resizeEvent(self, e):
+        self.bg = None; self.drawn_seq = -1
+
+    def frame_cost_ms(self):
+        """ Średni koszt klatki wykresu [ms] z ostatnich próbek """
+        if not self.frame_times: return 0.0
+        return 1000.0 * sum(self.frame_times) / len(self.frame_times)
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import REFRESH_RATE, MixingProcess
+
+# --- KONFIGURACJA STROJENIA ---
+MAX_HEATING_S = 120.0  # Dłuższa regulacja = kandydat odrzucony
+MAX_OVERSHOOT = 10.0   # Przeregulowanie [°C], powyżej którego przerywamy symulację
+STALL_S = 10.0         # Brak poprawy uchybu przez tyle sekund = regulator utknął
+W_OVERSHOOT = 5.0      # Waga przeregulowania w ocenie
+W_ERROR = 20.0         # Waga końcowego błędu w magazynie
+
+GRID = {
+    "kp": (5.0, 10.0, 15.0, 20.0, 30.0),
+    "ki": (0.2, 0.5, 0.8, 1.5, 3.0),
+    "kd": (0.0, 2.0, 5.0, 10.0),
+    "temp_a": (15.0, 25.0),
+    "temp_b": (85.0, 95.0),
+}
+RANGES = {"kp": (1.0, 40.0), "ki": (0.0, 5.0), "kd": (0.0, 20.0), "temp_a": (10.0, 30.0), "temp_b": (80.0, 99.0)}
+
+# --- OCENA KANDYDATA ---
+
+def evaluate(cand, target=60.0):
+    """ Jedna szarża dla (kp, ki, kd, temp_a, temp_b); wynik: czas ustalania, przeregulowanie, błąd końcowy """
+    kp, ki, kd, temp_a, temp_b = cand
+    dt = REFRESH_RATE / 1000.0
+    proc = MixingProcess(kp=kp, ki=ki, kd=kd)
+    proc.temp_a = temp_a; proc.temp_b = temp_b; proc.target = target
+    proc.start()
+
+    settle = 0.0; overshoot = 0.0; sign = 0; status = "OK"
+    best_err = float("inf"); best_t = 0.0
+    while proc.state != "DONE":
+        proc.step(dt)
+        if proc.state != "HEATING": continue
+        settle += dt
+        # Kierunek dojścia do celu ustalamy na początku regulacji (grzanie albo chłodzenie)
+        if not sign: sign = 1 if proc.calculated_target >= proc.tMix.temp else -1
+        err = abs(proc.tMix.temp - proc.calculated_target)
+        overshoot = max(overshoot, sign * (proc.tMix.temp - proc.calculated_target))
+        if err < best_err - 0.01: best_err = err; best_t = settle
+
+        # Wczesne odrzucenie ewidentnie złych nastaw
+        if settle > MAX_HEATING_S: status = "TIMEOUT"; break
+        if overshoot > MAX_OVERSHOOT: status = "PRZEREGULOWANIE"; break
+        if settle - best_t > STALL_S: status = "STAGNACJA"; break
+
+    error = proc.tOut.temp - target
+    score = settle + W_OVERSHOOT * overshoot + W_ERROR * abs(error) if status == "OK" else float("inf")
+    return {"kp": kp, "ki": ki, "kd": kd, "temp_a": temp_a, "temp_b": temp_b,
+            "settle": settle, "overshoot": overshoot, "error": error, "score": score, "status": status}
+
+# --- GENERATORY KANDYDATÓW ---
+
+def grid_candidates(grid=GRID):
+    return list(itertools.product(grid["kp"], grid["ki"], grid["kd"], grid["temp_a"], grid["temp_b"]))
+
+def random_candidates(n, ranges=RANGES, seed=0):
+    rng = random.Random(seed)
+    keys = ("kp", "ki", "kd", "temp_a", "temp_b")
+    return [tuple(rng.uniform(*ranges[k]) for k in keys) for _ in range(n)]
+
+# --- PRZESZUKIWANIE ---
+
+def sweep(candidates, workers=None, target=60.0):
+    """ Ocena kandydatów na wszystkich rdzeniach; zwraca tabelę posortowaną wg oceny """
+    workers = workers or os.cpu_count() or 1
+    # Paczki po kilkadziesiąt kandydatów - mniej komunikacji między procesami
+    chunk = max(1, len(candidates) // (workers * 8))
+    targets = itertools.repeat(target, len(candidates))
+    if workers == 1:
+        results = list(map(evaluate, candidates, targets))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(evaluate, candidates, targets, chunksize=chunk))
+    return sorted(results, key=lambda r: r["score"])
+
+def print_table(results, top):
+    print(f"{'#':>3} {'KP':>6} {'KI':>6} {'KD':>6} {'T_A':>6} {'T_B':>6} "
+          f"{'USTAL.[s]':>9} {'PRZEREG.':>8} {'RÓŻNICA':>8} {'OCENA':>8}  STATUS")
+    for i, r in enumerate(results[:top], 1):
+        print(f"{i:>3} {r['kp']:6.2f} {r['ki']:6.2f} {r['kd']:6.2f} {r['temp_a']:6.1f} {r['temp_b']:6.1f} "
+              f"{r['settle']:9.2f} {r['overshoot']:8.2f} {r['error']:+8.2f} {r['score']:8.2f}  {r['status']}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Strojenie DualPID - przeszukiwanie nastaw na wielu rdzeniach")
+    ap.add_argument("--mode", choices=("grid", "random"), default="grid", help="siatka GRID albo losowanie z RANGES")
+    ap.add_argument("--samples", type=int, default=2000, help="liczba kandydatów w trybie random")
+    ap.add_argument("--target", type=float, default=60.0, help="temperatura docelowa [°C]")
+    ap.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie wszystkie rdzenie)")
+    ap.add_argument("--top", type=int, default=15, help="ile najlepszych wierszy wypisać")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    cands = grid_candidates() if args.mode == "grid" else random_candidates(args.samples, seed=args.seed)
+    t0 = time.perf_counter()
+    results = sweep(cands, args.workers, args.target)
+    elapsed = time.perf_counter() - t0
+
+    print_table(results, args.top)
+    rejected = sum(r["status"] != "OK" for r in results)
+    print(f"\nKANDYDACI: {len(results)} (odrzuconych: {rejected}), CZAS: {elapsed:.2f}s "
+          f"({len(results) / elapsed:,.0f} konfiguracji/s)")
+    sys.exit(0)
@@ -0,0 +1,99 @@
+import sys
+import time
+import argparse
+
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QGridLayout, QHBoxLayout, QVBoxLayout, QGroupBox, QLabel
+from PyQt5.QtCore import QTimer
+
+from engine import STATES
+from main import CyberTank
+from worker import TankView
+from telebus import STALE_AFTER, BusReader, discover
+
+# --- KONFIGURACJA ---
+VIEW_RATE = 20        # Odpytywanie magistral [Hz]
+RECONNECT = 1.0       # Co ile sekund próba podłączenia zerwanej magistrali
+COLORS = ("#00ccff", "#ffaa00", "#ff00ff", "#00ff00", "#ffff00", "#ff5555")
+
+class BusPanel(QGroupBox):
+    """ Podgląd jednego symulatora: zbiorniki, pompy i stan z magistrali - tylko odczyt """
+    def __init__(self, name):
+        super().__init__(name.upper())
+        self.name = name; self.reader = None; self.retry_t = 0.0
+        self.tanks = []; self.row = QHBoxLayout()
+        self.info = QLabel("OCZEKIWANIE NA SYMULATOR..."); self.info.setStyleSheet("font-family: Consolas;")
+        self.pumps = QLabel(""); self.pumps.setStyleSheet("font-family: Consolas;")
+        lay = QVBoxLayout(self); lay.addLayout(self.row); lay.addWidget(self.pumps); lay.addWidget(self.info)
+
+    def connect(self):
+        """ Podłączenie (lub ponowne - po restarcie symulatora segment jest nowy) """
+        self.retry_t = time.perf_counter() + RECONNECT
+        try: r = BusReader(self.name)
+        except (OSError, ValueError): return False
+        if self.reader is not None:
+            if r.layout.pid == self.reader.layout.pid: r.close(); return False
+            self.reader.close()
+        self.reader = r; meta = r.meta
+        for w in self.tanks: w.setParent(None)
+        self.tanks = []
+        for i in range(meta["tanks"]):
+            w = CyberTank(TankView(meta["names"][i], meta["capacity"][i], 0.0, 0.0, 0.0, 0.0), COLORS[i % len(COLORS)])
+            self.row.addWidget(w); self.tanks.append(w)
+        self.setTitle(f"{self.name.upper()} - {meta['plant'] or 'instalacja'} (pid {r.layout.pid})")
+        return True
+
+    def poll(self):
+        r = self.reader
+        if r is None or r.age() > STALE_AFTER:
+            if time.perf_counter() >= self.retry_t and self.connect(): r = self.reader
+            elif r is None: return
+            else: self.info.setText(f"BRAK PULSU OD {r.age():.0f} s"); return
+        f = r.read()
+        if f is None: return
+        meta = r.meta
+        for i, w in enumerate(self.tanks):
+            w.set_view(TankView(meta["names"][i], meta["capacity"][i], f.level[i], f.temp[i], f.heater[i], f.cooling[i]))
+        self.pumps.setText("   ".join(f"{p}: {'PRACA' if on else 'STOP'}" for p, on in zip(meta["pumps"], f.pumps)))
+        state = STATES[int(f.state)] + (" (AWARYJNY STOP)" if f.paused else "")
+        self.info.setText(f"{state}   t = {f.sim_time:.1f} s   PID {f.cv:+.1f}%   SP {f.setpoint:.1f}°C   "
+                          f"RÓŻNICA {f.delta:+.2f}°C   opóźnienie {(time.perf_counter() - f.stamp) * 1000:.1f} ms")
+
+    def close_reader(self):
+        if self.reader is not None: self.reader.close(); self.reader = None
+
+class BusViewer(QMainWindow):
+    """ Pulpit wielu symulatorów - każdy panel mapuje swoją magistralę tylko do odczytu """
+    def __init__(self, names, columns=2):
+        super().__init__()
+        self.setWindowTitle(f"SCADA - PODGLĄD ({len(names)} magistral)")
+        self.setStyleSheet("""
+            QMainWindow { background-color: #121212; }
+            QWidget { color: #dddddd; font-family: 'Segoe UI', sans-serif; }
+            QGroupBox { border: 1px solid #444; border-radius: 4px; margin-top: 20px;
+                        background: #1a1a1a; font-weight: bold; color: #00ccff; }
+            QGroupBox::title { subcontrol-origin: margin; left: 10px; padding: 0 5px; }
+            QLabel { color: #bbb; font-size: 12px; }
+        """)
+        central = QWidget(); self.setCentralWidget(central); grid = QGridLayout(central)
+        self.panels = [BusPanel(n) for n in names]
+        for k, p in enumerate(self.panels): grid.addWidget(p, k // columns, k % columns); p.connect()
+        self.timer = QTimer(self); self.timer.timeout.connect(self.poll); self.timer.start(int(1000 / VIEW_RATE))
+
+    def poll(self):
+        for p in self.panels: p.poll()
+
+    def closeEvent(self, e):
+        self.timer.stop()
+        for p in self.panels: p.close_reader()
+        super().closeEvent(e)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Podgląd symulatorów z magistrali telemetrii (pamięć współdzielona, tylko odczyt)")
+    ap.add_argument("names", nargs="*", help="nazwy magistral (domyślnie wszystkie widoczne)")
+    ap.add_argument("--columns", type=int, default=2)
+    args, qt_args = ap.parse_known_args()
+    names = args.names or discover()
+    if not names: sys.exit("Brak magistral - uruchom np. python telebus.py sim linia1 albo python main.py --bus linia1")
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = BusViewer(names, args.columns); window.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,205 @@
+import time
+import queue
+import threading
+import copy
+from collections import namedtuple
+
+from engine import MixingProcess
+from simclock import SIM_DT, SimClock
+from profiler import Profiler
+from checkpoint import apply, capture
+from scheduler import Scheduler
+
+STAGES = ("komendy", "fizyka", "logika", "historia", "telemetria", "alarmy", "publikacja")
+# Klasy zadań wątku procesu (nazwa, okres [s], priorytet): komendy i kroki fizyki/PID co 10 ms
+# (krok symulacji pozostaje SIM_DT - zegar wykonuje go w pierwszym cyklu, w którym jest należny),
+# punkty kontrolne co 1 s; obraz rejestrów Modbus razem ze zrzutem, po każdym ticku ze zmianą stanu
+SCAN_CLASSES = (("sterowanie", 0.010, 0), ("obsługa", 1.0, 1))
+
+# --- ZRZUT STANU ---
+# Niezmienne krotki - GUI może je czytać w dowolnym momencie, wątek procesu nigdy ich nie modyfikuje
+TankView = namedtuple("TankView", "name capacity level temp heater_power cooling_power")
+Snapshot = namedtuple("Snapshot", "seq state sim_time active is_paused pump_a pump_b pump_out "
+                                  "setpoint calculated_target delta tanks pumps replay alarms")
+
+def tank_view(t):
+    return TankView(t.name, t.capacity, t.level, t.temp, t.heater_power, t.cooling_power)
+
+class ProcessWorker:
+    """ Fizyka, PID i logika stanów we własnym wątku, w klasach zadań o stałych okresach niezależnych od GUI.
+        Po każdym ticku ze zmianą stanu publikuje zrzut do tylnego bufora i zamienia bufory; GUI czyta przedni.
+        Komendy operatora przychodzą kolejką i są wykonywane na początku ticku. """
+    def __init__(self, proc=None, store=None, hist=None, modbus=None, ckpt=None, dt=SIM_DT, scan_classes=SCAN_CLASSES,
+                 alarms=None, bus=None):
+        self.proc = proc if proc is not None else MixingProcess()
+        self.store = store; self.hist = hist; self.modbus = modbus
+        self.bus = bus # telebus.BusWriter - stan procesu dla podglądów w innych procesach (pamięć współdzielona)
+        # Punkty kontrolne: serializacja tutaj (spójny stan między tickami), zapis w wątku Checkpointer
+        self.ckpt = ckpt; self.ckpt_state = self.proc.state
+        # Telemetrię pisze ten wątek, czyta wykres w GUI - wspólna blokada na paczkę kroków
+        self.lock = store.lock if store else threading.Lock()
+        self.clock = SimClock(dt)
+        # Odtwarzanie pokazuje kopię procesu (tylko do wyświetlania) - żywa instalacja, alarmy i Modbus bez zmian
+        self.replay = None; self.shown = self.proc
+        self.cmds = queue.SimpleQueue(); self.log = queue.SimpleQueue()
+        self.proc.on_event = lambda type, msg: self.log.put((type, msg))
+        # Alarmy (alarms.AlarmEngine) oceniane po każdym ticku ze zmianą stanu - tylko reguły zmienionych tagów
+        self.alarms = alarms
+        if alarms: alarms.on_event = self.proc.on_event
+
+        # Podwójny bufor zrzutów: piszemy do buffers[1 - front], potem zamiana indeksu
+        self.buffers = [None, None]; self.front = 0; self.seq = 0
+        self.publish()
+
+        # Zadania cykliczne: (klasa, zadanie, funkcja); statystyki spóźnień i przekroczeń per klasa
+        self.sched = Scheduler()
+        for name, period, priority in scan_classes: self.sched.add(name, period, priority)
+        self.sched.task("sterowanie", "komendy + kroki procesu", self.tick)
+        if ckpt: self.sched.task("obsługa", "punkt kontrolny", self.housekeeping)
+        if bus: self.sched.task("obsługa", "puls magistrali", bus.beat) # Co 1 s - także bez zmian stanu
+        self.prof = Profiler("PROCES", STAGES, budget_ms=self.sched.classes[0].period * 1000)
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="process", daemon=True)
+
+    # --- STRONA GUI ---
+
+    @property
+    def snapshot(self):
+        return self.buffers[self.front]
+
+    def send(self, cmd, *args):
+        """ START | PAUSE | RESUME | RESET | SET (atrybut, wartość) | SPEED (x) | REPLAY (Replay) | RESTORE (bajty)
+            | ACK (id alarmu, bez argumentu = wszystkie) """
+        self.cmds.put((cmd, args))
+
+    def events(self):
+        """ Zdarzenia procesu zebrane od ostatniego wywołania (do dziennika w wątku GUI) """
+        while True:
+            try: yield self.log.get_nowait()
+            except queue.Empty: return
+
+    def stats(self):
+        """ Statystyki klas zadań (Scheduler.stats) - zeruje maksima """
+        return self.sched.stats()
+
+    def start(self):
+        self.thread.start(); return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread.is_alive(): self.thread.join()
+
+    def checkpoint(self):
+        """ Zrzut stanu do zapisu w tle - z wątku procesu albo po stop() """
+        self.ckpt_state = self.proc.state
+        self.ckpt.submit(capture(self.proc, self.store))
+
+    # --- WĄTEK PROCESU ---
+
+    def publish(self):
+        p = self.shown; self.seq += 1
+        replay = None if self.replay is None else (self.replay.batch, self.replay.finished)
+        back = 1 - self.front
+        self.buffers[back] = Snapshot(self.seq, p.state, p.sim_time, p.active, p.is_paused,
+                                      p.pump_a, p.pump_b, p.pump_out, p.setpoint, p.calculated_target, p.delta,
+                                      tuple(map(tank_view, p.graph.tanks())), tuple(map(bool, p.graph.active)),
+                                      replay, self.alarms.view if self.alarms else ())
+        self.front = back
+        if self.modbus: self.modbus.publish(self.proc)
+        if self.bus: self.bus.write(self.proc)
+
+    def housekeeping(self):
+        # Punkt kontrolny co ckpt.every s aktywnej partii i po każdej zmianie fazy (także DONE / IDLE)
+        p = self.proc
+        if self.replay is None and (p.state != self.ckpt_state or p.active and self.ckpt.due(time.perf_counter())):
+            self.checkpoint()
+
+    def execute(self, cmd, args):
+        p = self.proc
+        if cmd == "START":
+            if p.active: return
+            self.stop_replay()
+            if self.store:
+                with self.lock: self.store.clear()
+            if self.hist: self.hist.begin_batch()
+            p.start(); self.clock.reset()
+        elif cmd == "PAUSE": p.pause()
+        elif cmd == "RESUME": p.resume()
+        elif cmd == "RESET": self.stop_replay(); p.reset()
+        elif cmd == "SET": setattr(p, *args)
+        elif cmd == "SPEED":
+            self.clock.speed = args[0]
+            if self.replay is not None: self.replay.speed = args[0]
+        elif cmd == "REPLAY":
+            self.replay = args[0]; self.clock.speed = self.replay.speed
+            self.shown = copy.deepcopy(p); self.shown.on_event = None
+            if self.store:
+                with self.lock: self.store.clear()
+            self.clock.reset()
+        elif cmd == "RESTORE":
+            t0 = time.perf_counter()
+            try:
+                with self.lock: apply(args[0], p, self.store)
+            except ValueError as e: self.log.put(("SYSTEM", str(e))); return
+            self.stop_replay(); self.clock.reset(); self.ckpt_state = p.state
+            if self.alarms: self.alarms.invalidate()
+            if self.hist and p.active: self.hist.begin_batch() # Wznowiona partia zapisuje się jako nowa
+            self.log.put(("SYSTEM", f"Odtworzono punkt kontrolny: {p.state}, t = {p.sim_time:.1f} s "
+                                    f"({(time.perf_counter() - t0) * 1000:.1f} ms)"))
+        elif cmd == "ACK":
+            if self.alarms: self.alarms.ack(*args)
+
+    def stop_replay(self):
+        self.replay = None; self.shown = self.proc
+
+    def replay_step(self):
+        from historian import apply_record # numpy/historia potrzebne tylko przy odtwarzaniu
+        recs = self.replay.advance(self.clock.real_dt)
+        if self.store:
+            for r in recs:
+                self.store.push(r["t"], r["temp"][2], r["sp"], r["heater"] - r["cooling"], r["level"], r["temp"])
+        if len(recs): apply_record(self.shown, recs[-1])
+        if self.replay.finished: self.log.put(("ODTWARZANIE", f"Koniec partii {self.replay.batch}"))
+
+    def tick(self):
+        prof = self.prof if self.prof.enabled else None
+        if prof: prof.begin()
+        busy = False
+        while True:
+            try: self.execute(*self.cmds.get_nowait()); busy = True
+            except queue.Empty: break
+        if prof: prof.lap("komendy")
+        p = self.proc; dt = self.clock.dt
+        n = self.clock.tick()
+        if self.replay is not None:
+            if not self.replay.finished:
+                with self.lock: self.replay_step()
+                if prof: prof.lap("historia")
+                busy = True
+        elif p.active and n:
+            busy = True
+            # Stały krok fizyki, tyle razy ile wynika z czasu rzeczywistego i przyspieszenia. Blokada telemetrii
+            # tylko na krok i dopisanie do bufora - zapis historii (plik) nie wstrzymuje rysowania wykresu
+            lock = self.lock; hist = self.hist; store = self.store
+            for _ in range(n):
+                with lock:
+                    if prof: p.physics(dt); prof.lap("fizyka"); p.control(dt); prof.lap("logika")
+                    else: p.step(dt)
+                    if store: store.push_process(p)
+                if prof: prof.lap("telemetria")
+                if hist: hist.record(p)
+                if prof: prof.lap("historia")
+                if p.state == "DONE": break
+        if not busy:
+            # Cykl bez komend i bez należnego kroku - zrzut i profil bez zmian
+            if prof: prof.discard()
+            return
+        if self.alarms and self.replay is None: # Odtwarzane dane nie wzbudzają alarmów
+            self.alarms.scan(p.sim_time)
+            if prof: prof.lap("alarmy")
+        self.publish()
+        if prof: prof.lap("publikacja"); prof.end()
+
+    def run(self):
+        self.clock.reset(); self.sched.reset()
+        self.sched.run(self.stopping)